@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+Reports the memory usage of the Redis store per vertex and per edge.
+
+Half of the vertices are literals. Each vertex gets two outgoing edges to
+random vertices.
+
+Usage::
+
+    python bench/redis_memory.py [number of vertices]
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+import sys
+import random
+import redis
+from nodo.store.redis import RedisConnection
+
+
+def used_memory(client):
+    return client.info('memory')['used_memory']
+
+
+def main(n):
+    client = redis.Redis()
+    conn = RedisConnection(client)
+    g = conn.create_graph()
+    # Literals of previous runs must not be reused
+    token = random.random()
+    start = used_memory(client)
+    vertices = tuple(g.create_vertices((u'Literal %d %r' % (i, token) if i % 2 else None, None)
+                                       for i in xrange(n)))
+    after_vertices = used_memory(client)
+    rnd = random.Random(42)
+    tuple(g.create_edges((v, rnd.choice(vertices)) for v in vertices for i in range(2)))
+    after_edges = used_memory(client)
+    print 'bytes per vertex: %.1f' % (float(after_vertices - start) / n)
+    print 'bytes per edge:   %.1f' % (float(after_edges - after_vertices) / (2 * n))
+    conn.delete_graph(g.identifier)
+    conn.sweep_literals()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
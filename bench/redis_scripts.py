@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+Compares the number of round trips of the Lua scripts with the plain
+command implementation of the Redis store.
+
+Usage::
+
+    python bench/redis_scripts.py [number of edges]
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+import sys
+import time
+import redis
+from nodo.store.redis import RedisConnection
+
+
+class CountingRedis(redis.Redis):
+    """\
+    Redis client which counts the round trips to the server.
+    """
+    round_trips = 0
+
+    def execute_command(self, *args, **options):
+        self.round_trips += 1
+        return super(CountingRedis, self).execute_command(*args, **options)
+
+    def pipeline(self, *args, **kw):
+        pipe = super(CountingRedis, self).pipeline(*args, **kw)
+        execute = pipe.execute
+        def counting_execute(*a, **k):
+            self.round_trips += 1
+            return execute(*a, **k)
+        pipe.execute = counting_execute
+        return pipe
+
+
+def measure(client, name, func):
+    client.round_trips = 0
+    start = time.time()
+    func()
+    return name, client.round_trips, time.time() - start
+
+
+def run(scripting, n):
+    client = CountingRedis()
+    conn = RedisConnection(client, scripting=scripting)
+    g = conn.create_graph()
+    hub, other = g.create_vertex(), g.create_vertex()
+    vertices = [g.create_vertex() for i in range(n)]
+    results = [measure(client, 'create_edge x %d' % n,
+                       lambda: [g.create_edge(hub, v) for v in vertices])]
+    for v in vertices:
+        g.create_edge(other, v)
+    results.append(measure(client, 'merge_vertices (%d edges)' % n,
+                           lambda: g.merge_vertices(hub, other)))
+    results.append(measure(client, 'delete_vertex (%d edges)' % (n * 2),
+                           lambda: g.delete_vertex(hub)))
+    conn.delete_graph(g.identifier)
+    return results
+
+
+def main(n):
+    for scripting in (False, True):
+        print 'scripting=%s' % scripting
+        for name, round_trips, duration in run(scripting, n):
+            print '  %-30s %8d round trips %8.3f s' % (name, round_trips, duration)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+Measures shortest path queries on a synthetic hypergraph.
+
+The graph consists of random edges with one to three members in the
+tail. The bidirectional search of `nodo.traversal.shortest_path` is
+compared with a unidirectional breadth-first search.
+
+Usage::
+
+    python bench/traversal.py [options]
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+import time
+import random
+from optparse import OptionParser
+from nodo import traversal
+from redis_scripts import CountingRedis
+
+
+def create_graph(g, n_vertices, n_edges, rnd):
+    vertices = tuple(g.create_vertices((None, None) for i in xrange(n_vertices)))
+    edges = ((rnd.choice(vertices),) + tuple(rnd.choice(vertices) for i in range(rnd.randint(1, 3)))
+             for j in xrange(n_edges))
+    for e in g.create_edges(edges):
+        pass
+    return vertices
+
+
+def bfs_distance(g, source, target):
+    for distance, layer in enumerate(traversal.bfs_layers(g, [source])):
+        if target in layer:
+            return distance
+    return None
+
+
+def measure(client, func):
+    if client is not None:
+        client.round_trips = 0
+    start = time.time()
+    res = func()
+    return res, time.time() - start, client.round_trips if client is not None else 0
+
+
+def main(args=None):
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('--store', default='redis', help='redis or memory (default: %default)')
+    parser.add_option('--vertices', type='int', default=200000,
+                      help='Number of vertices (default: %default)')
+    parser.add_option('--edges', type='int', default=1000000,
+                      help='Number of edges (default: %default)')
+    parser.add_option('--queries', type='int', default=20,
+                      help='Number of shortest path queries (default: %default)')
+    options, args = parser.parse_args(args)
+    client = None
+    if options.store == 'redis':
+        from nodo.store.redis import RedisConnection
+        client = CountingRedis()
+        conn = RedisConnection(client)
+    else:
+        from nodo.store.memory import MemoryConnection
+        conn = MemoryConnection()
+    g = conn.create_graph()
+    rnd = random.Random(42)
+    start = time.time()
+    vertices = create_graph(g, options.vertices, options.edges, rnd)
+    print 'graph: %d vertices, %d edges, created in %.1fs' % (options.vertices, options.edges,
+                                                             time.time() - start)
+    totals = {'bidirectional': [0, 0], 'unidirectional': [0, 0]}
+    for i in range(options.queries):
+        source, target = rnd.choice(vertices), rnd.choice(vertices)
+        path, t1, rt1 = measure(client, lambda: traversal.shortest_path(g, source, target))
+        distance, t2, rt2 = measure(client, lambda: bfs_distance(g, source, target))
+        assert (path is None and distance is None) or len(path) == distance
+        print 'length %4s  bidirectional %8.1fms %5d round trips  unidirectional %8.1fms %5d round trips' \
+                % (len(path) if path is not None else '-', t1 * 1000, rt1, t2 * 1000, rt2)
+        totals['bidirectional'][0] += t1
+        totals['bidirectional'][1] += rt1
+        totals['unidirectional'][0] += t2
+        totals['unidirectional'][1] += rt2
+    for name, (t, rt) in sorted(totals.iteritems()):
+        print '%s: %.1fms, %.1f round trips per query' % (name, t * 1000 / options.queries,
+                                                           float(rt) / options.queries)
+    conn.delete_graph(g.identifier)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+Internal helpers which are shared by the stores and the algorithms.
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from __future__ import absolute_import
+from itertools import islice
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The default number of items which are fetched or sent per request
+BATCH_SIZE = 1000
+
+NUMBERS = 'biuf'
+STRINGS = 'SU'
+
+
+def chunks(iterable, size):
+    """\
+    Returns an iterator over lists of at most `size` items of `iterable`.
+    """
+    it = iter(iterable)
+    chunk = list(islice(it, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(it, size))
+
+
+def unique(iterable):
+    """\
+    Returns an iterator which skips the items which have been seen already.
+    """
+    seen = set()
+    add = seen.add
+    for item in iterable:
+        if item not in seen:
+            add(item)
+            yield item
+
+
+def comparable(a, b):
+    """\
+    Returns if arrays of the dtypes `a` and `b` can be compared.
+    """
+    return (a.kind in NUMBERS and b.kind in NUMBERS) \
+            or (a.kind in STRINGS and b.kind in STRINGS)
+
+
+def id_positions(ids, keys):
+    """\
+    Returns an array with the position of each identifier of the array
+    `keys` in the sorted array `ids`, ``-1`` indicates an unknown identifier.
+
+    Requires NumPy.
+    """
+    res = np.full(len(keys), -1, np.int64)
+    if not len(keys) or not len(ids) or keys.ndim != 1 \
+            or not comparable(ids.dtype, keys.dtype):
+        return res
+    pos = np.minimum(np.searchsorted(ids, keys), len(ids) - 1)
+    found = ids[pos] == keys
+    res[found] = pos[found]
+    return res
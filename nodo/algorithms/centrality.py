@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+This module provides centrality measures of the vertices of a graph.
+
+The measures are computed on the sparse incidence matrix of the graph
+(see `nodo.matrix.incidence`): The matrix ``H`` marks the head and the
+matrix ``T`` the tail members of each edge. Iterative measures are
+computed as sparse matrix-vector products until the L1 distance of two
+iterations is below ``n * tol`` where ``n`` is the number of vertices.
+
+Each function accepts a graph or an `Incidence` which has been created
+with ``incidence(graph, head=1, tail=2)``. The latter allows to compute
+several measures with one export of the graph; a ``ValueError`` is raised
+if its entries do not use these weights. The results are dicts which map
+the vertex identifiers to their scores.
+
+Tail members which are edges are not taken into account.
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from __future__ import absolute_import
+import numpy as np
+from .. import constants as consts
+from ..matrix import Incidence, incidence
+
+_HEAD = 1
+_TAIL = 2
+
+
+def pagerank(graph, alpha=0.85, personalization=None, max_iter=100, tol=1.0e-6):
+    """\
+    Returns the PageRank of the vertices.
+
+    The random walk moves from a vertex to one of its outgoing edges and
+    from the edge to one of its tail members, each choice is uniform. With
+    the probability ``1 - alpha`` and from vertices without outgoing edges
+    the walk jumps to a vertex chosen according to the `personalization`.
+
+    A ``ValueError`` is raised if the iteration does not converge within
+    `max_iter` iterations.
+
+    `graph`
+        A graph or an `Incidence`.
+    `alpha`
+        The damping factor (default: 0.85).
+    `personalization`
+        An optional dict which maps vertex identifiers to the probability
+        of a jump to them. Missing vertices have the probability ``0``.
+        If not provided, all vertices are chosen with the same probability.
+    `max_iter`
+        The maximum number of iterations (default: 100).
+    `tol`
+        The error tolerance (default: 1.0e-6).
+    """
+    inc = _incidence(graph)
+    heads, tails = _head_tail(inc)
+    n = len(inc.vertices)
+    if not n:
+        return {}
+    if personalization is None:
+        p = np.full(n, 1.0 / n)
+    else:
+        p = np.zeros(n)
+        rows = inc.vertex_indexes(personalization.keys())
+        p[rows[rows >= 0]] = np.asarray(personalization.values(), np.float64)[rows >= 0]
+        if p.sum() <= 0:
+            raise ValueError('The personalization must contain a vertex with a positive probability')
+        p /= p.sum()
+    out_weight = _inverse(_counts(heads, axis=1))
+    tail_weight = _inverse(_counts(tails, axis=0))
+    # Vertices without outgoing edges and edges without tail vertices
+    dangling_vertices = out_weight == 0
+    dangling_edges = tail_weight == 0
+    heads_t = heads.T.tocsr()
+    x = p.copy()
+    for i in xrange(max_iter):
+        edge_mass = heads_t.dot(x * out_weight)
+        dangling = x[dangling_vertices].sum() + edge_mass[dangling_edges].sum()
+        x_last, x = x, alpha * tails.dot(edge_mass * tail_weight)
+        x += (alpha * dangling + 1.0 - alpha) * p
+        if np.abs(x - x_last).sum() < n * tol:
+            return _result(inc, x)
+    raise ValueError('PageRank did not converge within %d iterations' % max_iter)
+
+
+def degree_centrality(graph, direction=consts.DIRECTION_BOTH):
+    """\
+    Returns the degree centrality of the vertices.
+
+    The degree centrality of a vertex is its degree divided by ``n - 1``
+    where ``n`` is the number of vertices.
+
+    `graph`
+        A graph or an `Incidence`.
+    `direction`
+        `constants.DIRECTION_IN` (indegree), `constants.DIRECTION_OUT`
+        (outdegree) or `constants.DIRECTION_BOTH` (degree, default).
+    """
+    inc = _incidence(graph)
+    heads, tails = _head_tail(inc)
+    degrees = np.zeros(len(inc.vertices))
+    if direction & consts.DIRECTION_IN:
+        degrees += _counts(tails, axis=1)
+    if direction & consts.DIRECTION_OUT:
+        degrees += _counts(heads, axis=1)
+    if len(degrees) > 1:
+        degrees /= len(degrees) - 1
+    return _result(inc, degrees)
+
+
+def eigenvector_centrality(graph, max_iter=100, tol=1.0e-6):
+    """\
+    Returns the eigenvector centrality of the vertices.
+
+    The centrality of a vertex is proportional to the sum of the
+    centralities of its predecessors, i.e. the vertices which are the head
+    of an edge the vertex is a tail member of. The iteration uses the
+    shifted matrix ``A + I`` which converges on graphs without cycles as
+    well. The result is normalized to unit length.
+
+    A ``ValueError`` is raised if the iteration does not converge within
+    `max_iter` iterations.
+
+    `graph`
+        A graph or an `Incidence`.
+    `max_iter`
+        The maximum number of iterations (default: 100).
+    `tol`
+        The error tolerance (default: 1.0e-6).
+    """
+    inc = _incidence(graph)
+    heads, tails = _head_tail(inc)
+    n = len(inc.vertices)
+    if not n:
+        return {}
+    heads_t = heads.T.tocsr()
+    x = np.full(n, 1.0 / n)
+    for i in xrange(max_iter):
+        x_last = x
+        x = x_last + tails.dot(heads_t.dot(x_last))
+        norm = np.sqrt(x.dot(x))
+        x /= norm if norm > 0 else 1
+        if np.abs(x - x_last).sum() < n * tol:
+            return _result(inc, x)
+    raise ValueError('The eigenvector centrality did not converge within %d iterations' % max_iter)
+
+
+def _incidence(graph):
+    """\
+    Returns the `Incidence` of the `graph` which marks heads with ``1`` and
+    tail members with ``2``.
+    """
+    if isinstance(graph, Incidence):
+        return graph
+    return incidence(graph, head=_HEAD, tail=_TAIL, dtype=np.int8)
+
+
+def _head_tail(inc):
+    """\
+    Returns the head matrix ``H`` and the tail matrix ``T`` as CSR matrices.
+
+    A ``ValueError`` is raised if the entries of the incidence matrix are
+    not a head (``1``), a tail member (``2``) or both (``3``) or if an edge
+    has more than one head.
+    """
+    m = inc.matrix.tocsr()
+    data = m.data.astype(np.int8)
+    if (data != m.data).any() or ((data < _HEAD) | (data > _HEAD | _TAIL)).any():
+        raise ValueError('The incidence matrix must mark heads with %d and tail members with %d' % (_HEAD, _TAIL))
+    res = []
+    for flag in (_HEAD, _TAIL):
+        part = m.copy()
+        part.data = ((data & flag) != 0).astype(np.float64)
+        part.eliminate_zeros()
+        res.append(part)
+    if (_counts(res[0], axis=0) > 1).any():
+        raise ValueError('The incidence matrix must mark heads with %d and tail members with %d' % (_HEAD, _TAIL))
+    return res
+
+
+def _counts(m, axis):
+    """\
+    Returns the number of entries per row (`axis` ``1``) or column (`axis`
+    ``0``) as float array.
+    """
+    return m.getnnz(axis=axis).astype(np.float64)
+
+
+def _inverse(a):
+    """\
+    Returns ``1 / a`` with ``0`` for the zero entries of `a`.
+    """
+    res = np.zeros(len(a))
+    nonzero = a != 0
+    res[nonzero] = 1.0 / a[nonzero]
+    return res
+
+
+def _result(inc, scores):
+    return dict(zip(inc.vertices.tolist(), scores.tolist()))
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+This module provides the weakly connected components of a graph.
+
+Two vertices belong to the same component if they are connected by a
+sequence of edges, regardless of the direction of the edges. An edge which
+is part of a tail connects the head of its edge to its own incidents.
+
+The components are computed by a union-find structure which is kept in
+`array` instances. The graph is read in one pass over its edges, the
+incidents of the edges are fetched in chunks.
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from __future__ import absolute_import
+from array import array
+from .._utils import BATCH_SIZE as _BATCH_SIZE, chunks as _chunks
+
+
+def connected_components(graph, batch_size=_BATCH_SIZE):
+    """\
+    Returns the weakly connected `Components` of the `graph`.
+
+    The vertices are fetched with ``iter_vertices``, the edges with
+    ``iter_edges`` and their incidents with ``incidents_many`` in chunks of
+    `batch_size` edges.
+
+    `graph`
+        The graph.
+    `batch_size`
+        The number of edges fetched per request (default: 1000).
+    """
+    uf = UnionFind()
+    index = {}
+    kinds = array('b')
+
+    def position(ident, is_vertex):
+        pos = index.get(ident)
+        if pos is None:
+            pos = index[ident] = uf.add()
+            kinds.append(is_vertex)
+        return pos
+
+    for v in graph.iter_vertices():
+        position(v, True)
+    for chunk in _chunks(graph.iter_edges(), batch_size):
+        for edge, incidents in zip(chunk, graph.incidents_many(chunk)):
+            e = position(edge, False)
+            for ident in incidents:
+                # Unknown identifiers are edges since all vertices are known
+                uf.union(e, position(ident, False))
+    return Components(index, uf.labels(), kinds)
+
+
+class UnionFind(object):
+    """\
+    A union-find (disjoint-set) structure of the integers ``0 .. n-1``.
+
+    The parents and the sizes of the sets are kept in arrays. `find`
+    halves the paths and `union` attaches the smaller set to the larger
+    one, so both operations need amortized almost constant time.
+    """
+    __slots__ = ('_parents', '_sizes')
+
+    def __init__(self, n=0):
+        """\
+
+        `n`
+            The number of initial singleton sets.
+        """
+        self._parents = array('l', xrange(n))
+        self._sizes = array('l', [1]) * n
+
+    def add(self):
+        """\
+        Adds a singleton set and returns its element.
+        """
+        i = len(self._parents)
+        self._parents.append(i)
+        self._sizes.append(1)
+        return i
+
+    def find(self, i):
+        """\
+        Returns the representative of the set which contains `i`.
+        """
+        parents = self._parents
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    def union(self, i, j):
+        """\
+        Merges the sets of `i` and `j` and returns the representative of
+        the merged set.
+        """
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return i
+        sizes = self._sizes
+        if sizes[i] < sizes[j]:
+            i, j = j, i
+        self._parents[j] = i
+        sizes[i] += sizes[j]
+        return i
+
+    def labels(self):
+        """\
+        Returns an array with the representative of each element.
+        """
+        find = self.find
+        return array('l', (find(i) for i in xrange(len(self._parents))))
+
+    def __len__(self):
+        return len(self._parents)
+
+
+class Components(object):
+    """\
+    The weakly connected components of a graph.
+
+    A component is identified by an integer. The lookup of the component of
+    a vertex or edge needs constant time.
+    """
+    __slots__ = ('_index', '_labels', '_kinds')
+
+    def __init__(self, index, labels, kinds):
+        """\
+
+        `index`
+            A dict which maps the vertex and edge identifiers to their
+            positions.
+        `labels`
+            An array with the component of each position.
+        `kinds`
+            An array which indicates if a position represents a vertex.
+        """
+        self._index = index
+        self._labels = labels
+        self._kinds = kinds
+
+    def component(self, identifier):
+        """\
+        Returns the component of the vertex or edge `identifier` or
+        ``None`` if the identifier is unknown.
+        """
+        pos = self._index.get(identifier)
+        return self._labels[pos] if pos is not None else None
+
+    def same_component(self, a, b):
+        """\
+        Returns if the identifiers `a` and `b` belong to the same component.
+        """
+        c = self.component(a)
+        return c is not None and c == self.component(b)
+
+    def components(self):
+        """\
+        Returns a list of sets of vertices, one set per component. The
+        list is sorted by the size of the sets in descending order.
+        """
+        members = {}
+        labels, kinds = self._labels, self._kinds
+        for ident, pos in self._index.iteritems():
+            if kinds[pos]:
+                members.setdefault(labels[pos], set()).add(ident)
+        return sorted(members.itervalues(), key=len, reverse=True)
+
+    def __len__(self):
+        """\
+        Returns the number of components which contain a vertex.
+        """
+        labels, kinds = self._labels, self._kinds
+        return len(set(labels[pos] for pos in xrange(len(labels)) if kinds[pos]))
@@ -40,7 +40,9 @@ module.
 :license:      BSD License
 """
 from __future__ import absolute_import
+import heapq
 from itertools import chain
+from operator import itemgetter
 from . import XSD, constants as consts
 from .interfaces import IImmutableGraph, IGraph, IConnection, implements
 
@@ -79,28 +81,51 @@ class BaseImmutableGraph(object):
         lit = self.literal(identifier)
         return lit[1] if lit else None
 
+    def literals(self, *identifiers):
+        literal = self.literal
+        return [literal(ident) for ident in identifiers]
+
+    def values(self, *identifiers):
+        return [lit[0] if lit else None for lit in self.literals(*identifiers)]
+
+    def datatypes(self, *identifiers):
+        return [lit[1] if lit else None for lit in self.literals(*identifiers)]
+
     def predecessors(self, *identifiers):
-        head = self.head
-        return (head(edge) for edge in self.ingoing_edges(*identifiers))
+        return self.heads(self.ingoing_edges(*identifiers))
 
     def successors(self, *identifiers):
-        for edge in self.outgoing_edges(*identifiers):
-            for target in self.tail(edge):
-                yield target
+        return chain.from_iterable(self.tails(self.outgoing_edges(*identifiers)))
+
+    def heads(self, edges):
+        head = self.head
+        return [head(edge) for edge in edges]
+
+    def tails(self, edges):
+        tail = self.tail
+        return [tail(edge) for edge in edges]
+
+    def incidents_many(self, edges):
+        edge_incidents = self.edge_incidents
+        return [edge_incidents(edge) for edge in edges]
 
     def rank(self):
-        card = self.card
-        try:
-            return max((card(e) for e in self.edges()))
-        except ValueError:
-            return 0
+        return max(self.card_histogram() or [0])
 
     def corank(self):
+        return min(self.card_histogram() or [0])
+
+    def card_histogram(self):
+        card = self.card
+        histogram = {}
+        for e in self.iter_edges():
+            k = card(e)
+            histogram[k] = histogram.get(k, 0) + 1
+        return histogram
+
+    def edges_with_card(self, k):
         card = self.card
-        try:
-            return min((card(e) for e in self.edges()))
-        except ValueError:
-            return 0
+        return set(e for e in self.iter_edges() if card(e) == k)
 
     def card(self, edge):
         s = set(self.tail(edge))
@@ -108,23 +133,42 @@ class BaseImmutableGraph(object):
         return len(s)
 
     def indegree(self, identifier):
-        return sum(1 for e in self.ingoing_edges(identifier))
+        return sum(1 for e in self.iter_ingoing_edges(identifier))
 
     def outdegree(self, identifier):
-        return sum(1 for e in self.outgoing_edges(identifier))
+        return sum(1 for e in self.iter_outgoing_edges(identifier))
 
     def degree(self, identifier):
         return self.indegree(identifier) + self.outdegree(identifier)
 
+    def top_degree(self, k, direction=consts.DIRECTION_BOTH):
+        degrees = ((v, d) for v, d in self._degrees(direction) if d > 0)
+        return heapq.nlargest(k, degrees, key=itemgetter(1))
+
+    def vertices_with_degree(self, min, max=None, direction=consts.DIRECTION_BOTH):
+        return set(v for v, d in self._degrees(direction)
+                   if min <= d and (max is None or d <= max))
+
+    def degree_histogram(self, direction=consts.DIRECTION_BOTH):
+        histogram = {}
+        for v, d in self._degrees(direction):
+            histogram[d] = histogram.get(d, 0) + 1
+        return histogram
+
+    def _degrees(self, direction):
+        """\
+        Returns an iterator over ``(vertex, degree)`` tuples of all vertices.
+        """
+        degree = {consts.DIRECTION_IN: self.indegree,
+                  consts.DIRECTION_OUT: self.outdegree,
+                  consts.DIRECTION_BOTH: self.degree}[direction]
+        return ((v, degree(v)) for v in self.iter_vertices())
+
     def is_uniform(self, k=None):
-        card = self.card
-        for e in self.edges():
-            if not k:
-                k = card(e)
-                continue
-            if k != card(e):
-                return False
-        return True
+        cards = self.card_histogram().keys()
+        if not cards:
+            return True
+        return len(cards) == 1 and (not k or cards[0] == k)
 
     def edge_incidents(self, edge):
         return set(chain([self.head(edge)], self.tail(edge)))
@@ -139,19 +183,69 @@ class BaseImmutableGraph(object):
     def edges_between(self, head, tail):
         return set(self.outgoing_edges(head)).intersection(self.ingoing_edges(tail))
 
+    def edges_containing(self, *identifiers, **kwargs):
+        role = kwargs.get('role', consts.ROLE_ANY)
+        if not identifiers:
+            return set(self.edges())
+        if role == consts.ROLE_HEAD:
+            fetch = self.outgoing_edges
+        elif role == consts.ROLE_TAIL:
+            fetch = self.ingoing_edges
+        else:
+            fetch = lambda ident: chain(self.ingoing_edges(ident), self.outgoing_edges(ident))
+        sets = sorted((set(fetch(ident)) for ident in set(identifiers)), key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def find_edge(self, head, *tail):
+        tail = set(tail)
+        edges = set(self.outgoing_edges(head))
+        for ident in tail:
+            edges.intersection_update(self.ingoing_edges(ident))
+        for e in edges:
+            if self.head(e) == head and set(self.tail(e)) == tail:
+                return e
+        return None
+
+    def duplicate_edges(self):
+        signatures = {}
+        for e in self.iter_edges():
+            signatures.setdefault((self.head(e), frozenset(self.tail(e))), set()).add(e)
+        return [edges for edges in signatures.itervalues() if len(edges) > 1]
+
     def edge_between(self, head, tail):
         for e in self.edges_between(head, tail):
             return e
         return None
 
+    def iter_vertices(self):
+        return iter(self.vertices())
+
+    def iter_edges(self):
+        return iter(self.edges())
+
+    def iter_ingoing_edges(self, *identifiers):
+        return iter(self.ingoing_edges(*identifiers))
+
+    def iter_outgoing_edges(self, *identifiers):
+        return iter(self.outgoing_edges(*identifiers))
+
     def __contains__(self, identifier):
-        return identifier in chain(self.vertices(), self.edges())
+        return identifier in chain(self.iter_vertices(), self.iter_edges())
 
     def __iter__(self):
-        return self.vertices()
+        return self.iter_vertices()
 
     def __len__(self):
-        return sum(1 for v in self.vertices())
+        return self.vertex_count()
+
+    def vertex_count(self):
+        return sum(1 for v in self.iter_vertices())
+
+    def edge_count(self):
+        return sum(1 for e in self.iter_edges())
+
+    def contains_many(self, identifiers):
+        return [ident in self for ident in identifiers]
 
 
 class BaseGraph(BaseImmutableGraph):
@@ -164,6 +258,16 @@ class BaseGraph(BaseImmutableGraph):
     def create_integer_vertex(self, value):
         return self.create_vertex(value, XSD.integer)
 
+    def create_vertices(self, vertices):
+        create_vertex = self.create_vertex
+        for value, datatype in vertices:
+            yield create_vertex(value, datatype)
+
+    def create_edges(self, edges, unique=False):
+        create_edge = self.create_edge
+        for edge in edges:
+            yield create_edge(*edge, unique=unique)
+
     def replace_tail(self, edge, *identifiers):
         e = self.create_edge(self.head(edge), *identifiers)
         self.delete_edge(edge)
@@ -47,6 +47,14 @@ KIND_VERTEX = 1
 KIND_EDGE = 2
 KIND_LITERAL = 3
 
+DIRECTION_IN = 1
+DIRECTION_OUT = 2
+DIRECTION_BOTH = 3
+
+ROLE_HEAD = 1
+ROLE_TAIL = 2
+ROLE_ANY = 3
+
 _KIND2NAME = {
     KIND_VERTEX: u'vertex',
     KIND_EDGE: u'edge',
@@ -103,4 +103,4 @@ def neighbours(g, *identifiers):
     `g`
         The graph.
     """
-    return g.neighbours(identifiers)
+    return g.neighbours(*identifiers)
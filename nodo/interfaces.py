@@ -117,6 +117,42 @@ class IImmutableGraph(Interface):
             A (literal) vertex identifier.
         """
 
+    def literals(*identifier):
+        """\
+        Returns a list of value/datatype tuples for the provided identifiers.
+
+        The list has the same order as the `identifiers`, unknown identifiers
+        and identifiers which do not represent a literal vertex are
+        represented by ``None``.
+
+        Does the same as::
+
+            [graph.literal(ident) for ident in identifiers]
+
+        `identifiers`
+            An iterable of (literal) vertex identifiers.
+        """
+
+    def values(*identifier):
+        """\
+        Returns a list of the value parts of the provided literal vertices.
+
+        See :py:func:`IImmutableGraph.literals()`
+
+        `identifiers`
+            An iterable of (literal) vertex identifiers.
+        """
+
+    def datatypes(*identifier):
+        """\
+        Returns a list of the datatype parts of the provided literal vertices.
+
+        See :py:func:`IImmutableGraph.literals()`
+
+        `identifiers`
+            An iterable of (literal) vertex identifiers.
+        """
+
     def head(edge):
         """\
         Returns the head (a vertex) of the provided `edge`.
@@ -147,6 +183,30 @@ class IImmutableGraph(Interface):
             An edge identifier.
         """
 
+    def heads(edges):
+        """\
+        Returns a list with the head of each edge of `edges`.
+
+        Does the same as::
+
+            [graph.head(edge) for edge in edges]
+
+        `edges`
+            An iterable of edge identifiers.
+        """
+
+    def tails(edges):
+        """\
+        Returns a list with the tail of each edge of `edges`.
+
+        Does the same as::
+
+            [graph.tail(edge) for edge in edges]
+
+        `edges`
+            An iterable of edge identifiers.
+        """
+
     def edge_incidents(edge):
         """\
         Returns an iterable which contains the head and tail of an edge.
@@ -159,6 +219,18 @@ class IImmutableGraph(Interface):
             An edge identifier.
         """
 
+    def incidents_many(edges):
+        """\
+        Returns a list with the incidents of each edge of `edges`.
+
+        Does the same as::
+
+            [graph.edge_incidents(edge) for edge in edges]
+
+        `edges`
+            An iterable of edge identifiers.
+        """
+
     def edge_contains(edge, *identifier):
         """\
         Returns if the provided identifiers are contained in the provided
@@ -175,6 +247,37 @@ class IImmutableGraph(Interface):
                     
         """
 
+    def edges_containing(*identifiers, **kwargs):
+        """\
+        Returns the edges which contain all provided `identifiers`.
+
+        `identifiers`
+            Vertex and/or edge identifiers. If no identifier is provided,
+            all edges are returned.
+        `role`
+            `constants.ROLE_HEAD` (the identifiers must be the head of the
+            edge), `constants.ROLE_TAIL` (the identifiers must be part of
+            the tail) or `constants.ROLE_ANY` (default).
+        """
+
+    def find_edge(head, *tail):
+        """\
+        Returns an edge with the provided `head` and `tail` or ``None``.
+
+        The order and duplicates of the `tail` are not significant.
+
+        `head`
+            A vertex identifier.
+        `tail`
+            Vertex and/or edge identifiers.
+        """
+
+    def duplicate_edges():
+        """\
+        Returns a list of sets of edges. The edges of a set have the same
+        head and tail.
+        """
+
     def edge_between(head, tail):
         """\
         Returns an edge between the provided `head` and `tail`.
@@ -214,6 +317,30 @@ class IImmutableGraph(Interface):
             An iterable of vertex or edge identifiers.
         """
 
+    def iter_outgoing_edges(*identifier):
+        """\
+        Returns an iterator over all outgoing edges of `identifiers`.
+
+        In contrast to :py:func:`IImmutableGraph.outgoing_edges()`, the
+        edges may be fetched incrementally from the backend. Each edge is
+        returned once.
+
+        `identifiers`
+            An iterable of vertex identifier.
+        """
+
+    def iter_ingoing_edges(*identifier):
+        """\
+        Returns an iterator over all ingoing edges of `identifiers`.
+
+        In contrast to :py:func:`IImmutableGraph.ingoing_edges()`, the
+        edges may be fetched incrementally from the backend. Each edge is
+        returned once.
+
+        `identifiers`
+            An iterable of vertex or edge identifiers.
+        """
+
     def neighbours(*identifier):
         """\
         Returns an iterable over all vertices connected to `identifiers`.
@@ -300,6 +427,20 @@ class IImmutableGraph(Interface):
             An edge identifier.
         """
 
+    def card_histogram():
+        """\
+        Returns a dict which maps the edge cardinalities to the number of
+        edges with that cardinality.
+        """
+
+    def edges_with_card(k):
+        """\
+        Returns an iterable over the edges with the cardinality `k`.
+
+        `k`
+            An edge cardinality.
+        """
+
     def indegree(identifier):
         """\
         Returns the number of ingoing edges (where the `identifier` is contained
@@ -326,6 +467,44 @@ class IImmutableGraph(Interface):
             A vertex or edge identifier.
         """
 
+    def top_degree(k, direction=None):
+        """\
+        Returns a list of at most `k` ``(vertex, degree)`` tuples of the
+        vertices with the highest degree, ordered by descending degree.
+
+        Vertices without any edge in the `direction` are not returned.
+
+        `k`
+            The maximum number of vertices.
+        `direction`
+            `constants.DIRECTION_IN` (indegree), `constants.DIRECTION_OUT`
+            (outdegree) or `constants.DIRECTION_BOTH` (degree, default).
+        """
+
+    def vertices_with_degree(min, max=None, direction=None):
+        """\
+        Returns the vertices with a degree between `min` and `max`
+        (inclusive).
+
+        `min`
+            The minimum degree.
+        `max`
+            The maximum degree. If it is ``None``, the degree is not limited.
+        `direction`
+            `constants.DIRECTION_IN` (indegree), `constants.DIRECTION_OUT`
+            (outdegree) or `constants.DIRECTION_BOTH` (degree, default).
+        """
+
+    def degree_histogram(direction=None):
+        """\
+        Returns a dict which maps a degree to the number of vertices with
+        that degree.
+
+        `direction`
+            `constants.DIRECTION_IN` (indegree), `constants.DIRECTION_OUT`
+            (outdegree) or `constants.DIRECTION_BOTH` (degree, default).
+        """
+
     def is_uniform(k=None):
         """\
         Returns if the graph is uniform: All edges have the same cardinality `k`
@@ -353,6 +532,25 @@ class IImmutableGraph(Interface):
         Returns the number of vertices.
         """
 
+    def vertex_count():
+        """\
+        Returns the number of vertices.
+        """
+
+    def edge_count():
+        """\
+        Returns the number of edges.
+        """
+
+    def contains_many(identifiers):
+        """\
+        Returns a list of booleans which indicate if the vertex or edge
+        identifiers are contained in this graph.
+
+        `identifiers`
+            An iterable of vertex and edge identifiers.
+        """
+
     def vertices():
         """\
         Returns an iterable over all vertix identifiers.
@@ -363,6 +561,24 @@ class IImmutableGraph(Interface):
         Returns an iterable over all edge identifiers.
         """
 
+    def iter_vertices():
+        """\
+        Returns an iterator over all vertex identifiers.
+
+        In contrast to :py:func:`IImmutableGraph.vertices()`, the vertices
+        may be fetched incrementally from the backend. Each vertex is
+        returned once.
+        """
+
+    def iter_edges():
+        """\
+        Returns an iterator over all edge identifiers.
+
+        In contrast to :py:func:`IImmutableGraph.edges()`, the edges
+        may be fetched incrementally from the backend. Each edge is returned
+        once.
+        """
+
     def clear():
         """\
         Removes all vertices and edges from this graph.
@@ -415,7 +631,19 @@ class IGraph(IImmutableGraph):
             The integer value.
         """
 
-    def create_edge(head, *tail):
+    def create_vertices(vertices):
+        """\
+        Creates a vertex for each value/datatype tuple and returns an
+        iterable over the vertex identifiers (in the same order).
+
+        The vertices are created while the returned iterable is consumed.
+
+        `vertices`
+            An iterable of value/datatype tuples. See
+            :py:func:`IGraph.create_vertex()` for the meaning of ``None``.
+        """
+
+    def create_edge(head, *tail, **kwargs):
         """\
         Creates an edge from `head` to the provided `tail` and returns
         the edge identifier.
@@ -424,6 +652,24 @@ class IGraph(IImmutableGraph):
             A vertex identifier which becomes the source of the edge.
         `tail`
             An iterable of targets which become the target of the edge.
+        `unique`
+            If ``True`` and an edge with the same head and tail exists
+            already, the existing edge is returned (default: ``False``).
+        """
+
+    def create_edges(edges, unique=False):
+        """\
+        Creates an edge for each head/tail sequence and returns an
+        iterable over the edge identifiers (in the same order).
+
+        The edges are created while the returned iterable is consumed.
+
+        `edges`
+            An iterable of sequences. The first item of a sequence is the
+            head, the remaining items are the tail of the edge.
+        `unique`
+            Indicates if existing edges with the same head and tail should
+            be returned instead of creating new edges, see `create_edge`.
         """
 
     def add_tail(edge, *identifiers):
@@ -502,7 +748,7 @@ class IGraph(IImmutableGraph):
 
     def delete_vertex(identifier):
         """\
-        Deletes a vertex.
+        Deletes a vertex and the edges which contain the vertex.
 
         `identifier`
             A vertex identifier.
@@ -512,6 +758,9 @@ class IGraph(IImmutableGraph):
         """\
         Deletes an edge.
 
+        The edges which contain the edge in their tail are deleted as well
+        (recursively).
+
         `identifier`
             An edge identifier.
         """
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+This module provides sparse matrix representations of Nodo graphs.
+
+The matrices are `SciPy <http://www.scipy.org/>`_ sparse matrices, the
+rows represent the vertices and the columns the edges of a graph.
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from __future__ import absolute_import
+from itertools import chain
+import numpy as np
+from scipy import sparse
+from ._utils import BATCH_SIZE as _BATCH_SIZE, chunks as _chunks, id_positions as _id_positions
+
+
+def incidence(graph, head=-1, tail=1, format='csr', dtype=np.float64, batch_size=_BATCH_SIZE):
+    """\
+    Returns the `Incidence` of the provided `graph`.
+
+    The matrix has a row for each vertex and a column for each edge. The
+    entry of a vertex/edge pair is `head` if the vertex is the head of the
+    edge, `tail` if the vertex is part of the tail of the edge and the sum
+    of both if the edge is a loop. Tail members which are edges are not part
+    of the matrix.
+
+    The vertices and edges are fetched with ``iter_vertices`` and
+    ``iter_edges``, the heads and tails with ``heads`` and ``tails`` in
+    chunks of `batch_size` edges. Only the identifiers of one chunk are kept
+    as Python objects, the matrix is collected in NumPy arrays.
+
+    `graph`
+        The graph.
+    `head`
+        The weight of a head (default: ``-1``).
+    `tail`
+        The weight of a tail member (default: ``1``).
+    `format`
+        The sparse matrix format, ``csr`` (default) or ``csc``.
+    `dtype`
+        The data type of the matrix (default: ``numpy.float64``).
+    `batch_size`
+        The number of edges fetched per request (default: 1000).
+    """
+    vertices = _unique_ids(graph.iter_vertices(), batch_size)
+    rows, cols, data, edges = [], [], [], []
+    offset = 0
+    for chunk in _chunks(graph.iter_edges(), batch_size):
+        edge_cols = np.arange(offset, offset + len(chunk))
+        heads = _positions(vertices, graph.heads(chunk))
+        tails = graph.tails(chunk)
+        members = _positions(vertices, list(chain.from_iterable(tails)))
+        member_cols = np.repeat(edge_cols, [len(t) for t in tails])
+        # Unknown heads / tail members belong to concurrently modified edges
+        # or are edges
+        for r, c, w in ((heads, edge_cols, head), (members, member_cols, tail)):
+            known = r >= 0
+            rows.append(r[known])
+            cols.append(c[known])
+            data.append(np.full(known.sum(), w, dtype))
+        edges.append(np.asarray(chunk))
+        offset += len(chunk)
+    if not edges:
+        matrix = sparse.csr_matrix((len(vertices), 0), dtype=dtype)
+        return Incidence(matrix.asformat(format), vertices, np.empty(0))
+    edges, columns = _unique_columns(np.concatenate(edges))
+    rows, cols, data = np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+    # Drop the entries of edges which were reported more than once
+    keep = columns[cols] >= 0
+    matrix = sparse.coo_matrix((data[keep], (rows[keep], columns[cols[keep]])),
+                               shape=(len(vertices), len(edges))).asformat(format)
+    matrix.sum_duplicates()
+    matrix.eliminate_zeros()
+    return Incidence(matrix, vertices, edges)
+
+
+class Incidence(object):
+    """\
+    An incidence matrix together with the vertex and edge identifiers of
+    its rows and columns.
+    """
+    __slots__ = ('matrix', 'vertices', 'edges')
+
+    def __init__(self, matrix, vertices, edges):
+        """\
+
+        `matrix`
+            A sparse vertex x edge matrix.
+        `vertices`
+            A sorted array of the vertex identifiers, the identifier of row
+            ``i`` is ``vertices[i]``.
+        `edges`
+            A sorted array of the edge identifiers, the identifier of column
+            ``j`` is ``edges[j]``.
+        """
+        self.matrix = matrix
+        self.vertices = vertices
+        self.edges = edges
+
+    def vertex_indexes(self, identifiers):
+        """\
+        Returns an array with the row of each vertex identifier, ``-1``
+        indicates an unknown vertex.
+
+        `identifiers`
+            An iterable of vertex identifiers.
+        """
+        return _positions(self.vertices, identifiers)
+
+    def edge_indexes(self, identifiers):
+        """\
+        Returns an array with the column of each edge identifier, ``-1``
+        indicates an unknown edge.
+
+        `identifiers`
+            An iterable of edge identifiers.
+        """
+        return _positions(self.edges, identifiers)
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+
+def _unique_ids(identifiers, batch_size):
+    """\
+    Returns a sorted array of the unique `identifiers`.
+    """
+    chunks = [np.asarray(chunk) for chunk in _chunks(identifiers, batch_size)]
+    return np.unique(np.concatenate(chunks)) if chunks else np.empty(0)
+
+
+def _positions(ids, identifiers):
+    """\
+    Returns an array with the position of each identifier in the sorted
+    array `ids`, ``-1`` indicates an unknown identifier.
+    """
+    return _id_positions(ids, np.asarray(list(identifiers)))
+
+
+def _unique_columns(edges):
+    """\
+    Returns the sorted unique `edges` and an array which maps each position
+    of `edges` to the position in the sorted array. Repeated edges are
+    mapped to ``-1``.
+    """
+    unique, first, inverse = np.unique(edges, return_index=True, return_inverse=True)
+    columns = np.where(first[inverse] == np.arange(len(edges)), inverse, -1)
+    return unique, columns
@@ -33,36 +33,170 @@
 #
 """\
 Utilities to convert a Nodo graph into a
-`NetworkX graph <http://networkx.lanl.gov/>`_
+`NetworkX graph <http://networkx.lanl.gov/>`_ and vice versa.
 
 :author:       Lars Heuer (heuer[at]semagia.com)
 :organization: Semagia - http://www.semagia.com/
 :license:      BSD license
 """
+from itertools import combinations
 import networkx as nx
+from . import XSD
+from ._utils import BATCH_SIZE as _BATCH_SIZE, chunks as _chunks
 
+MODE_BIPARTITE = 'bipartite'
+MODE_CLIQUE = 'clique'
 
-def to_nx(graph):
+
+def to_nx(graph, mode=None, batch_size=_BATCH_SIZE):
     """\
-    Converts a Nodo `graph` into a NetworkX directed graph.
+    Converts a Nodo `graph` into a NetworkX graph.
+
+    The nodes of the NetworkX graph are the vertex identifiers, literal
+    vertices are represented by their value/datatype tuple.
+
+    By default, the result is a directed graph with an edge from the head
+    to the tail of each Nodo edge. Only 2-uniform graphs are supported,
+    otherwise a ValueError is raised.
+
+    The `mode` ``bipartite`` converts any graph into a directed graph
+    which contains the vertices (node attribute ``bipartite=0``) and the
+    edges (``bipartite=1``) as nodes. The head of an edge points to the
+    edge node, the edge node points to the members of its tail.
 
-    .. note::
+    The `mode` ``clique`` converts any graph into the undirected 2-section
+    of the graph: Each pair of vertices which is part of an edge is
+    connected. Tail members which are edges are ignored.
 
-        Only 2-uniform graphs are supported, otherwise a ValueError
-        is raised.
+    The edges are fetched with ``iter_edges``, their heads, tails and the
+    literals with ``heads``, ``tails`` and ``literals`` in chunks of
+    `batch_size` edges.
 
     `graph`
         The Nodo graph to convert.
+    `mode`
+        ``None`` (default), ``bipartite`` or ``clique``.
+    `batch_size`
+        The number of edges fetched per request (default: 1000).
     """
-    def edges():
-        edge_incidents = graph.edge_incidents
-        literal = graph.literal
-        for edge in graph.edges():
-            incidents = tuple(edge_incidents(edge))
-            if not len(incidents) == 2:
-                raise ValueError('The provided graph is not a 2-uniform graph')
-            src, target = incidents
-            yield literal(src) or src, literal(target) or target
-    g = nx.DiGraph()
-    g.add_edges_from(edges())
+    if mode is None:
+        if not graph.is_uniform(2):
+            raise ValueError('The provided graph is not a 2-uniform graph')
+        g = nx.DiGraph()
+    elif mode == MODE_BIPARTITE:
+        g = nx.DiGraph()
+    elif mode == MODE_CLIQUE:
+        g = nx.Graph()
+    else:
+        raise ValueError('Unknown mode %r' % mode)
+    is_edge = graph.is_edge
+    for edges, nodes in _edge_chunks(graph, batch_size):
+        if mode is None:
+            g.add_edges_from(_uniform_edges(edges, nodes))
+        elif mode == MODE_BIPARTITE:
+            g.add_nodes_from((edge for edge, head, tail in edges), bipartite=1)
+            for ident, node in nodes.items():
+                g.add_node(node, bipartite=1 if is_edge(ident) else 0)
+            for edge, head, tail in edges:
+                g.add_edge(nodes[head], edge)
+                g.add_edges_from((edge, nodes[i]) for i in tail)
+        else:
+            for edge, head, tail in edges:
+                members = set(nodes[i] for i in tail if not is_edge(i))
+                members.add(nodes[head])
+                g.add_nodes_from(members)
+                g.add_edges_from(combinations(members, 2))
     return g
+
+
+def from_nx(nx_graph, graph, literal_attr=None, batch_size=_BATCH_SIZE):
+    """\
+    Imports the NetworkX graph `nx_graph` into the Nodo `graph` and returns
+    a dict which maps the NetworkX nodes to the vertex identifiers.
+
+    Each node becomes a vertex. If `literal_attr` is ``None``, the node
+    itself is used as literal, otherwise the value of the node attribute
+    `literal_attr`. Value/datatype tuples (like the nodes created by
+    :py:func:`to_nx()`), strings, integers, booleans and floats become
+    literal vertices, nodes with an equal literal share the same vertex.
+    All other nodes (or nodes without the `literal_attr` attribute) become
+    anonymous vertices.
+
+    Each NetworkX edge becomes an edge from the source node to the target
+    node, edges of undirected graphs get an arbitrary direction and the
+    edge attributes are ignored.
+
+    The vertices and edges are created with ``create_vertices`` and
+    ``create_edges`` in chunks of `batch_size` items, apart from the node
+    mapping no copy of the NetworkX graph is created.
+
+    `nx_graph`
+        The NetworkX graph to import.
+    `graph`
+        The Nodo graph which receives the vertices and edges.
+    `literal_attr`
+        Optional name of the node attribute which provides the literal.
+    `batch_size`
+        The number of vertices / edges created per request (default: 1000).
+    """
+    mapping = {}
+    nodes = nx_graph.nodes_iter(data=True) if hasattr(nx_graph, 'nodes_iter') else nx_graph.nodes(data=True)
+    for chunk in _chunks(nodes, batch_size):
+        if literal_attr is None:
+            literals = [_literal(node) for node, data in chunk]
+        else:
+            literals = [_literal(data.get(literal_attr)) for node, data in chunk]
+        mapping.update(zip((node for node, data in chunk), graph.create_vertices(literals)))
+    edges = nx_graph.edges_iter() if hasattr(nx_graph, 'edges_iter') else nx_graph.edges()
+    for chunk in _chunks(edges, batch_size):
+        for _ in graph.create_edges([(mapping[u], mapping[v]) for u, v in chunk]):
+            pass
+    return mapping
+
+
+def _literal(obj):
+    """\
+    Returns a value/datatype tuple for `obj`. If `obj` cannot be represented
+    as literal, ``(None, None)`` is returned.
+    """
+    if isinstance(obj, tuple) and len(obj) == 2 and isinstance(obj[0], basestring) \
+            and (obj[1] is None or isinstance(obj[1], basestring)):
+        return obj
+    if isinstance(obj, basestring):
+        return obj, XSD.string
+    if isinstance(obj, bool):
+        return (u'true' if obj else u'false'), XSD.boolean
+    if isinstance(obj, (int, long)):
+        return unicode(obj), XSD.integer
+    if isinstance(obj, float):
+        return repr(obj), XSD.double
+    return None, None
+
+
+def _edge_chunks(graph, batch_size):
+    """\
+    Returns an iterator over ``(edges, nodes)`` tuples. `edges` is a list of
+    ``(edge, head, tail)`` tuples of at most `batch_size` edges, `nodes`
+    maps the incidents of the edges to the NetworkX nodes.
+    """
+    for chunk in _chunks(graph.iter_edges(), batch_size):
+        heads, tails = graph.heads(chunk), graph.tails(chunk)
+        idents = set(heads)
+        for tail in tails:
+            idents.update(tail)
+        idents = list(idents)
+        nodes = dict((ident, lit or ident) for ident, lit in zip(idents, graph.literals(*idents)))
+        yield zip(chunk, heads, tails), nodes
+
+
+def _uniform_edges(edges, nodes):
+    """\
+    Returns an iterator over the ``(source, target)`` tuples of 2-uniform
+    `edges`.
+    """
+    for edge, head, tail in edges:
+        targets = set(tail)
+        targets.discard(head)
+        if len(targets) != 1:
+            raise ValueError('The provided graph is not a 2-uniform graph')
+        yield nodes[head], nodes[targets.pop()]
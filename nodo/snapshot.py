@@ -0,0 +1,531 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+This module provides immutable point-in-time copies of Nodo graphs.
+
+A snapshot keeps the graph in a few NumPy arrays. The vertices and edges
+are identified by dense integers: The vertices ``0 .. V-1`` and the edges
+``V .. V+E-1`` in the order of their sorted identifiers. The identifiers
+themselves are kept in two sorted arrays, an identifier is resolved with a
+binary search.
+
+The adjacency is kept in `CSR <http://en.wikipedia.org/wiki/Sparse_matrix>`_
+form: The head of each edge, the tails of the edges, the outgoing edges of
+the vertices and the ingoing edges of the vertices and edges. Degrees,
+cardinalities and the neighbourhood of identifiers are computed with array
+operations.
+
+Example::
+
+    from nodo import snapshot
+
+    s = snapshot.snapshot(graph)
+    s.top_degree(10)
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from __future__ import absolute_import
+import hashlib
+import numpy as np
+from . import XSD, constants as consts
+from .c14n import canonicalize
+from .base import BaseImmutableGraph
+from .interfaces import IImmutableGraph, implements
+from ._utils import BATCH_SIZE as _BATCH_SIZE, NUMBERS as _NUMBERS, STRINGS as _STRINGS, \
+                     chunks as _chunks, id_positions as _id_positions
+
+
+def snapshot(graph, batch_size=_BATCH_SIZE):
+    """\
+    Returns a `SnapshotGraph` which contains the vertices and edges of the
+    provided `graph`.
+
+    The heads, tails and literals are fetched with ``heads``, ``tails`` and
+    ``literals`` in chunks of `batch_size` identifiers.
+
+    .. note::
+
+        The snapshot is not taken atomically. If the `graph` is modified
+        while the snapshot is taken, a ``ValueError`` may be raised.
+
+    `graph`
+        The graph to copy.
+    `batch_size`
+        The number of identifiers fetched per request (default: 1000).
+    """
+    vertex_ids = _id_array(graph.vertices())
+    edge_ids = _id_array(graph.edges())
+    vertex_count, edge_count = len(vertex_ids), len(edge_ids)
+    dtype = np.int32 if vertex_count + edge_count < 2 ** 31 else np.int64
+    s = SnapshotGraph(graph.identifier, vertex_ids, edge_ids)
+    heads = np.empty(edge_count, dtype)
+    tail_lengths = np.empty(edge_count, dtype)
+    tails = []
+    start = 0
+    for chunk in _chunks(edge_ids.tolist(), batch_size):
+        positions = s._lookup(graph.heads(chunk))
+        if (positions < 0).any() or (positions >= vertex_count).any():
+            raise ValueError('The graph was modified while the snapshot was taken')
+        heads[start:start + len(chunk)] = positions
+        members = []
+        for i, tail in enumerate(graph.tails(chunk), start):
+            tail_lengths[i] = len(tail)
+            members.extend(tail)
+        positions = s._lookup(members)
+        if (positions < 0).any():
+            raise ValueError('The graph was modified while the snapshot was taken')
+        tails.append(positions.astype(dtype))
+        start += len(chunk)
+    tail_idx = np.concatenate(tails) if tails else np.empty(0, dtype)
+    s._build(heads, tail_lengths, tail_idx, dtype)
+    vertices = vertex_ids.tolist()
+    literal_ids = [i for i, v in enumerate(vertices) if graph.kind(v) == consts.KIND_LITERAL]
+    literals = []
+    for chunk in _chunks(literal_ids, batch_size):
+        literals.extend(graph.literals(*[vertices[i] for i in chunk]))
+    s._build_literals(literal_ids, literals)
+    return s
+
+
+class SnapshotGraph(BaseImmutableGraph):
+    """\
+    An immutable graph which keeps its vertices and edges in NumPy arrays.
+
+    Use :py:func:`snapshot()` to create an instance.
+    """
+    implements(IImmutableGraph)
+
+    def __init__(self, identifier, vertex_ids, edge_ids):
+        """\
+
+        `identifier`
+            The graph identifier.
+        `vertex_ids`
+            A sorted array of the vertex identifiers.
+        `edge_ids`
+            A sorted array of the edge identifiers.
+        """
+        self._identifier = identifier
+        self._vertex_ids = vertex_ids
+        self._edge_ids = edge_ids
+        self._vertex_count = len(vertex_ids)
+
+    def _build(self, heads, tail_lengths, tail_idx, dtype):
+        """\
+        Creates the adjacency arrays.
+
+        `heads`
+            The head (a vertex) of each edge.
+        `tail_lengths`
+            The number of tail members of each edge.
+        `tail_idx`
+            The concatenated tails of the edges.
+        """
+        node_count = self._vertex_count + len(self._edge_ids)
+        edges = np.repeat(np.arange(len(heads), dtype=dtype), tail_lengths)
+        ptr_dtype = np.int32 if len(tail_idx) < 2 ** 31 else np.int64
+        self._heads = heads
+        self._tail_ptr = _ptr(tail_lengths, ptr_dtype)
+        self._tail_idx = tail_idx
+        # An edge counts its head only once if the head is part of the tail
+        loops = np.bincount(edges[tail_idx == heads[edges]], minlength=len(heads))
+        self._cards = (tail_lengths + 1 - loops).astype(dtype)
+        # Sorting is stable, the edges of a row stay in ascending order
+        self._out_ptr = _ptr(np.bincount(heads, minlength=self._vertex_count), dtype)
+        self._out_idx = np.argsort(heads, kind='mergesort').astype(dtype)
+        self._in_ptr = _ptr(np.bincount(tail_idx, minlength=node_count), ptr_dtype)
+        self._in_idx = edges[np.argsort(tail_idx, kind='mergesort')]
+
+    def _build_literals(self, positions, literals):
+        """\
+        Creates the literal table.
+
+        `positions`
+            The (ascending) positions of the literal vertices.
+        `literals`
+            The value/datatype tuple of each literal vertex.
+        """
+        datatypes = sorted(set(dt for val, dt in literals))
+        dt2index = dict((dt, i) for i, dt in enumerate(datatypes))
+        values = [_text(val).encode('utf-8') for val, dt in literals]
+        self._datatypes = datatypes
+        self._lit_nodes = np.array(positions, self._heads.dtype)
+        self._lit_dt = np.array([dt2index[dt] for val, dt in literals], np.int16)
+        self._lit_ptr = _ptr([len(val) for val in values], np.int64)
+        self._lit_buf = ''.join(values)
+        hashes = np.array([_literal_hash(*_canonical(val, dt)) for val, dt in literals], np.uint64)
+        self._lit_order = np.argsort(hashes, kind='mergesort')
+        self._lit_hashes = hashes[self._lit_order]
+
+    def _lookup(self, identifiers):
+        """\
+        Returns an array with the position of each identifier, ``-1``
+        indicates an unknown identifier.
+        """
+        if not isinstance(identifiers, (list, tuple)):
+            identifiers = list(identifiers)
+        keys = np.asarray(identifiers)
+        if len(keys) > 1 and (keys.ndim != 1 or keys.dtype.kind not in _NUMBERS + _STRINGS
+                              or keys.dtype.kind in _STRINGS and self._vertex_ids.dtype.kind in _NUMBERS):
+            # NumPy converts a mix of numbers and strings into strings
+            return np.array([self._position(ident) for ident in identifiers], np.int64)
+        res = _id_positions(self._vertex_ids, keys)
+        edges = _id_positions(self._edge_ids, keys)
+        found = edges >= 0
+        res[found] = edges[found] + self._vertex_count
+        return res
+
+    def _position(self, identifier):
+        return self._lookup([identifier])[0]
+
+    def _edge_positions(self, edges):
+        """\
+        Returns the edge-relative positions of the `edges`, ``-1`` indicates
+        an identifier which is not an edge.
+        """
+        pos = self._lookup(edges)
+        return np.where(pos >= self._vertex_count, pos - self._vertex_count, -1)
+
+    def _identifiers(self, positions):
+        """\
+        Returns a list with the identifiers of the provided positions.
+        """
+        vertices = positions < self._vertex_count
+        if vertices.all():
+            return self._vertex_ids[positions].tolist()
+        if not vertices.any():
+            return self._edge_ids[positions - self._vertex_count].tolist()
+        res = np.empty(len(positions), object)
+        res[vertices] = self._vertex_ids[positions[vertices]].tolist()
+        res[~vertices] = self._edge_ids[positions[~vertices] - self._vertex_count].tolist()
+        return res.tolist()
+
+    def _ingoing(self, positions):
+        """\
+        Returns the sorted edge-relative positions of the ingoing edges.
+        """
+        return np.unique(_rows(self._in_ptr, self._in_idx, positions[positions >= 0]))
+
+    def _outgoing(self, positions):
+        """\
+        Returns the sorted edge-relative positions of the outgoing edges.
+        """
+        positions = positions[(positions >= 0) & (positions < self._vertex_count)]
+        return np.unique(_rows(self._out_ptr, self._out_idx, positions))
+
+    def _literal_index(self, position):
+        """\
+        Returns the index into the literal table or ``-1``.
+        """
+        nodes = self._lit_nodes
+        i = np.searchsorted(nodes, position)
+        return i if i < len(nodes) and nodes[i] == position else -1
+
+    def _literal(self, i):
+        val = self._lit_buf[self._lit_ptr[i]:self._lit_ptr[i + 1]].decode('utf-8')
+        return val, self._datatypes[self._lit_dt[i]]
+
+    def find_vertex(self, value, datatype=None):
+        key = _canonical(value, datatype or XSD.string)
+        h = np.uint64(_literal_hash(*key))
+        hashes = self._lit_hashes
+        i = np.searchsorted(hashes, h)
+        while i < len(hashes) and hashes[i] == h:
+            if _canonical(*self._literal(self._lit_order[i])) == key:
+                return self._vertex_ids[self._lit_nodes[self._lit_order[i]]].item()
+            i += 1
+        return None
+
+    def literal(self, identifier):
+        return self.literals(identifier)[0]
+
+    def literals(self, *identifiers):
+        res = []
+        for pos in self._lookup(identifiers):
+            i = self._literal_index(pos) if 0 <= pos < self._vertex_count else -1
+            res.append(self._literal(i) if i >= 0 else None)
+        return res
+
+    def head(self, edge):
+        return self.heads([edge])[0]
+
+    def tail(self, edge):
+        return self.tails([edge])[0]
+
+    def heads(self, edges):
+        pos = self._edge_positions(edges)
+        res = np.empty(len(pos), object)
+        known = pos >= 0
+        res[known] = self._vertex_ids[self._heads[pos[known]]].tolist()
+        return res.tolist()
+
+    def tails(self, edges):
+        ptr = self._tail_ptr
+        positions = self._edge_positions(edges)
+        members = self._identifiers(_rows(ptr, self._tail_idx, positions[positions >= 0]))
+        res, start = [], 0
+        for e in positions:
+            if e < 0:
+                res.append(())
+                continue
+            end = start + ptr[e + 1] - ptr[e]
+            res.append(tuple(members[start:end]))
+            start = end
+        return res
+
+    def edge_incidents(self, edge):
+        return self.incidents_many([edge])[0]
+
+    def incidents_many(self, edges):
+        return [tuple([head] + [t for t in tail if t != head]) if head is not None else ()
+                for head, tail in zip(self.heads(edges), self.tails(edges))]
+
+    def card(self, edge):
+        e = self._edge_positions([edge])[0]
+        return int(self._cards[e]) if e >= 0 else 0
+
+    def rank(self):
+        return int(self._cards.max()) if len(self._cards) else 0
+
+    def corank(self):
+        return int(self._cards.min()) if len(self._cards) else 0
+
+    def card_histogram(self):
+        return _histogram(self._cards)
+
+    def edges_with_card(self, k):
+        return set(self._edge_ids[self._cards == k].tolist())
+
+    def indegree(self, identifier):
+        pos = self._position(identifier)
+        return int(self._in_ptr[pos + 1] - self._in_ptr[pos]) if pos >= 0 else 0
+
+    def outdegree(self, identifier):
+        pos = self._position(identifier)
+        if not 0 <= pos < self._vertex_count:
+            return 0
+        return int(self._out_ptr[pos + 1] - self._out_ptr[pos])
+
+    def top_degree(self, k, direction=consts.DIRECTION_BOTH):
+        degrees = self._degree_array(direction)
+        candidates = np.flatnonzero(degrees)
+        # Stable sort by descending degree
+        top = candidates[np.argsort(-degrees[candidates], kind='mergesort')[:k]]
+        return zip(self._vertex_ids[top].tolist(), degrees[top].tolist())
+
+    def vertices_with_degree(self, min, max=None, direction=consts.DIRECTION_BOTH):
+        degrees = self._degree_array(direction)
+        mask = degrees >= min
+        if max is not None:
+            mask &= degrees <= max
+        return set(self._vertex_ids[mask].tolist())
+
+    def degree_histogram(self, direction=consts.DIRECTION_BOTH):
+        return _histogram(self._degree_array(direction))
+
+    def _degree_array(self, direction):
+        """\
+        Returns an array with the degree of each vertex.
+        """
+        indegrees = np.diff(self._in_ptr[:self._vertex_count + 1])
+        outdegrees = np.diff(self._out_ptr)
+        return {consts.DIRECTION_IN: indegrees,
+                consts.DIRECTION_OUT: outdegrees,
+                consts.DIRECTION_BOTH: indegrees + outdegrees}[direction]
+
+    def _degrees(self, direction):
+        return zip(self._vertex_ids.tolist(), self._degree_array(direction).tolist())
+
+    def ingoing_edges(self, *identifiers):
+        return set(self._edge_ids[self._ingoing(self._lookup(identifiers))].tolist())
+
+    def outgoing_edges(self, *identifiers):
+        return set(self._edge_ids[self._outgoing(self._lookup(identifiers))].tolist())
+
+    def predecessors(self, *identifiers):
+        edges = self._ingoing(self._lookup(identifiers))
+        return self._vertex_ids[self._heads[edges]].tolist()
+
+    def successors(self, *identifiers):
+        edges = self._outgoing(self._lookup(identifiers))
+        return self._identifiers(_rows(self._tail_ptr, self._tail_idx, edges))
+
+    def edges_containing(self, *identifiers, **kwargs):
+        role = kwargs.get('role', consts.ROLE_ANY)
+        if not identifiers:
+            return set(self.edges())
+        positions = np.unique(self._lookup(identifiers))
+        if positions[0] < 0:
+            return set()
+        sets = []
+        for pos in positions:
+            pos = np.array([pos])
+            if role == consts.ROLE_HEAD:
+                edges = self._outgoing(pos)
+            elif role == consts.ROLE_TAIL:
+                edges = self._ingoing(pos)
+            else:
+                edges = np.union1d(self._ingoing(pos), self._outgoing(pos))
+            sets.append(edges)
+        sets.sort(key=len)
+        res = sets[0]
+        for edges in sets[1:]:
+            res = np.intersect1d(res, edges, assume_unique=True)
+        return set(self._edge_ids[res].tolist())
+
+    def edges_between(self, head, tail):
+        edges = np.intersect1d(self._outgoing(self._lookup([head])),
+                               self._ingoing(self._lookup([tail])), assume_unique=True)
+        return set(self._edge_ids[edges].tolist())
+
+    def find_edge(self, head, *tail):
+        tail = np.unique(self._lookup(tail))
+        if not len(tail) or tail[0] < 0:
+            return None
+        edges = self._outgoing(self._lookup([head]))
+        for pos in tail:
+            edges = np.intersect1d(edges, self._ingoing(np.array([pos])), assume_unique=True)
+        ptr = self._tail_ptr
+        for e in edges:
+            if ptr[e + 1] - ptr[e] == len(tail) \
+                    and (np.sort(self._tail_idx[ptr[e]:ptr[e + 1]]) == tail).all():
+                return self._edge_ids[e].item()
+        return None
+
+    def kind(self, identifier):
+        pos = self._position(identifier)
+        if pos < 0:
+            return consts.KIND_UNKNOWN
+        if pos >= self._vertex_count:
+            return consts.KIND_EDGE
+        if self._literal_index(pos) >= 0:
+            return consts.KIND_LITERAL
+        return consts.KIND_VERTEX
+
+    def vertices(self):
+        return self._vertex_ids.tolist()
+
+    def edges(self):
+        return self._edge_ids.tolist()
+
+    def __contains__(self, identifier):
+        return self._position(identifier) >= 0
+
+    def contains_many(self, identifiers):
+        return (self._lookup(identifiers) >= 0).tolist()
+
+    def __len__(self):
+        return self._vertex_count
+
+    def vertex_count(self):
+        return self._vertex_count
+
+    def edge_count(self):
+        return len(self._edge_ids)
+
+    def clear(self):
+        raise TypeError('A snapshot is immutable')
+
+    @property
+    def nbytes(self):
+        """\
+        Returns the number of bytes occupied by the arrays of this snapshot.
+        """
+        arrays = (self._vertex_ids, self._edge_ids, self._heads, self._tail_ptr,
+                  self._tail_idx, self._cards, self._out_ptr, self._out_idx,
+                  self._in_ptr, self._in_idx, self._lit_nodes, self._lit_dt,
+                  self._lit_ptr, self._lit_order, self._lit_hashes)
+        return sum(a.nbytes for a in arrays) + len(self._lit_buf)
+
+    @property
+    def identifier(self):
+        return self._identifier
+
+
+def _id_array(identifiers):
+    """\
+    Returns a sorted array of the provided identifiers.
+    """
+    return np.unique(np.asarray(list(identifiers)))
+
+
+def _ptr(lengths, dtype):
+    """\
+    Returns the CSR row pointer for the provided row lengths.
+    """
+    ptr = np.zeros(len(lengths) + 1, dtype)
+    np.cumsum(lengths, out=ptr[1:])
+    return ptr
+
+
+def _rows(ptr, idx, rows):
+    """\
+    Returns the concatenation of the CSR `rows`.
+    """
+    starts = ptr[rows]
+    lengths = ptr[rows + 1] - starts
+    total = lengths.sum()
+    if not total:
+        return idx[:0]
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return idx[offsets + np.arange(total)]
+
+
+def _histogram(values):
+    counts = np.bincount(values) if len(values) else np.empty(0, np.int64)
+    keys = np.flatnonzero(counts)
+    return dict(zip(keys.tolist(), counts[keys].tolist()))
+
+
+def _canonical(value, datatype):
+    """\
+    Returns the canonicalized value/datatype tuple, the value is a unicode
+    string.
+    """
+    value, datatype = canonicalize(_text(value), datatype)
+    return _text(value), datatype
+
+
+def _literal_hash(value, datatype):
+    """\
+    Returns a 64 bit hash of the canonicalized literal.
+    """
+    digest = hashlib.sha1((u'%s\n%s' % (value, datatype)).encode('utf-8')).hexdigest()
+    return int(digest[:16], 16)
+
+
+def _text(s):
+    return s.decode('utf-8') if isinstance(s, str) else unicode(s)
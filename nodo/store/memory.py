@@ -0,0 +1,496 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+In-memory graph store.
+
+All graphs of a connection share one element table. Elements are
+identified by dense integers which index into `array` columns. The
+tail of an edge is kept in a compact `array`, the adjacency of an element
+in a set, so linking and unlinking an edge needs constant time.
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from __future__ import absolute_import
+from array import array
+from itertools import chain, count
+from ..interfaces import IConnection, IImmutableGraph, IGraph, implements
+from .. import XSD, constants as consts
+from ..c14n import canonicalize
+from ..base import BaseImmutableGraph, BaseGraph, BaseConnection
+
+_VERTEX_KINDS = (consts.KIND_VERTEX, consts.KIND_LITERAL)
+
+
+def connect():
+    """\
+    Returns a new `MemoryConnection`.
+    """
+    return MemoryConnection()
+
+
+class MemoryConnection(BaseConnection):
+    """\
+    Connection to an in-memory graph space.
+    """
+    implements(IConnection)
+
+    def __init__(self, readonly=False):
+        """\
+
+        `readonly`
+            Indicates if the graphs of this connection are immutable.
+        """
+        self._store = _Store()
+        self._graphs = {}
+        self._counter = count(1)
+        self._readonly = readonly
+        self._graph_class = MemoryGraph if not readonly else MemoryImmutableGraph
+
+    def get(self, identifier, default=None):
+        data = self._graphs.get(identifier)
+        if data is not None:
+            return self._graph_class(self._store, data)
+        return default
+
+    def create_graph(self, identifier=None):
+        if identifier and identifier in self._graphs:
+            raise KeyError()
+        index = next(self._counter)
+        ident = identifier
+        while not ident or ident in self._graphs:
+            ident = str(next(self._counter))
+        data = _GraphData(index, ident)
+        self._graphs[ident] = data
+        self._store.graphs[index] = data
+        return self.get(ident)
+
+    def delete_graph(self, identifier):
+        if identifier in self._graphs:
+            g = MemoryGraph(self._store, self._graphs[identifier])
+            g.clear()
+            data = self._graphs.pop(identifier)
+            del self._store.graphs[data.index]
+
+    def is_readonly(self):
+        return self._readonly
+
+    def close(self):
+        pass
+
+    @property
+    def identifiers(self):
+        return self._graphs.keys()
+
+
+class _Store(object):
+    """\
+    The element table.
+
+    An element identifier is the index into the columns of this table.
+    The index ``0`` is never used as identifier.
+    """
+    __slots__ = ('kinds', 'owners', 'positions', 'heads', 'tails',
+                 'ingoing', 'outgoing', 'literals', 'graphs')
+
+    def __init__(self):
+        self.kinds = array('b', [consts.KIND_UNKNOWN])
+        # Index of the graph which owns the element
+        self.owners = array('l', [0])
+        # Position of the element within the vertex/edge array of its graph
+        self.positions = array('l', [0])
+        # The head of an edge, 0 for vertices
+        self.heads = array('l', [0])
+        # The tails contain either None or an array, the adjacency lists
+        # contain either None or a set of edges
+        self.tails = [None]
+        self.ingoing = [None]
+        self.outgoing = [None]
+        # Maps literal vertex identifiers to value/datatype tuples
+        self.literals = {}
+        # Maps graph indexes to the graph data
+        self.graphs = {}
+
+    def allocate(self, kind, graph):
+        ident = len(self.kinds)
+        self.kinds.append(kind)
+        self.owners.append(graph.index)
+        members = graph.edges if kind == consts.KIND_EDGE else graph.vertices
+        self.positions.append(len(members))
+        members.append(ident)
+        self.heads.append(0)
+        self.tails.append(None)
+        self.ingoing.append(None)
+        self.outgoing.append(None)
+        return ident
+
+    def release(self, ident):
+        graph = self.graphs[self.owners[ident]]
+        kind = self.kinds[ident]
+        if kind == consts.KIND_LITERAL:
+            del graph.literal_index[self.literals.pop(ident)]
+        members = graph.edges if kind == consts.KIND_EDGE else graph.vertices
+        pos = self.positions[ident]
+        last = members.pop()
+        if last != ident:
+            members[pos] = last
+            self.positions[last] = pos
+        self.kinds[ident] = consts.KIND_UNKNOWN
+        self.owners[ident] = 0
+        self.heads[ident] = 0
+        self.tails[ident] = None
+        self.ingoing[ident] = None
+        self.outgoing[ident] = None
+
+    def kind(self, identifier):
+        try:
+            if identifier > 0:
+                return self.kinds[identifier]
+        except (IndexError, TypeError):
+            pass
+        return consts.KIND_UNKNOWN
+
+
+class _GraphData(object):
+    """\
+    Keeps the vertices and edges of a graph.
+    """
+    __slots__ = ('index', 'identifier', 'vertices', 'edges', 'literal_index', 'cards')
+
+    def __init__(self, index, identifier):
+        self.index = index
+        self.identifier = identifier
+        self.vertices = array('l')
+        self.edges = array('l')
+        # Maps canonicalized value/datatype tuples to literal vertices
+        self.literal_index = {}
+        # Maps edge cardinalities to sets of edges
+        self.cards = {}
+
+
+class MemoryImmutableGraph(BaseImmutableGraph):
+    """\
+    An immutable view to an in-memory graph.
+    """
+    implements(IImmutableGraph)
+
+    def __init__(self, store, data):
+        """\
+
+        `store`
+            The element table.
+        `data`
+            The vertices and edges of the graph.
+        """
+        self._store = store
+        self._data = data
+
+    def find_vertex(self, value, datatype=None):
+        return self._data.literal_index.get(canonicalize(value, datatype or XSD.string))
+
+    def literal(self, identifier):
+        try:
+            return self._store.literals.get(identifier)
+        except TypeError:
+            return None
+
+    def head(self, edge):
+        if self.kind(edge) != consts.KIND_EDGE:
+            return None
+        return self._store.heads[edge]
+
+    def tail(self, edge):
+        if self.kind(edge) != consts.KIND_EDGE:
+            return ()
+        return tuple(self._store.tails[edge])
+
+    def card(self, edge):
+        if self.kind(edge) != consts.KIND_EDGE:
+            return 0
+        return _card(self._store, edge)
+
+    def card_histogram(self):
+        return dict((k, len(edges)) for k, edges in self._data.cards.iteritems())
+
+    def edges_with_card(self, k):
+        return set(self._data.cards.get(k, ()))
+
+    def edge_incidents(self, edge):
+        if self.kind(edge) != consts.KIND_EDGE:
+            return ()
+        store = self._store
+        head = store.heads[edge]
+        return tuple(chain([head], (t for t in store.tails[edge] if t != head)))
+
+    def ingoing_edges(self, *identifiers):
+        return self._union(self._store.ingoing, identifiers)
+
+    def outgoing_edges(self, *identifiers):
+        return self._union(self._store.outgoing, identifiers)
+
+    def _union(self, adjacency, identifiers):
+        kind = self._store.kind
+        res = set()
+        for ident in identifiers:
+            if kind(ident) != consts.KIND_UNKNOWN and adjacency[ident]:
+                res.update(adjacency[ident])
+        return res
+
+    def indegree(self, identifier):
+        return self._degree(self._store.ingoing, identifier)
+
+    def outdegree(self, identifier):
+        return self._degree(self._store.outgoing, identifier)
+
+    def _degree(self, adjacency, identifier):
+        if self.kind(identifier) == consts.KIND_UNKNOWN:
+            return 0
+        edges = adjacency[identifier]
+        return len(edges) if edges else 0
+
+    def kind(self, identifier):
+        return self._store.kind(identifier)
+
+    def vertices(self):
+        return self._data.vertices.tolist()
+
+    def edges(self):
+        return self._data.edges.tolist()
+
+    def __contains__(self, identifier):
+        store = self._store
+        return store.kind(identifier) != consts.KIND_UNKNOWN \
+                and store.owners[identifier] == self._data.index
+
+    def __len__(self):
+        return len(self._data.vertices)
+
+    def vertex_count(self):
+        return len(self._data.vertices)
+
+    def edge_count(self):
+        return len(self._data.edges)
+
+    def __eq__(self, other):
+        return self._data.identifier == other.identifier
+
+    @property
+    def identifier(self):
+        return self._data.identifier
+
+
+class MemoryGraph(MemoryImmutableGraph, BaseGraph):
+    """\
+    A modifiable in-memory graph.
+    """
+    implements(IGraph)
+
+    def __init__(self, store, data):
+        super(MemoryGraph, self).__init__(store, data)
+
+    def create_vertex(self, value=None, datatype=None):
+        if value:
+            return self._create_literal_vertex(value, datatype or XSD.string)
+        return self._store.allocate(consts.KIND_VERTEX, self._data)
+
+    def _create_literal_vertex(self, value, datatype):
+        key = canonicalize(value, datatype)
+        index = self._data.literal_index
+        ident = index.get(key)
+        if ident is None:
+            ident = self._store.allocate(consts.KIND_LITERAL, self._data)
+            self._store.literals[ident] = key
+            index[key] = ident
+        return ident
+
+    def create_edge(self, head, *tail, **kwargs):
+        _assert_vertex(self._store, head)
+        kind = self._store.kind
+        targets = array('l')
+        for i in tail:
+            if kind(i) == consts.KIND_UNKNOWN:
+                raise TypeError('Illegal vertex/edge: %r' % i)
+            if i not in targets:
+                targets.append(i)
+        if kwargs.get('unique'):
+            edge = self.find_edge(head, *targets)
+            if edge is not None:
+                return edge
+        store = self._store
+        edge = store.allocate(consts.KIND_EDGE, self._data)
+        store.heads[edge] = head
+        store.tails[edge] = targets
+        _link(store.outgoing, head, edge)
+        for i in targets:
+            _link(store.ingoing, i, edge)
+        _move_card(store, edge, 0, _card(store, edge))
+        return edge
+
+    def add_tail(self, edge, *identifiers):
+        store = self._store
+        _assert_edge(store, edge)
+        targets = store.tails[edge]
+        card = _card(store, edge)
+        for i in identifiers:
+            if store.kind(i) == consts.KIND_UNKNOWN:
+                raise TypeError('Illegal vertex/edge: %r' % i)
+            if i not in targets:
+                targets.append(i)
+                _link(store.ingoing, i, edge)
+        _move_card(store, edge, card, _card(store, edge))
+        return edge
+
+    def remove_tail(self, edge, *identifiers):
+        store = self._store
+        _assert_edge(store, edge)
+        if store.heads[edge] in identifiers:
+            raise ValueError("The edge's head isn't removable")
+        targets = store.tails[edge]
+        removable = set(identifiers).intersection(targets)
+        if len(removable) == len(targets):
+            raise ValueError('The tail of the edge must not become empty')
+        card = _card(store, edge)
+        for i in removable:
+            targets.remove(i)
+            _unlink(store.ingoing, i, edge)
+        _move_card(store, edge, card, _card(store, edge))
+        return edge
+
+    def delete_vertex(self, vertex):
+        store = self._store
+        _assert_vertex(store, vertex)
+        for edge in self.ingoing_edges(vertex) | self.outgoing_edges(vertex):
+            if store.kinds[edge] == consts.KIND_EDGE:
+                self.delete_edge(edge)
+        store.release(vertex)
+
+    def delete_edge(self, edge):
+        store = self._store
+        _assert_edge(store, edge)
+        # Edges which point to this edge are deleted as well
+        for e in self.ingoing_edges(edge):
+            if store.kinds[e] == consts.KIND_EDGE:
+                self.delete_edge(e)
+        _unlink(store.outgoing, store.heads[edge], edge)
+        for i in store.tails[edge]:
+            _unlink(store.ingoing, i, edge)
+        _move_card(store, edge, _card(store, edge), 0)
+        store.release(edge)
+
+    def merge_vertices(self, a, b):
+        if a == b:
+            return a
+        store = self._store
+        _assert_vertex(store, a)
+        _assert_vertex(store, b)
+        a_lit, b_lit = self.is_literal(a), self.is_literal(b)
+        if a_lit and b_lit:
+            raise TypeError('Cannot merge two literal vertices')
+        if b_lit:
+            a, b = b, a
+        for edge in chain(self.edges_between(a, b), self.edges_between(b, a)):
+            self.delete_edge(edge)
+        for edge in self.ingoing_edges(b):
+            targets = store.tails[edge]
+            card = _card(store, edge)
+            if a in targets:
+                targets.remove(b)
+            else:
+                targets[targets.index(b)] = a
+                _link(store.ingoing, a, edge)
+            _move_card(store, edge, card, _card(store, edge))
+        for edge in self.outgoing_edges(b):
+            card = _card(store, edge)
+            store.heads[edge] = a
+            _link(store.outgoing, a, edge)
+            _move_card(store, edge, card, _card(store, edge))
+        store.ingoing[b] = None
+        store.outgoing[b] = None
+        store.release(b)
+        return a
+
+    def clear(self):
+        data = self._data
+        while data.edges:
+            self.delete_edge(data.edges[-1])
+        while data.vertices:
+            self.delete_vertex(data.vertices[-1])
+
+
+def _card(store, edge):
+    s = set(store.tails[edge])
+    s.add(store.heads[edge])
+    return len(s)
+
+
+def _move_card(store, edge, old, new):
+    """\
+    Moves the `edge` within the cardinality index of its graph. The
+    cardinality ``0`` indicates that the edge does not exist.
+    """
+    if old == new:
+        return
+    cards = store.graphs[store.owners[edge]].cards
+    if old:
+        edges = cards[old]
+        edges.discard(edge)
+        if not edges:
+            del cards[old]
+    if new:
+        cards.setdefault(new, set()).add(edge)
+
+
+def _link(adjacency, ident, edge):
+    edges = adjacency[ident]
+    if edges is None:
+        adjacency[ident] = set([edge])
+    else:
+        edges.add(edge)
+
+
+def _unlink(adjacency, ident, edge):
+    edges = adjacency[ident]
+    if edges:
+        edges.discard(edge)
+
+
+def _assert_edge(store, identifier):
+    if store.kind(identifier) != consts.KIND_EDGE:
+        raise TypeError('Expected an edge identifier, got "%s"' % consts.kind_name(store.kind(identifier)))
+
+
+def _assert_vertex(store, identifier):
+    if store.kind(identifier) not in _VERTEX_KINDS:
+        raise TypeError('Expected a vertex identifier, got "%s"' % consts.kind_name(store.kind(identifier)))
@@ -39,18 +39,34 @@ Graph `Redis <http://redis.io/>`_ store.
 :license:      BSD License
 """
 from __future__ import absolute_import
+import base64
 import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain, imap
 import redis
 from ..interfaces import IConnection, IImmutableGraph, IGraph, implements
 from .. import XSD, constants as consts
 from ..c14n import canonicalize
 from ..base import BaseImmutableGraph, BaseGraph, BaseConnection
+from .._utils import BATCH_SIZE as _BATCH_SIZE, chunks as _chunks, unique as _unique
+from ..algorithms.components import connected_components
 
 _PREFIX_EDGE = u'e:'
 _PREFIX_VERTEX = u'v:'
 _PREFIX_LITERAL = u'l:'
+_PREFIX_LITERAL_REFS = u'r:'
 _KEY_GRAPHS = u'__graphs__'
 _KEY_CONSTRUCT_COUNTER = u'__construct_id__'
+_KEY_SCHEMA = u'__schema__'
+_SCHEMA_VERSION = 5
+_ID_BLOCK_SIZE = 1000
+_RECONNECT_DELAY = 1.0
+# Results of the change tail script besides 1 (success)
+_CHANGE_TAIL_UNKNOWN_EDGE = 0
+_CHANGE_TAIL_EMPTY = -1
 
 _PREFIX2KIND = {
     _PREFIX_EDGE: consts.KIND_EDGE,
@@ -66,45 +82,879 @@ def connect():
     return RedisConnection()
 
 
+class _IdLease(object):
+    """\
+    Hands out identifiers from a block of identifiers which is leased from
+    the server-side counter.
+
+    Identifiers of a block which are not used get lost. A block belongs to
+    the process which leased it, a forked process leases a new block.
+    """
+    def __init__(self, conn, block_size=_ID_BLOCK_SIZE):
+        """\
+
+        `conn`
+            A Redis connection.
+        `block_size`
+            The number of identifiers to lease at once.
+        """
+        if block_size < 1:
+            raise ValueError('The block size must be greater than zero, got %r' % block_size)
+        self._conn = conn
+        self._block_size = block_size
+        self._next = 1
+        self._limit = 0
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            pid = os.getpid()
+            if self._next > self._limit or self._pid != pid:
+                self._limit = self._conn.incr(_KEY_CONSTRUCT_COUNTER, self._block_size)
+                self._next = self._limit - self._block_size + 1
+                self._pid = pid
+            ident = self._next
+            self._next += 1
+        return str(ident)
+
+
+class _LRUCache(object):
+    """\
+    A bounded mapping which evicts the least recently used entries.
+    """
+    def __init__(self, size):
+        """\
+
+        `size`
+            The maximum number of entries.
+        """
+        self._size = size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            data = self._data
+            data.pop(key, None)
+            data[key] = value
+            if len(data) > self._size:
+                data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_MISSING = object()
+
+
+class _GraphCache(object):
+    """\
+    Caches the results of read operations of a graph.
+
+    Each modification of a graph increments the epoch counter of the graph.
+    The cache is cleared if the epoch changes. The epoch is either fetched
+    from the server at most every `ttl` seconds or the cache is notified
+    via keyspace notifications.
+
+    Since the adjacency of an element is not bound to a graph, local
+    modifications invalidate the caches of all graphs of a connection.
+    Modifications of other clients are only noticed by the epoch of the
+    modified graph.
+    """
+    def __init__(self, conn, epoch_key, size, ttl, group):
+        """\
+
+        `conn`
+            A Redis connection.
+        `epoch_key`
+            The key of the epoch counter.
+        `size`
+            The maximum number of cache entries.
+        `ttl`
+            The number of seconds a known epoch is trusted.
+        `group`
+            A mapping which contains the caches of all graphs of the
+            connection.
+        """
+        self._conn = conn
+        self._group = group
+        self._epoch_key = epoch_key
+        self._ttl = ttl
+        self._entries = _LRUCache(size)
+        self._epoch = _MISSING
+        self._checked = 0
+        self._generation = 0
+        self.notified = False
+
+    def lookup(self, key, loader):
+        """\
+        Returns the cached value for `key`. If the value is unknown, it is
+        fetched with `loader` and cached.
+        """
+        self._validate()
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            generation = self._generation
+            value = loader()
+            if isinstance(value, set):
+                value = frozenset(value)
+            elif isinstance(value, list):
+                value = tuple(value)
+            # Don't cache values which may have been fetched before an invalidation
+            if generation == self._generation:
+                self._entries.put(key, value)
+        return value
+
+    def invalidate(self):
+        """\
+        Clears the cache.
+        """
+        self._generation += 1
+        self._entries.clear()
+
+    def modified(self):
+        """\
+        Clears the caches of all graphs of the connection.
+        """
+        for cache in self._group.values():
+            cache.invalidate()
+
+    def _validate(self):
+        if self.notified:
+            return
+        now = time.time()
+        if now - self._checked < self._ttl:
+            return
+        epoch = self._conn.get(self._epoch_key)
+        self._checked = now
+        if epoch != self._epoch:
+            self.invalidate()
+            self._epoch = epoch
+
+
+class _EpochListener(object):
+    """\
+    Listens to keyspace notifications of the epoch counters and invalidates
+    the registered caches.
+
+    Notifications which are published while the connection is down are
+    lost. The caches are invalidated whenever the connection is
+    (re-)established and poll the epochs while the server is unreachable.
+    """
+    def __init__(self, conn):
+        self._caches = {}
+        self._listening = True
+        self._pubsub = conn.pubsub()
+        self._pubsub.psubscribe(u'__keyspace@*__:g:*:epoch')
+        self._pubsub.connection.register_connect_callback(self._connected)
+        self._stopped = False
+        thread = threading.Thread(target=self._run)
+        thread.daemon = True
+        thread.start()
+
+    @staticmethod
+    def is_available(conn):
+        """\
+        Returns if the server publishes keyspace notifications for string
+        commands.
+        """
+        try:
+            flags = conn.config_get('notify-keyspace-events').get('notify-keyspace-events', '')
+        except redis.exceptions.ResponseError:
+            return False
+        return 'K' in flags and ('$' in flags or 'A' in flags)
+
+    def register(self, epoch_key, cache):
+        self._caches[epoch_key] = cache
+        cache.notified = self._listening
+        # Changes before the registration are unknown
+        cache.invalidate()
+
+    def stop(self):
+        self._stopped = True
+
+    def _connected(self, connection):
+        """\
+        Called by the pub/sub connection after it (re-)connected and
+        subscribed to the notifications.
+        """
+        self._set_listening(True)
+
+    def _set_listening(self, listening):
+        """\
+        Switches the caches between notifications and polling and
+        invalidates them since notifications may have been lost.
+        """
+        self._listening = listening
+        for cache in self._caches.values():
+            cache.notified = listening
+            cache.invalidate()
+
+    def _run(self):
+        pubsub = self._pubsub
+        try:
+            while not self._stopped:
+                try:
+                    msg = pubsub.get_message(timeout=1.0)
+                except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError):
+                    # The next get_message reconnects, the caches poll meanwhile
+                    self._set_listening(False)
+                    pubsub.connection.disconnect()
+                    time.sleep(_RECONNECT_DELAY)
+                    continue
+                if not msg or msg['type'] != 'pmessage':
+                    continue
+                cache = self._caches.get(msg['channel'].split(':', 1)[1])
+                if cache is not None:
+                    cache.invalidate()
+        finally:
+            self._set_listening(False)
+            pubsub.close()
+
+
+class _LiteralSweeper(object):
+    """\
+    Calls a sweep function periodically.
+    """
+    def __init__(self, sweep, interval):
+        """\
+
+        `sweep`
+            A callable without arguments.
+        `interval`
+            The number of seconds between two calls.
+        """
+        self._sweep = sweep
+        self._interval = interval
+        self._stopped = threading.Event()
+        thread = threading.Thread(target=self._run)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            self._sweep()
+
+
+def _cached(func):
+    """\
+    Decorator for read operations of `RedisImmutableGraph` which caches
+    the results if the graph has a cache.
+    """
+    name = func.__name__
+    def wrapper(self, *args):
+        cache = self._cache
+        if cache is None:
+            return func(self, *args)
+        return cache.lookup((name,) + args, lambda: func(self, *args))
+    wrapper.__name__ = name
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+
+class _Script(object):
+    """\
+    A Lua script which is executed via ``EVALSHA``.
+
+    If the server does not know the script yet, it is loaded via
+    ``SCRIPT LOAD`` and ``EVALSHA`` is repeated. Servers without scripting
+    support (Redis < 2.6) are served by the `fallback` which implements the
+    script with plain commands.
+    """
+    def __init__(self, source, fallback, queue_fallback=None):
+        """\
+
+        `source`
+            The Lua source.
+        `fallback`
+            A callable which accepts a Redis connection, the keys, and the
+            arguments and does the same as the script.
+        `queue_fallback`
+            An optional callable which accepts a pipeline, the keys, and the
+            arguments and queues the commands of the `fallback`. Only scripts
+            which do not read any data can provide it.
+        """
+        self.source = source
+        self.sha = hashlib.sha1(source).hexdigest()
+        self.fallback = fallback
+        self.queue_fallback = queue_fallback
+
+    def load(self, conn):
+        """\
+        Loads the script into the script cache of the server.
+
+        This must be called before the script is queued into a pipeline.
+        """
+        conn.script_load(self.source)
+
+    def queue(self, pipe, keys, args, scripting=True):
+        """\
+        Queues the script into the pipeline `pipe`.
+        """
+        if not scripting:
+            return self.queue_fallback(pipe, keys, args)
+        pipe.evalsha(self.sha, len(keys), *(tuple(keys) + tuple(args)))
+
+    def __call__(self, conn, keys, args, scripting=True):
+        if not scripting:
+            return self.fallback(conn, keys, args)
+        params = tuple(keys) + tuple(args)
+        try:
+            return conn.evalsha(self.sha, len(keys), *params)
+        except redis.exceptions.ResponseError as ex:
+            # Newer clients raise a NoScriptError, older ones keep the
+            # error prefix in the message
+            if type(ex).__name__ != 'NoScriptError' and not str(ex).startswith('NOSCRIPT'):
+                raise
+        conn.script_load(self.source)
+        return conn.evalsha(self.sha, len(keys), *params)
+
+
+class _Transaction(object):
+    """\
+    Buffers the modifications of a transaction and sends them as one
+    ``MULTI``/``EXEC`` block on `commit`.
+
+    The class provides the subset of the Redis commands which is used by
+    the graphs. Read commands return the state of the server merged with
+    the buffered modifications, so a transaction sees its own writes.
+
+    The commit is atomic, but modifications of other clients between a read
+    and the commit are not detected. Instances are not thread-safe.
+    """
+    def __init__(self, conn):
+        """\
+
+        `conn`
+            A Redis connection.
+        """
+        self._conn = conn
+        self.reset()
+
+    def reset(self):
+        """\
+        Discards all buffered modifications.
+        """
+        self._deleted = set()
+        # key -> (added members, removed members)
+        self._sets = {}
+        # key -> ({member: score}, removed members)
+        self._zsets = {}
+        # key -> value of SETNX
+        self._values = {}
+        # key -> amount of INCR
+        self._increments = {}
+        # key -> {field: amount of HINCRBY}
+        self._hashes = {}
+        # key -> {field: value of HSET, None for HDEL}
+        self._hash_values = {}
+
+    def commit(self):
+        """\
+        Sends the buffered modifications as one ``MULTI``/``EXEC`` block and
+        resets the transaction.
+        """
+        deleted = self._deleted
+        pipe = self._conn.pipeline()
+        if deleted:
+            pipe.delete(*deleted)
+        for key, value in self._values.iteritems():
+            pipe.setnx(key, value)
+        for key, (added, removed) in self._sets.iteritems():
+            if removed and key not in deleted:
+                pipe.srem(key, *removed)
+            if added:
+                pipe.sadd(key, *added)
+        for key, (scores, removed) in self._zsets.iteritems():
+            if removed and key not in deleted:
+                pipe.zrem(key, *removed)
+            if scores:
+                pipe.zadd(key, *chain.from_iterable(scores.iteritems()))
+        for key, amount in self._increments.iteritems():
+            pipe.incr(key, amount)
+        for key, fields in self._hashes.iteritems():
+            for field, amount in fields.iteritems():
+                pipe.hincrby(key, field, amount)
+        for key, fields in self._hash_values.iteritems():
+            for field, value in fields.iteritems():
+                if value is not None:
+                    pipe.hset(key, field, value)
+                elif key not in deleted:
+                    pipe.hdel(key, field)
+        pipe.execute()
+        self.reset()
+
+    def pipeline(self, transaction=True):
+        return _TransactionPipeline(self)
+
+    def _is_modified(self, key):
+        return key in self._deleted or key in self._sets or key in self._zsets \
+                or key in self._values or key in self._increments or key in self._hashes \
+                or key in self._hash_values
+
+    def delete(self, *keys):
+        for key in keys:
+            self._deleted.add(key)
+            self._sets.pop(key, None)
+            self._zsets.pop(key, None)
+            self._values.pop(key, None)
+            self._increments.pop(key, None)
+            self._hashes.pop(key, None)
+            self._hash_values.pop(key, None)
+
+    def exists(self, key):
+        if not self._is_modified(key):
+            return self._conn.exists(key)
+        if key in self._sets:
+            return bool(self.smembers(key))
+        if key in self._zsets:
+            return bool(self._zitems(key))
+        if key in self._hashes or key in self._hash_values:
+            return bool(self.hgetall(key))
+        return self.get(key) is not None
+
+    # Strings
+
+    def setnx(self, key, value):
+        self._values.setdefault(key, value)
+
+    def incr(self, key, amount=1):
+        """\
+        Buffers the increment. The new value is unknown before the commit,
+        hence ``None`` is returned.
+        """
+        self._increments[key] = self._increments.get(key, 0) + amount
+
+    def get(self, key):
+        if not self._is_modified(key):
+            return self._conn.get(key)
+        value = self._conn.get(key) if key not in self._deleted else None
+        if value is None:
+            value = self._values.get(key)
+        amount = self._increments.get(key)
+        if amount:
+            value = str(int(value or 0) + amount)
+        return value
+
+    def mget(self, keys):
+        values = self._conn.mget(keys)
+        is_modified, get = self._is_modified, self.get
+        return [get(key) if is_modified(key) else value for key, value in zip(keys, values)]
+
+    # Hashes
+
+    def hincrby(self, key, field, amount=1):
+        fields = self._hashes.setdefault(key, {})
+        fields[str(field)] = fields.get(str(field), 0) + amount
+
+    def hget(self, key, field):
+        if not self._is_modified(key):
+            return self._conn.hget(key, field)
+        return self.hgetall(key).get(field)
+
+    def hset(self, key, field, value):
+        self._hash_values.setdefault(key, {})[field] = value
+
+    def hdel(self, key, *fields):
+        values = self._hash_values.setdefault(key, {})
+        for field in fields:
+            values[field] = None
+
+    def hgetall(self, key):
+        if not self._is_modified(key):
+            return self._conn.hgetall(key)
+        res = self._conn.hgetall(key) if key not in self._deleted else {}
+        for field, amount in self._hashes.get(key, {}).iteritems():
+            res[field] = str(int(res.get(field, 0)) + amount)
+        for field, value in self._hash_values.get(key, {}).iteritems():
+            if value is None:
+                res.pop(field, None)
+            else:
+                res[field] = value
+        return res
+
+    def hscan_iter(self, key, count=None):
+        if not self._is_modified(key):
+            return self._conn.hscan_iter(key, count=count)
+        return self.hgetall(key).iteritems()
+
+    # Sets
+
+    def _set_delta(self, key):
+        delta = self._sets.get(key)
+        if delta is None:
+            delta = self._sets[key] = set(), set()
+        return delta
+
+    def sadd(self, key, *members):
+        added, removed = self._set_delta(key)
+        added.update(members)
+        removed.difference_update(members)
+
+    def srem(self, key, *members):
+        added, removed = self._set_delta(key)
+        added.difference_update(members)
+        removed.update(members)
+
+    def smembers(self, key):
+        if not self._is_modified(key):
+            return self._conn.smembers(key)
+        members = self._conn.smembers(key) if key not in self._deleted else set()
+        delta = self._sets.get(key)
+        if delta:
+            members = (members - delta[1]) | delta[0]
+        return members
+
+    def sismember(self, key, member):
+        if not self._is_modified(key):
+            return self._conn.sismember(key, member)
+        return member in self.smembers(key)
+
+    def scard(self, key):
+        if not self._is_modified(key):
+            return self._conn.scard(key)
+        return len(self.smembers(key))
+
+    def sscan_iter(self, key, count=None):
+        if not self._is_modified(key):
+            return self._conn.sscan_iter(key, count=count)
+        return iter(self.smembers(key))
+
+    def sunion(self, keys, *args):
+        keys = redis.client.list_or_args(keys, args)
+        unmodified = [key for key in keys if not self._is_modified(key)]
+        res = self._conn.sunion(unmodified) if unmodified else set()
+        for key in keys:
+            if self._is_modified(key):
+                res |= self.smembers(key)
+        return res
+
+    def sinter(self, keys, *args):
+        keys = redis.client.list_or_args(keys, args)
+        unmodified = [key for key in keys if not self._is_modified(key)]
+        res = self._conn.sinter(unmodified) if unmodified else None
+        for key in keys:
+            if self._is_modified(key):
+                members = self.smembers(key)
+                res = members if res is None else res & members
+        return res
+
+    # Sorted sets
+
+    def _zset_delta(self, key):
+        delta = self._zsets.get(key)
+        if delta is None:
+            delta = self._zsets[key] = {}, set()
+        return delta
+
+    def zadd(self, key, *args, **kwargs):
+        scores, removed = self._zset_delta(key)
+        for member, score in chain(zip(args[::2], args[1::2]), kwargs.iteritems()):
+            scores[member] = float(score)
+            removed.discard(member)
+
+    def zrem(self, key, *members):
+        scores, removed = self._zset_delta(key)
+        for member in members:
+            scores.pop(member, None)
+        removed.update(members)
+
+    def _zitems(self, key):
+        """\
+        Returns the ``(member, score)`` tuples of the sorted set `key`
+        in ``ZRANGE`` order.
+        """
+        items = {}
+        if key not in self._deleted:
+            items.update(self._conn.zrange(key, 0, -1, withscores=True))
+        delta = self._zsets.get(key)
+        if delta:
+            for member in delta[1]:
+                items.pop(member, None)
+            items.update(delta[0])
+        return sorted(items.iteritems(), key=lambda item: (item[1], item[0]))
+
+    def zrange(self, key, start, end, withscores=False):
+        if not self._is_modified(key):
+            return self._conn.zrange(key, start, end, withscores=withscores)
+        items = self._zitems(key)
+        if start < 0:
+            start = max(start + len(items), 0)
+        if end < 0:
+            end += len(items)
+        items = items[start:end + 1]
+        return items if withscores else [member for member, score in items]
+
+    def zcard(self, key):
+        if not self._is_modified(key):
+            return self._conn.zcard(key)
+        return len(self._zitems(key))
+
+    def zcount(self, key, min, max):
+        if not self._is_modified(key):
+            return self._conn.zcount(key, min, max)
+        return sum(1 for member, score in self._zitems(key) if min <= score <= max)
+
+    def zscore(self, key, member):
+        if not self._is_modified(key):
+            return self._conn.zscore(key, member)
+        return dict(self._zitems(key)).get(member)
+
+    def zrevrange(self, key, start, end, withscores=False):
+        if not self._is_modified(key):
+            return self._conn.zrevrange(key, start, end, withscores=withscores)
+        items = self._zitems(key)[::-1]
+        if end < 0:
+            end += len(items)
+        items = items[max(start, 0):end + 1]
+        return items if withscores else [member for member, score in items]
+
+    def zrangebylex(self, key, min, max, start=None, num=None):
+        if not self._is_modified(key):
+            return self._conn.zrangebylex(key, min, max, start, num)
+        members = [member for member, score in self._zitems(key) if _in_lex_range(member, min, max)]
+        if start is not None:
+            members = members[start:start + num]
+        return members
+
+    def zlexcount(self, key, min, max):
+        if not self._is_modified(key):
+            return self._conn.zlexcount(key, min, max)
+        return sum(1 for member, score in self._zitems(key) if _in_lex_range(member, min, max))
+
+    def zrangebyscore(self, key, min, max):
+        if not self._is_modified(key):
+            return self._conn.zrangebyscore(key, min, max)
+        return [member for member, score in self._zitems(key)
+                if float(min) <= score <= float(max)]
+
+
+class _TransactionPipeline(object):
+    """\
+    Collects commands and executes them against a `_Transaction`.
+
+    Provides the pipeline interface for the plain command variants of the
+    Lua scripts.
+    """
+    def __init__(self, tx):
+        self._tx = tx
+        self._commands = []
+
+    def __getattr__(self, name):
+        func = getattr(self._tx, name)
+        def queue(*args, **kwargs):
+            self._commands.append((func, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        commands, self._commands = self._commands, []
+        return [func(*args, **kwargs) for func, args, kwargs in commands]
+
+
 class RedisConnection(BaseConnection):
     """\
 
     """
     implements(IConnection)
 
-    def __init__(self, connection=None, readonly=False):
+    def __init__(self, connection=None, readonly=False, scripting=True,
+                 id_block_size=_ID_BLOCK_SIZE, scan_count=None, cache_size=0,
+                 cache_ttl=1.0, transactional=False, sweep_interval=None):
         """\
 
         `connection`
             A Redis connection.
+        `readonly`
+            Indicates if the graphs of this connection are immutable.
+        `scripting`
+            Indicates if multi-step modifications should be executed as
+            Lua scripts (requires Redis 2.6 or later).
+        `id_block_size`
+            The number of identifiers which are leased from the server at
+            once (``1000`` by default).
+        `scan_count`
+            The ``COUNT`` hint for ``SSCAN`` which is used by the ``iter_*``
+            methods of the graphs (``None`` uses the server default).
+        `cache_size`
+            The maximum number of cached read results per graph. ``0``
+            (default) disables the cache.
+        `cache_ttl`
+            The number of seconds cached results may be used without
+            asking the server if the graph was modified. Not used if the
+            server publishes keyspace notifications for string commands.
+        `transactional`
+            Indicates if modifications are buffered until `commit()` is
+            called. Otherwise, each modification is sent immediately.
+            Modifications of a transaction are not executed as Lua scripts.
+        `sweep_interval`
+            If provided, a thread calls `sweep_literals()` every
+            `sweep_interval` seconds.
         """
-        self._conn = connection or redis.Redis()
+        self._client = connection or redis.Redis()
+        _check_schema(self._client)
+        self._tx = _Transaction(self._client) if transactional else None
+        self._conn = self._tx or self._client
         self._readonly = readonly
+        self._scripting = scripting and not transactional
+        self._unlink = not transactional and _server_version(self._client) >= (4, 0)
+        self._create_id = _IdLease(self._client, id_block_size)
+        self._scan_count = scan_count
+        self._cache_size = cache_size
+        self._cache_ttl = cache_ttl
+        self._caches = {}
+        self._literal_cache = _LRUCache(cache_size) if cache_size else None
+        self._listener = None
+        if cache_size and _EpochListener.is_available(self._client):
+            self._listener = _EpochListener(self._client)
         self._graph_class = RedisGraph if not readonly else RedisImmutableGraph
+        self._reclaimed_literals = 0
+        self._reclaimed_bytes = 0
+        self._stats_lock = threading.Lock()
+        self._sweeper = None
+        if sweep_interval:
+            self._sweeper = _LiteralSweeper(self.sweep_literals, sweep_interval)
 
     def _is_member(self, identifier):
         return self._conn.sismember(_KEY_GRAPHS, identifier)
 
     def get(self, identifier, default=None):
         if self._is_member(identifier):
-            return self._graph_class(self._conn, identifier)
+            return self._graph_class(self._conn, identifier, scripting=self._scripting,
+                                     id_lease=self._create_id, scan_count=self._scan_count,
+                                     cache=self._cache(identifier),
+                                     literal_cache=self._literal_cache,
+                                     unlink=self._unlink)
         return default
 
+    def _cache(self, identifier):
+        if not self._cache_size:
+            return None
+        cache = self._caches.get(identifier)
+        if cache is None:
+            epoch_key = u'g:%s:epoch' % identifier
+            cache = _GraphCache(self._client, epoch_key, self._cache_size, self._cache_ttl,
+                                self._caches)
+            if self._listener:
+                self._listener.register(epoch_key, cache)
+            self._caches[identifier] = cache
+        return cache
+
     def create_graph(self, identifier=None):
         if identifier and self._is_member(identifier):
             raise KeyError()
-        ident = identifier or _create_id(self._conn)
+        ident = identifier or self._create_id()
         self._conn.sadd(_KEY_GRAPHS, ident)
         return self.get(ident)
 
-    def delete_graph(self, identifier):
-        if self._is_member(identifier):
-            g = self.get(identifier)
-            g.clear()
-            self._conn.srem(_KEY_GRAPHS, identifier)
+    def delete_graph(self, identifier, background=False, progress=None):
+        """\
+        Deletes the graph with the provided `identifier`.
+
+        `background`
+            If ``True``, the graph is removed from the `identifiers`
+            immediately and its elements are removed by a new thread which
+            is returned. Not supported by transactional connections.
+        `progress`
+            An optional callable which receives the progress of the
+            removal, see `RedisGraph.clear()`.
+        """
+        if not self._is_member(identifier):
+            return None
+        g = self.get(identifier)
+        if not background:
+            self._delete_graph(g, progress)
+            return None
+        if self._tx:
+            raise ValueError('Graphs of a transactional connection cannot be deleted in the background')
+        self._conn.srem(_KEY_GRAPHS, identifier)
+        thread = threading.Thread(target=self._delete_graph, args=(g, progress))
+        thread.start()
+        return thread
+
+    def _delete_graph(self, graph, progress):
+        graph.clear(progress=progress)
+        self._conn.pipeline() \
+            .srem(_KEY_GRAPHS, graph.identifier) \
+            .delete(graph._epoch_key, u'%s:on' % graph._sig_key, u'%s:on' % graph._comp_key) \
+            .execute()
+        self._caches.pop(graph.identifier, None)
+
+    def commit(self):
+        """\
+        Sends the modifications of the current transaction as one
+        ``MULTI``/``EXEC`` block.
+
+        Does nothing if the connection is not transactional.
+        """
+        if self._tx:
+            self._tx.commit()
+
+    def rollback(self):
+        """\
+        Discards the modifications of the current transaction.
+
+        Does nothing if the connection is not transactional.
+        """
+        if self._tx:
+            self._tx.reset()
+            # The caches may contain results which include the modifications
+            for cache in self._caches.values():
+                cache.invalidate()
+
+    def sweep_literals(self, batch_size=_BATCH_SIZE):
+        """\
+        Removes the values of literals which are not referenced by any
+        graph. The keys are fetched with ``SCAN`` in chunks of `batch_size`
+        keys.
+
+        Returns a tuple of the number of removed values and the number of
+        reclaimed bytes.
+        """
+        client = self._client
+        count = size = 0
+        for chunk in _chunks(client.scan_iter(_PREFIX_LITERAL + u'*', count=batch_size), batch_size):
+            # Keys of literal values have the form l:<datatype>:<digest>
+            keys = list(chain.from_iterable((key, _refs_key(key)) for key in chunk
+                                            if key.count(':') == 2))
+            if keys:
+                c, s = _SWEEP_LITERALS(client, keys, (), self._scripting)
+                count += c
+                size += s
+        with self._stats_lock:
+            self._reclaimed_literals += count
+            self._reclaimed_bytes += size
+        return count, size
+
+    @property
+    def literal_stats(self):
+        """\
+        Returns a dict with the number of literal values (``literals``) and
+        the number of bytes (``bytes``) which were reclaimed by this
+        connection.
+        """
+        with self._stats_lock:
+            return {'literals': self._reclaimed_literals, 'bytes': self._reclaimed_bytes}
 
     def close(self):
-        pass #del self._conn
+        if self._listener:
+            self._listener.stop()
+        if self._sweeper:
+            self._sweeper.stop()
 
     @property
     def identifiers(self):
@@ -117,18 +967,48 @@ class RedisImmutableGraph(BaseImmutableGraph):
     """
     implements(IImmutableGraph)
     
-    def __init__(self, connection, identifier):
+    def __init__(self, connection, identifier, scripting=True, id_lease=None,
+                 scan_count=None, cache=None, literal_cache=None, unlink=False):
         """\
 
         `connection`
             A Redis connection.
         `identifier`
             The graph identifier.
+        `scripting`
+            Indicates if Lua scripts should be used.
+        `id_lease`
+            A callable which returns new identifiers. If it is ``None``,
+            the graph leases identifiers on its own.
+        `scan_count`
+            The ``COUNT`` hint for ``SSCAN``.
+        `cache`
+            An optional cache for read operations.
+        `literal_cache`
+            An optional `_LRUCache` for literals. Since the identifier of a
+            literal is derived from its value, literals never get stale.
+        `unlink`
+            Indicates if keys should be removed with ``UNLINK`` (requires
+            Redis 4.0 or later).
         """
         self._conn = connection
         self._identifier = identifier
+        self._scripting = scripting
+        self._create_id = id_lease or _IdLease(connection)
+        self._scan_count = scan_count
+        self._cache = cache
+        self._literal_cache = literal_cache
+        self._unlink = unlink
         self._v_key = u'g:%s:vertices' % self._identifier
         self._e_key = u'g:%s:edges' % self._identifier
+        self._epoch_key = u'g:%s:epoch' % self._identifier
+        self._cards_key = u'g:%s:cards' % self._identifier
+        self._degree_keys = (u'g:%s:indegree' % self._identifier,
+                             u'g:%s:outdegree' % self._identifier,
+                             u'g:%s:degree' % self._identifier)
+        self._sig_key = u'g:%s:signatures' % self._identifier
+        self._index_keys = self._degree_keys + (self._sig_key,)
+        self._comp_key = u'g:%s:components' % self._identifier
 
     def find_vertex(self, value, datatype=None):
         dt = datatype or XSD.string
@@ -136,42 +1016,266 @@ class RedisImmutableGraph(BaseImmutableGraph):
         return lid if self._conn.sismember(self._v_key, lid) else None
 
     def literal(self, identifier):
+        cache = self._literal_cache
+        if cache is not None:
+            lit = cache.get(identifier)
+            if lit is not None:
+                return lit
         glid = identifier[:identifier.rfind(':')]
         val = self._conn.get(glid)
         if val is None:
             return None
         dt = _id2datatype(identifier[2:glid.find(u':', 2)])
+        if cache is not None:
+            cache.put(identifier, (val, dt))
         return val, dt
 
+    def literals(self, *identifiers):
+        """\
+        Fetches the values with ``MGET`` in chunks of ``_BATCH_SIZE``
+        identifiers.
+        """
+        cache = self._literal_cache
+        res = [None] * len(identifiers)
+        literal_ids = []
+        for i, ident in enumerate(identifiers):
+            if _kind(ident) != consts.KIND_LITERAL:
+                continue
+            lit = cache.get(ident) if cache is not None else None
+            if lit is not None:
+                res[i] = lit
+            else:
+                literal_ids.append((i, ident))
+        for chunk in _chunks(literal_ids, _BATCH_SIZE):
+            vals = self._conn.mget([ident[:ident.rfind(':')] for i, ident in chunk])
+            for (i, ident), val in zip(chunk, vals):
+                if val is not None:
+                    res[i] = val, _id2datatype(ident[2:ident.find(u':', 2)])
+                    if cache is not None:
+                        cache.put(ident, res[i])
+        return res
+
+    @_cached
     def ingoing_edges(self, *identifiers):
-        return self._conn.sunion(['%s:ie' % ident for ident in identifiers])
+        return _edge_ids(self._conn.sunion(['%s:ie' % ident for ident in identifiers]))
 
+    @_cached
     def outgoing_edges(self, *identifiers):
-        return self._conn.sunion(['%s:oe' % ident for ident in identifiers])
+        return _edge_ids(self._conn.sunion(['%s:oe' % ident for ident in identifiers]))
+
+    def iter_ingoing_edges(self, *identifiers):
+        return imap(_edge_id, self._scan_union(['%s:ie' % ident for ident in identifiers]))
 
+    def iter_outgoing_edges(self, *identifiers):
+        return imap(_edge_id, self._scan_union(['%s:oe' % ident for ident in identifiers]))
+
+    def _scan(self, key):
+        """\
+        Returns an iterator over the members of the set `key`.
+
+        A member may be returned more than once if the set is resized
+        while it is scanned.
+        """
+        return self._conn.sscan_iter(key, count=self._scan_count)
+
+    def _scan_union(self, keys):
+        """\
+        Returns an iterator over the union of the sets `keys`. Each member
+        is returned once, the members seen so far are kept in memory.
+        """
+        return _unique(chain(*[self._scan(key) for key in keys]))
+
+    @_cached
     def head(self, edge):
-        r = self._conn.zrange(edge, 0, 0)
-        return r[0] if r else None
+        return self.heads((edge,))[0]
 
+    @_cached
     def tail(self, edge):
-        # zrange(edge, 1, -1) returns [] iff the edge represents a loop
-        return self._conn.zrange(edge, 1, -1) or [self.head(edge)]
+        return _tail(self._conn.zrange(edge, 0, -1, withscores=True))
+
+    def heads(self, edges):
+        """\
+        The head of an edge is the member with the score 0. If the head is
+        part of the tail, the head is looked up in the ``:oe`` sets of the
+        members.
+        """
+        res = []
+        for chunk in _chunks(edges, _BATCH_SIZE):
+            res.extend(_edge_heads(self._conn, chunk, self._zrange_many(chunk, withscores=True)))
+        return res
 
+    def tails(self, edges):
+        return [_tail(r) for r in self._zrange_many(edges, withscores=True)]
+
+    def incidents_many(self, edges):
+        return self._zrange_many(edges)
+
+    def _zrange_many(self, edges, withscores=False):
+        """\
+        Returns a list of ``ZRANGE edge 0 -1`` results for the provided
+        `edges`. The commands are sent in pipelines of ``_BATCH_SIZE``
+        commands.
+        """
+        res = []
+        for chunk in _chunks(edges, _BATCH_SIZE):
+            pipe = self._conn.pipeline(transaction=False)
+            for edge in chunk:
+                pipe.zrange(edge, 0, -1, withscores=withscores)
+            res.extend(pipe.execute())
+        return res
+
+    @_cached
     def card(self, edge):
         return self._conn.zcount(edge, 0, 1)
 
+    @_cached
     def indegree(self, identifier):
         return self._conn.scard('%s:ie' % identifier)
 
+    @_cached
     def outdegree(self, identifier):
         return self._conn.scard('%s:oe' % identifier)
 
+    def edges_containing(self, *identifiers, **kwargs):
+        """\
+        The intersection is computed by the server. If the role is not
+        restricted, the edges of the identifier with the fewest edges are
+        filtered with ``ZSCORE``.
+        """
+        role = kwargs.get('role', consts.ROLE_ANY)
+        identifiers = tuple(set(identifiers))
+        if not identifiers:
+            return self.edges()
+        if role == consts.ROLE_TAIL:
+            # SINTER starts with the smallest set
+            return _edge_ids(self._conn.sinter(['%s:ie' % ident for ident in identifiers]))
+        if role == consts.ROLE_HEAD:
+            if len(identifiers) > 1:
+                return set()
+            return _edge_ids(self._conn.smembers('%s:oe' % identifiers[0]))
+        return _edge_ids(_EDGES_CONTAINING(self._conn, (), identifiers, self._scripting))
+
+    def find_edge(self, head, *tail):
+        """\
+        Uses the signature index if it exists, otherwise the edge is
+        looked up in the intersection of the adjacency sets.
+        """
+        return _find_edge(self._conn, self._sig_key, head, tail)
+
+    def duplicate_edges(self):
+        """\
+        Requires the signature index, otherwise all edges are read and
+        their signatures are computed in chunks of ``_BATCH_SIZE`` edges.
+        """
+        enabled, digests = self._conn.pipeline(transaction=False) \
+                                .exists(u'%s:on' % self._sig_key) \
+                                .smembers(u'%s:dups' % self._sig_key) \
+                                .execute()
+        if not enabled:
+            signatures = {}
+            for chunk in _chunks(self.iter_edges(), _BATCH_SIZE):
+                for edge, digest in zip(chunk, _edge_signatures(self._conn, chunk)):
+                    if digest is not None:
+                        signatures.setdefault(digest, set()).add(edge)
+            return [edges for edges in signatures.itervalues() if len(edges) > 1]
+        digests = tuple(digests)
+        pipe = self._conn.pipeline(transaction=False)
+        for digest in digests:
+            pipe.zrangebylex(self._sig_key, u'[%s:' % digest, u'(%s;' % digest)
+        res = pipe.execute() if digests else ()
+        return [set(_edge_id(entry[len(digest) + 1:]) for entry in entries)
+                for digest, entries in zip(digests, res) if len(entries) > 1]
+
+    @property
+    def has_signature_index(self):
+        """\
+        Indicates if the graph maintains the signature index of its edges.
+        """
+        return bool(self._conn.exists(u'%s:on' % self._sig_key))
+
+    def component(self, identifier):
+        """\
+        Returns the identifier of the weakly connected component of the
+        vertex or edge `identifier` or ``None`` if the identifier is unknown.
+
+        Requires the component index (see
+        `RedisGraph.create_component_index()`), otherwise a ``ValueError``
+        is raised.
+        """
+        conn = self._conn
+        vertex = _component_vertex(conn, identifier)
+        enabled, exists, cid = conn.pipeline() \
+                                   .exists(u'%s:on' % self._comp_key) \
+                                   .sismember(self._v_key, vertex or u'') \
+                                   .hget(self._comp_key, vertex or u'') \
+                                   .execute()
+        if not enabled:
+            raise ValueError('The graph does not maintain the component index')
+        if not exists:
+            return None
+        return cid or vertex
+
+    @property
+    def has_component_index(self):
+        """\
+        Indicates if the graph maintains the component index of its vertices.
+        """
+        return bool(self._conn.exists(u'%s:on' % self._comp_key))
+
+    @_cached
     def edges_between(self, head, tail):
-        return self._conn.sinter('%s:oe' % head, '%s:ie' % tail)
+        return _edge_ids(self._conn.sinter('%s:oe' % head, '%s:ie' % tail))
 
+    @_cached
     def edge_incidents(self, edge):
         return self._conn.zrange(edge, 0, -1)
 
+    def card_histogram(self):
+        return dict((int(card), int(count))
+                    for card, count in self._conn.hgetall(self._cards_key).iteritems()
+                    if int(count) > 0)
+
+    @_cached
+    def edges_with_card(self, k):
+        return _edge_ids(self._conn.smembers(u'%s:%d' % (self._cards_key, k)))
+
+    def top_degree(self, k, direction=consts.DIRECTION_BOTH):
+        if k < 1:
+            return []
+        return [(v, int(d)) for v, d in
+                self._conn.zrevrange(self._degree_key(direction), 0, k - 1, withscores=True)]
+
+    def vertices_with_degree(self, min, max=None, direction=consts.DIRECTION_BOTH):
+        """\
+        Vertices with the degree 0 are not part of the degree index. If
+        `min` is 0, all vertices of the graph are read.
+        """
+        key = self._degree_key(direction)
+        res = set(self._conn.zrangebyscore(key, min if min > 1 else 1,
+                                           '+inf' if max is None else max))
+        if min <= 0 and (max is None or max >= 0):
+            res.update(self._conn.smembers(self._v_key) - set(self._conn.zrange(key, 0, -1)))
+        return res
+
+    def degree_histogram(self, direction=consts.DIRECTION_BOTH):
+        pipe = self._conn.pipeline(transaction=False)
+        pipe.hgetall(u'%s:hist' % self._degree_key(direction)) \
+            .scard(self._v_key)
+        hist, count = pipe.execute()
+        histogram = dict((int(degree), int(n)) for degree, n in hist.iteritems() if int(n) > 0)
+        zero = count - sum(histogram.itervalues())
+        if zero > 0:
+            histogram[0] = zero
+        return histogram
+
+    def _degree_key(self, direction):
+        """\
+        Returns the key of the sorted set of the degree index for the
+        `direction`.
+        """
+        return self._degree_keys[(consts.DIRECTION_IN, consts.DIRECTION_OUT,
+                                  consts.DIRECTION_BOTH).index(direction)]
+
     def kind(self, identifier):
         return _kind(identifier)
 
@@ -179,7 +1283,57 @@ class RedisImmutableGraph(BaseImmutableGraph):
         return self._conn.smembers(self._v_key)
 
     def edges(self):
-        return self._conn.smembers(self._e_key)
+        return _edge_ids(self._conn.smembers(self._e_key))
+
+    def iter_vertices(self):
+        return self._scan_union([self._v_key])
+
+    def iter_edges(self):
+        return imap(_edge_id, self._scan_union([self._e_key]))
+
+    def __contains__(self, identifier):
+        key, member = self._membership(identifier)
+        return key is not None and self._conn.sismember(key, member)
+
+    def contains_many(self, identifiers):
+        """\
+        Sends the ``SISMEMBER`` commands in pipelines of ``_BATCH_SIZE``
+        commands.
+        """
+        res = []
+        for chunk in _chunks(identifiers, _BATCH_SIZE):
+            pipe = self._conn.pipeline(transaction=False)
+            known = []
+            for ident in chunk:
+                key, member = self._membership(ident)
+                known.append(key is not None)
+                if key is not None:
+                    pipe.sismember(key, member)
+            found = iter(pipe.execute())
+            res.extend(bool(next(found)) if k else False for k in known)
+        return res
+
+    def _membership(self, identifier):
+        """\
+        Returns the key of the set which would contain the `identifier` and
+        the set member which represents it. The key is ``None`` if the
+        `identifier` is neither a vertex nor an edge identifier.
+        """
+        kind = _kind(identifier)
+        if kind == consts.KIND_EDGE:
+            return self._e_key, _edge_member(identifier)
+        if kind in (consts.KIND_VERTEX, consts.KIND_LITERAL):
+            return self._v_key, identifier
+        return None, None
+
+    def __len__(self):
+        return self._conn.scard(self._v_key)
+
+    def vertex_count(self):
+        return self._conn.scard(self._v_key)
+
+    def edge_count(self):
+        return self._conn.scard(self._e_key)
 
     def __eq__(self, other):
         return self._identifier == other.identifier
@@ -195,124 +1349,1334 @@ class RedisGraph(RedisImmutableGraph, BaseGraph):
     """
     implements(IGraph)
 
-    def __init__(self, connection, identifier):
-        super(RedisGraph, self).__init__(connection, identifier)
+    def __init__(self, connection, identifier, scripting=True, id_lease=None,
+                 scan_count=None, cache=None, literal_cache=None, unlink=False):
+        super(RedisGraph, self).__init__(connection, identifier, scripting, id_lease,
+                                         scan_count, cache, literal_cache, unlink)
 
     def create_vertex(self, value=None, datatype=None):
+        pipe = self._conn.pipeline()
+        ident = self._add_vertex(pipe, value, datatype)
+        pipe.execute()
+        return ident
+
+    def create_vertices(self, vertices, batch_size=_BATCH_SIZE):
+        """\
+        Creates the vertices in chunks of `batch_size` vertices. Each chunk
+        is sent as one pipeline.
+        """
+        for chunk in _chunks(vertices, batch_size):
+            pipe = self._conn.pipeline(transaction=False)
+            idents = [self._add_vertex(pipe, value, datatype) for value, datatype in chunk]
+            pipe.execute()
+            for ident in idents:
+                yield ident
+
+    def _add_vertex(self, pipe, value, datatype):
+        """\
+        Queues the commands to create a vertex into `pipe` and returns the
+        identifier of the vertex.
+
+        A new vertex does not change the results of any cached read
+        operation, so the epoch is kept.
+        """
         if value:
-            return self._create_literal_vertex(value, datatype or XSD.string)
-        ident = 'v:%s' % _create_id(self._conn)
-        self._conn.sadd(self._v_key, ident)
+            datatype = datatype or XSD.string
+            glid = _literalid(canonicalize(value, datatype), datatype)
+            lid = glid + u':%s' % self._identifier
+            # The reference must exist before the value, otherwise the
+            # sweeper may remove the value
+            pipe.sadd(_refs_key(glid), self._identifier) \
+                .setnx(glid, value) \
+                .sadd(self._v_key, lid)
+            return lid
+        ident = 'v:%s' % self._create_id()
+        pipe.sadd(self._v_key, ident)
         return ident
 
-    def _create_literal_vertex(self, value, datatype):
-        glid = _literalid(canonicalize(value, datatype), datatype)
-        lid = glid + u':%s' % self._identifier
-        pipe = self._conn.pipeline()
-        pipe.setnx(glid, value)\
-            .sadd(self._v_key, lid)\
-            .execute()
-        return lid
+    def create_edge(self, head, *tail, **kwargs):
+        """\
+        If `unique` is ``True``, the lookup and the creation of the edge
+        are atomic if scripting is enabled.
+        """
+        args = self._edge_args(head, tail)
+        keys = (self._e_key, self._epoch_key, self._cards_key) + self._index_keys + (self._comp_key,)
+        if kwargs.get('unique'):
+            edge = _CREATE_UNIQUE_EDGE(self._conn, keys, (_signature(head, tail),) + args,
+                                       self._scripting)
+        else:
+            edge = _CREATE_EDGE(self._conn, keys, args, self._scripting)
+        self._modified()
+        return edge
+
+    def create_edges(self, edges, unique=False, batch_size=_BATCH_SIZE):
+        """\
+        Creates the edges in chunks of `batch_size` edges. Each chunk is
+        sent as one pipeline.
 
-    def create_edge(self, head, *tail):
+        Without scripting, unique edges are created one by one.
+        """
+        keys = (self._e_key, self._epoch_key, self._cards_key) + self._index_keys + (self._comp_key,)
+        scripting = self._scripting
+        if unique and not scripting:
+            for edge in edges:
+                yield self.create_edge(*edge, unique=True)
+            return
+        script = _CREATE_UNIQUE_EDGE if unique else _CREATE_EDGE
+        if scripting:
+            script.load(self._conn)
+        for chunk in _chunks(edges, batch_size):
+            args = [self._edge_args(edge[0], tuple(edge[1:])) for edge in imap(tuple, chunk)]
+            if unique:
+                args = [(_signature(a[1], a[2:]),) + a for a in args]
+            pipe = self._conn.pipeline(transaction=False)
+            for a in args:
+                script.queue(pipe, keys, a, scripting)
+            res = pipe.execute()
+            if not scripting:
+                _sync_degrees(self._conn, self._degree_keys,
+                              chain.from_iterable(a[1:] for a in args))
+                _index_signatures(self._conn, self._sig_key, [a[0] for a in args], True)
+                for a in args:
+                    _union_components(self._conn, self._comp_key, a[1:])
+            self._modified()
+            for edge in (res if unique else (a[0] for a in args)):
+                yield edge
+
+    def _edge_args(self, head, tail):
+        """\
+        Validates the `head` and `tail` and returns the arguments for
+        the ``_CREATE_EDGE`` script.
+        """
         _assert_vertex(head)
-        d = {head: 0}
         for i in tail:
             if not i:
                 raise TypeError('Illegal vertex/edge: %r' % i)
-            d[i] = 1
-        edge = u'e:' + _create_id(self._conn)
-        pipe = self._conn.pipeline()
-        pipe.zadd(edge, **d)
-        set_add = pipe.sadd
-        set_add('%s:oe' % head, edge)
-        for i in tail:
-            set_add('%s:ie' % i, edge)
-        set_add(self._e_key, edge)
-        pipe.execute()
-        return edge
+        return (u'e:' + self._create_id(), head) + tail
 
     def add_tail(self, edge, *identifiers):
-        d = {}
+        _assert_edge(edge)
         for i in identifiers:
             if not i:
                 raise TypeError('Illegal vertex/edge: %r' % i)
-            d[i] = 1
-        self._conn.zadd(edge, **d)
+        return self._change_tail(edge, 1, identifiers)
 
     def remove_tail(self, edge, *identifiers):
+        _assert_edge(edge)
         if self.head(edge) in identifiers:
             raise ValueError("The edge's head isn't removable")
-        self._conn.zrem(edge, *identifiers)
+        return self._change_tail(edge, 0, identifiers)
+
+    def _change_tail(self, edge, add, identifiers):
+        """\
+        Adds the `identifiers` to the tail of the `edge` or removes them.
+        The edge is checked before any modification.
+        """
+        res = _CHANGE_TAIL(self._conn, (self._epoch_key, self._cards_key) + self._index_keys,
+                           (edge, add) + identifiers, self._scripting)
+        if res == _CHANGE_TAIL_UNKNOWN_EDGE:
+            raise TypeError('Unknown edge: %r' % edge)
+        if res == _CHANGE_TAIL_EMPTY:
+            raise ValueError('The tail of the edge must not become empty')
+        self._modified()
+        return edge
 
     def delete_vertex(self, vertex):
         _assert_vertex(vertex)
-        outgoing, ingoing = '%s:oe' % vertex, '%s:ie' % vertex
-        edges = tuple(self._conn.sunion(ingoing, outgoing))
-        for edge in edges:
-            self.delete_edge(edge)
-        pipe = self._conn.pipeline()
-        pipe.delete(vertex, ingoing, outgoing, *edges) \
-            .srem(self._v_key, vertex) \
-            .execute()
+        keys = [self._v_key, self._e_key, self._epoch_key, self._cards_key]
+        keys.extend(self._index_keys)
+        if _kind(vertex) == consts.KIND_LITERAL:
+            keys.append(_refs_key(vertex[:vertex.rfind(':')]))
+        _DELETE_VERTEX(self._conn, keys, (vertex, self._identifier), self._scripting)
+        self._modified()
 
     def delete_edge(self, edge):
         _assert_edge(edge)
-        targets = self.edge_incidents(edge)
-        if not targets:
-            return
-        pipe = self._conn.pipeline()
-        set_remove = pipe.srem
-        set_remove(self._e_key, edge)
-        set_remove('%s:oe' % targets[0], edge)
-        for t in targets[1:]:
-            set_remove('%s:ie' % t, edge)
-        pipe.delete(edge) \
-            .execute()
+        _DELETE_EDGE(self._conn, (self._e_key, self._epoch_key, self._cards_key) + self._index_keys,
+                     (edge,), self._scripting)
+        self._modified()
 
     def merge_vertices(self, a, b):
         if a == b:
             return a
+        _assert_vertex(a)
+        _assert_vertex(b)
         a_lit, b_lit = self.is_literal(a), self.is_literal(b)
         if a_lit and b_lit:
             raise TypeError('Cannot merge two literal vertices')
         if b_lit:
             a, b = b, a
-        k_ie_a, k_oe_a, k_ie_b, k_oe_b = '%s:ie' % a, '%s:oe' % a, '%s:ie' % b, '%s:oe' % b
-        pipe = self._conn.pipeline()
-        pipe.sinter(k_oe_a, k_ie_b) \
-            .sinter(k_oe_b, k_ie_a)
-        common_edges = set.union(*pipe.execute())
-        pipe = self._conn.pipeline()
-        if common_edges:
-            pipe.srem(k_oe_a, *common_edges) \
-                .srem(k_ie_a, *common_edges) \
-                .srem(self._e_key, *common_edges) \
-                .delete(*common_edges)
-        ingoing = self.ingoing_edges(b) - common_edges
-        outgoing = self.outgoing_edges(b) - common_edges
-        if ingoing:
-            pipe.sadd(k_ie_a, *ingoing)
-            for e in ingoing:
-                pipe.zrem(e, b).zadd(e, a, 1)
-        if outgoing:
-            pipe.sadd(k_oe_a, *outgoing)
-            for e in outgoing:
-                pipe.zrem(e, b).zadd(e, a, 0)
-        pipe.srem(self._v_key, b) \
-            .delete(b, k_ie_b, k_oe_b) \
-            .execute()
+        _MERGE_VERTICES(self._conn,
+                        (self._v_key, self._e_key, self._epoch_key, self._cards_key)
+                        + self._index_keys + (self._comp_key,),
+                        (a, b), self._scripting)
+        self._modified()
         return a
 
-    def clear(self):
+    def create_signature_index(self, batch_size=_BATCH_SIZE):
+        """\
+        Enables the signature index of the edges and adds the existing
+        edges in chunks of `batch_size` edges.
+
+        The signature index maps the head and the tail of an edge to the
+        edge and makes `find_edge`, ``create_edge(..., unique=True)`` and
+        `duplicate_edges` independent of the number of edges. Other
+        clients should not modify the graph while the index is built.
+        """
         conn = self._conn
-        elements = [self._v_key, self._e_key]
-        add = elements.append
-        for e in conn.sunion(self._v_key, self._e_key):
-            add(e)
-            add('%s:oe' % e)
-            add('%s:ie' % e)
-        self._conn.delete(*elements)
+        conn.setnx(u'%s:on' % self._sig_key, 1)
+        for chunk in _chunks(self._scan(self._e_key), batch_size):
+            _index_signatures(conn, self._sig_key, list(_edge_ids(chunk)), True)
+
+    def drop_signature_index(self):
+        """\
+        Disables the signature index of the edges and removes it.
+        """
+        pipe = self._conn.pipeline()
+        _queue_delete(pipe, (u'%s:on' % self._sig_key, self._sig_key, u'%s:dups' % self._sig_key),
+                      self._unlink)
+        pipe.execute()
+
+    def create_component_index(self, batch_size=_BATCH_SIZE):
+        """\
+        Enables the component index and adds the weakly connected
+        components of the graph which are computed by
+        `nodo.algorithms.components.connected_components()` with chunks of
+        `batch_size` edges.
+
+        The component index maps each vertex to its component, so
+        `component()` needs constant time. ``create_edge`` and
+        `merge_vertices` merge the components of the involved vertices.
+        Removing vertices or edges does not split components, call this
+        method again to recompute the components. Other clients should not
+        modify the graph while the index is built.
+        """
+        conn = self._conn
+        self._delete_components(batch_size)
+        conn.setnx(u'%s:on' % self._comp_key, 1)
+        for members in connected_components(self, batch_size).components():
+            if len(members) < 2:
+                continue
+            cid = min(members)
+            key = u'%s:%s' % (self._comp_key, cid)
+            for chunk in _chunks(list(members), batch_size):
+                pipe = conn.pipeline(transaction=False)
+                for ident in chunk:
+                    pipe.hset(self._comp_key, ident, cid)
+                pipe.sadd(key, *chunk) \
+                    .execute()
+
+    def drop_component_index(self):
+        """\
+        Disables the component index and removes it.
+        """
+        self._conn.delete(u'%s:on' % self._comp_key)
+        self._delete_components()
+
+    def _delete_components(self, batch_size=_BATCH_SIZE):
+        """\
+        Removes the entries of the component index. The hash is read with
+        ``HSCAN`` in chunks of `batch_size` entries.
+        """
+        conn = self._conn
+        if not conn.exists(self._comp_key):
+            return
+        for chunk in _chunks(conn.hscan_iter(self._comp_key, count=batch_size), batch_size):
+            keys = set(u'%s:%s' % (self._comp_key, cid) for ident, cid in chunk)
+            pipe = conn.pipeline(transaction=False)
+            _queue_delete(pipe, tuple(keys), self._unlink)
+            pipe.execute()
+        pipe = conn.pipeline(transaction=False)
+        _queue_delete(pipe, (self._comp_key,), self._unlink)
+        pipe.execute()
+
+    def clear(self, batch_size=_BATCH_SIZE, progress=None):
+        """\
+        Removes the vertices and edges in chunks of `batch_size` elements
+        which are fetched with ``SSCAN``. The keys are removed with
+        ``UNLINK`` if the server supports it.
+
+        The graph is not cleared atomically, readers may see a partially
+        cleared graph.
+
+        `progress`
+            An optional callable which is called after each chunk with the
+            number of removed elements and the number of elements of the
+            graph before it was cleared.
+        """
+        conn = self._conn
+        pipe = conn.pipeline(transaction=False)
+        pipe.scard(self._v_key) \
+            .scard(self._e_key)
+        total = sum(pipe.execute())
+        done = 0
+        for key, to_id in ((self._v_key, None), (self._e_key, _edge_id)):
+            for chunk in _chunks(self._scan(key), batch_size):
+                keys = []
+                pipe = conn.pipeline(transaction=False)
+                for e in (imap(to_id, chunk) if to_id else chunk):
+                    keys.extend((e, '%s:oe' % e, '%s:ie' % e))
+                    if _kind(e) == consts.KIND_LITERAL:
+                        pipe.srem(_refs_key(e[:e.rfind(':')]), self._identifier)
+                _queue_delete(pipe, keys, self._unlink)
+                pipe.srem(key, *chunk) \
+                    .incr(self._epoch_key) \
+                    .execute()
+                self._modified()
+                # SSCAN may return an element more than once
+                done = min(done + len(chunk), total)
+                if progress:
+                    progress(done, total)
+        keys = [self._v_key, self._e_key, self._cards_key]
+        keys.extend(u'%s:%s' % (self._cards_key, card) for card in conn.hgetall(self._cards_key))
+        for key in self._degree_keys:
+            keys.extend((key, u'%s:hist' % key))
+        keys.extend((self._sig_key, u'%s:dups' % self._sig_key))
+        pipe = conn.pipeline(transaction=False)
+        _queue_delete(pipe, keys, self._unlink)
+        pipe.incr(self._epoch_key) \
+            .execute()
+        self._delete_components(batch_size)
+        self._modified()
+
+    def _modified(self):
+        """\
+        Invalidates the local cache after a modification.
+
+        Other clients notice the modification by the incremented epoch.
+        """
+        if self._cache is not None:
+            self._cache.modified()
+
+
+# Removes an edge and its references from the adjacency sets. The edges
+# which contain the edge in their tail are removed as well.
+# The head of an edge has the score 0, the members of the tail have the
+# score 1. A loop is represented by a head with the score 1.
+# Sets which contain only edges store the number of the edge identifier.
+_LUA_UNLINK_EDGE = """\
+local function unlink_edge(edges_key, cards_key, edge)
+    local pending, count = {edge}, 0
+    while #pending > 0 do
+        edge = table.remove(pending)
+        local members = redis.call('ZRANGE', edge, 0, -1, 'WITHSCORES')
+        if #members > 0 then
+            local head = edge_head(edge, members)
+            index_signature(edge, false)
+            local member = string.sub(edge, 3)
+            if head then
+                link(head, 'oe', member, false)
+            end
+            for i = 1, #members, 2 do
+                if members[i + 1] == '1' then
+                    link(members[i], 'ie', member, false)
+                end
+            end
+            move_card(cards_key, member, #members / 2, 0)
+            redis.call('SREM', edges_key, member)
+            -- The edges which contain this edge are removed as well
+            for _, m in ipairs(redis.call('SMEMBERS', edge .. ':ie')) do
+                pending[#pending + 1] = 'e:' .. m
+            end
+            redis.call('DEL', edge, edge .. ':ie')
+            count = count + 1
+        end
+    end
+    return count
+end
+"""
+
+# Moves an edge within the cardinality index which consists of a hash
+# (cardinality -> number of edges) and a set of edges per cardinality.
+# The cardinality 0 indicates that the edge does not exist.
+_LUA_MOVE_CARD = """\
+local function move_card(cards_key, member, old, new)
+    if old == new then
+        return
+    end
+    if old > 0 then
+        redis.call('HINCRBY', cards_key, old, -1)
+        redis.call('SREM', cards_key .. ':' .. old, member)
+    end
+    if new > 0 then
+        redis.call('HINCRBY', cards_key, new, 1)
+        redis.call('SADD', cards_key .. ':' .. new, member)
+    end
+end
+"""
+
+# Adds an edge to (or removes it from) an adjacency set and maintains the
+# degree index. The degree index consists of a sorted set per direction
+# (vertex -> degree) and a hash per sorted set (degree -> number of
+# vertices). Vertices with the degree 0 are not kept in the sorted sets.
+# Each script sets the keys of the sorted sets before it calls `link`.
+_LUA_LINK = """\
+local degree_keys
+local function change_degree(key, ident, amount)
+    local degree = tonumber(redis.call('ZINCRBY', key, amount, ident))
+    local old = degree - amount
+    if old > 0 then
+        redis.call('HINCRBY', key .. ':hist', old, -1)
+    end
+    if degree > 0 then
+        redis.call('HINCRBY', key .. ':hist', degree, 1)
+    else
+        redis.call('ZREM', key, ident)
+    end
+end
+local function link(ident, direction, member, add)
+    local changed
+    if add then
+        changed = redis.call('SADD', ident .. ':' .. direction, member)
+    else
+        changed = redis.call('SREM', ident .. ':' .. direction, member)
+    end
+    -- Only vertices are part of the degree index
+    if changed == 1 and string.sub(ident, 1, 2) ~= 'e:' then
+        local amount = add and 1 or -1
+        change_degree(degree_keys[direction], ident, amount)
+        change_degree(degree_keys.total, ident, amount)
+    end
+end
+"""
+
+# Maintains the optional signature index of the edges. The sorted set
+# contains "<digest>:<edge number>" entries with the score 0, the digest is
+# the SHA-1 of the head and the sorted tail. The set "<key>:dups" contains
+# the digests of duplicate edges. The index is maintained if the key
+# "<key>:on" exists. Each script calls `init_signatures` before it calls
+# `index_signature`.
+_LUA_SIGNATURE = """\
+local signatures
+local function init_signatures(key)
+    if redis.call('EXISTS', key .. ':on') == 1 then
+        signatures = key
+    end
+end
+local function edge_head(edge, members)
+    if members[2] == '0' then
+        return members[1]
+    end
+    -- The head of a loop is part of the tail
+    local member = string.sub(edge, 3)
+    for i = 1, #members, 2 do
+        if redis.call('SISMEMBER', members[i] .. ':oe', member) == 1 then
+            return members[i]
+        end
+    end
+    return nil
+end
+local function signature(edge)
+    local members = redis.call('ZRANGE', edge, 0, -1, 'WITHSCORES')
+    if #members == 0 then
+        return nil
+    end
+    local tail = {}
+    for i = 1, #members, 2 do
+        if members[i + 1] == '1' then
+            tail[#tail + 1] = members[i]
+        end
+    end
+    local head = edge_head(edge, members)
+    return redis.sha1hex((head or '') .. '\\n' .. table.concat(tail, '\\n'))
+end
+local function index_signature(edge, add)
+    if not signatures then
+        return
+    end
+    local digest = signature(edge)
+    if not digest then
+        return
+    end
+    local entry = digest .. ':' .. string.sub(edge, 3)
+    if add then
+        redis.call('ZADD', signatures, 0, entry)
+    else
+        redis.call('ZREM', signatures, entry)
+    end
+    if redis.call('ZLEXCOUNT', signatures, '[' .. digest .. ':', '(' .. digest .. ';') > 1 then
+        redis.call('SADD', signatures .. ':dups', digest)
+    else
+        redis.call('SREM', signatures .. ':dups', digest)
+    end
+end
+"""
+
+# Maintains the optional component index of the vertices. The hash maps
+# the vertices of components with more than one vertex to the component
+# identifier, the set "<key>:<component>" contains the vertices of a
+# component. The identifier of a component is one of its (current or
+# former) vertices, a vertex which is not part of the hash is a component
+# on its own. An edge belongs to the component of its incidents. The index
+# is maintained if the key "<key>:on" exists. Each script calls
+# `init_components` before it calls `union_components`.
+_LUA_COMPONENTS = """\
+local components
+local function init_components(key)
+    if redis.call('EXISTS', key .. ':on') == 1 then
+        components = key
+    end
+end
+local function component(ident)
+    while string.sub(ident, 1, 2) == 'e:' do
+        ident = redis.call('ZRANGE', ident, 0, 0)[1]
+        if not ident then
+            return nil
+        end
+    end
+    return redis.call('HGET', components, ident) or ident
+end
+-- Merges the components of args[first], args[first + 1], ...
+local function union_components(args, first)
+    if not components then
+        return
+    end
+    local cids, seen, target, size = {}, {}, nil, 0
+    for i = first, #args do
+        local cid = component(args[i])
+        if cid and not seen[cid] then
+            seen[cid] = true
+            cids[#cids + 1] = cid
+            local n = math.max(redis.call('SCARD', components .. ':' .. cid), 1)
+            if n > size then
+                target, size = cid, n
+            end
+        end
+    end
+    if #cids < 2 then
+        return
+    end
+    local key = components .. ':' .. target
+    if size == 1 then
+        redis.call('HSET', components, target, target)
+        redis.call('SADD', key, target)
+    end
+    for _, cid in ipairs(cids) do
+        if cid ~= target then
+            local members = redis.call('SMEMBERS', components .. ':' .. cid)
+            if #members == 0 then
+                members = {cid}
+            end
+            for _, ident in ipairs(members) do
+                redis.call('HSET', components, ident, target)
+                redis.call('SADD', key, ident)
+            end
+            redis.call('DEL', components .. ':' .. cid)
+        end
+    end
+end
+local function forget_component(ident)
+    if not components then
+        return
+    end
+    local cid = redis.call('HGET', components, ident)
+    if cid then
+        redis.call('HDEL', components, ident)
+        redis.call('SREM', components .. ':' .. cid, ident)
+    end
+end
+"""
+
+_LUA_CREATE_EDGE_BODY = """\
+local edge, head = ARGV[1], ARGV[2]
+local member = string.sub(edge, 3)
+redis.call('ZADD', edge, 0, head)
+link(head, 'oe', member, true)
+for i = 3, #ARGV do
+    redis.call('ZADD', edge, 1, ARGV[i])
+    link(ARGV[i], 'ie', member, true)
+end
+index_signature(edge, true)
+union_components(ARGV, 2)
+move_card(KEYS[3], member, 0, redis.call('ZCARD', edge))
+redis.call('SADD', KEYS[1], member)
+redis.call('INCR', KEYS[2])
+return edge
+"""
+
+_LUA_CREATE_EDGE = _LUA_MOVE_CARD + _LUA_LINK + _LUA_SIGNATURE + _LUA_COMPONENTS + """\
+degree_keys = {ie = KEYS[4], oe = KEYS[5], total = KEYS[6]}
+init_signatures(KEYS[7])
+init_components(KEYS[8])
+""" + _LUA_CREATE_EDGE_BODY
+
+# Returns an existing edge with the same head and tail or creates the edge.
+# ARGV[1] is the signature digest of the edge, the remaining arguments are
+# the arguments of _LUA_CREATE_EDGE.
+_LUA_CREATE_UNIQUE_EDGE = _LUA_MOVE_CARD + _LUA_LINK + _LUA_SIGNATURE + _LUA_COMPONENTS + """\
+degree_keys = {ie = KEYS[4], oe = KEYS[5], total = KEYS[6]}
+init_signatures(KEYS[7])
+init_components(KEYS[8])
+local digest = table.remove(ARGV, 1)
+if signatures then
+    local found = redis.call('ZRANGEBYLEX', signatures, '[' .. digest .. ':', '(' .. digest .. ';', 'LIMIT', 0, 1)
+    if #found > 0 then
+        return 'e:' .. string.sub(found[1], #digest + 2)
+    end
+else
+    local head, keys, tail, card = ARGV[2], {ARGV[2] .. ':oe'}, {}, 1
+    for i = 3, #ARGV do
+        if not tail[ARGV[i]] then
+            tail[ARGV[i]] = true
+            keys[#keys + 1] = ARGV[i] .. ':ie'
+            if ARGV[i] ~= head then
+                card = card + 1
+            end
+        end
+    end
+    local score = tail[head] and '1' or '0'
+    for _, member in ipairs(redis.call('SINTER', unpack(keys))) do
+        local edge = 'e:' .. member
+        if redis.call('ZCARD', edge) == card and redis.call('ZSCORE', edge, head) == score then
+            return edge
+        end
+    end
+end
+""" + _LUA_CREATE_EDGE_BODY
+
+_LUA_CHANGE_TAIL = _LUA_MOVE_CARD + _LUA_LINK + _LUA_SIGNATURE + """\
+degree_keys = {ie = KEYS[3], oe = KEYS[4], total = KEYS[5]}
+init_signatures(KEYS[6])
+local edge, add = ARGV[1], ARGV[2] == '1'
+local member = string.sub(edge, 3)
+local card = redis.call('ZCARD', edge)
+if card == 0 then
+    return 0
+end
+if not add then
+    local removed, remaining = {}, 0
+    for i = 3, #ARGV do
+        removed[ARGV[i]] = true
+    end
+    for _, ident in ipairs(redis.call('ZRANGEBYSCORE', edge, 1, 1)) do
+        if not removed[ident] then
+            remaining = remaining + 1
+        end
+    end
+    if remaining == 0 then
+        return -1
+    end
+end
+index_signature(edge, false)
+for i = 3, #ARGV do
+    if add then
+        redis.call('ZADD', edge, 1, ARGV[i])
+        link(ARGV[i], 'ie', member, true)
+    else
+        redis.call('ZREM', edge, ARGV[i])
+        link(ARGV[i], 'ie', member, false)
+    end
+end
+move_card(KEYS[2], member, card, redis.call('ZCARD', edge))
+index_signature(edge, true)
+redis.call('INCR', KEYS[1])
+return 1
+"""
+
+_LUA_DELETE_EDGE = _LUA_MOVE_CARD + _LUA_LINK + _LUA_SIGNATURE + _LUA_UNLINK_EDGE + """\
+degree_keys = {ie = KEYS[4], oe = KEYS[5], total = KEYS[6]}
+init_signatures(KEYS[7])
+redis.call('INCR', KEYS[2])
+return unlink_edge(KEYS[1], KEYS[3], ARGV[1])
+"""
+
+_LUA_DELETE_VERTEX = _LUA_MOVE_CARD + _LUA_LINK + _LUA_SIGNATURE + _LUA_UNLINK_EDGE + """\
+degree_keys = {ie = KEYS[5], oe = KEYS[6], total = KEYS[7]}
+init_signatures(KEYS[8])
+local vertex = ARGV[1]
+local ingoing, outgoing = vertex .. ':ie', vertex .. ':oe'
+local edges = redis.call('SUNION', ingoing, outgoing)
+for _, member in ipairs(edges) do
+    unlink_edge(KEYS[2], KEYS[4], 'e:' .. member)
+end
+redis.call('DEL', ingoing, outgoing)
+redis.call('SREM', KEYS[1], vertex)
+-- The references of a literal
+if KEYS[9] then
+    redis.call('SREM', KEYS[9], ARGV[2])
+end
+redis.call('INCR', KEYS[3])
+return #edges
+"""
+
+_LUA_MERGE_VERTICES = _LUA_MOVE_CARD + _LUA_LINK + _LUA_SIGNATURE + _LUA_UNLINK_EDGE \
+                      + _LUA_COMPONENTS + """\
+degree_keys = {ie = KEYS[5], oe = KEYS[6], total = KEYS[7]}
+init_signatures(KEYS[8])
+init_components(KEYS[9])
+local a, b = ARGV[1], ARGV[2]
+union_components(ARGV, 1)
+forget_component(b)
+local ie_a, oe_a, ie_b, oe_b = a .. ':ie', a .. ':oe', b .. ':ie', b .. ':oe'
+-- The edges between a and b are removed
+local common = {}
+for _, members in ipairs({redis.call('SINTER', oe_a, ie_b), redis.call('SINTER', oe_b, ie_a)}) do
+    for _, member in ipairs(members) do
+        if not common[member] then
+            common[member] = true
+            unlink_edge(KEYS[2], KEYS[4], 'e:' .. member)
+        end
+    end
+end
+local function remaining(key)
+    local res = {}
+    for _, member in ipairs(redis.call('SMEMBERS', key)) do
+        if not common[member] then
+            res[#res + 1] = member
+        end
+    end
+    return res
+end
+local ingoing, outgoing = remaining(ie_b), remaining(oe_b)
+local changed = remaining(ie_b)
+for _, member in ipairs(redis.call('SDIFF', oe_b, ie_b)) do
+    if not common[member] then
+        changed[#changed + 1] = member
+    end
+end
+for _, member in ipairs(changed) do
+    index_signature('e:' .. member, false)
+end
+for _, member in ipairs(ingoing) do
+    local edge = 'e:' .. member
+    local card = redis.call('ZCARD', edge)
+    redis.call('ZREM', edge, b)
+    redis.call('ZADD', edge, 1, a)
+    link(a, 'ie', member, true)
+    link(b, 'ie', member, false)
+    move_card(KEYS[4], member, card, redis.call('ZCARD', edge))
+end
+for _, member in ipairs(outgoing) do
+    local edge = 'e:' .. member
+    local card = redis.call('ZCARD', edge)
+    redis.call('ZREM', edge, b)
+    -- Keep the score of a loop
+    if not redis.call('ZSCORE', edge, a) then
+        redis.call('ZADD', edge, 0, a)
+    end
+    link(a, 'oe', member, true)
+    link(b, 'oe', member, false)
+    move_card(KEYS[4], member, card, redis.call('ZCARD', edge))
+end
+for _, member in ipairs(changed) do
+    index_signature('e:' .. member, true)
+end
+redis.call('SREM', KEYS[1], b)
+redis.call('DEL', ie_b, oe_b)
+redis.call('INCR', KEYS[3])
+return a
+"""
+
+# Returns the members of the edges which contain all identifiers of ARGV.
+# The edges of the identifier with the fewest edges are the candidates.
+_LUA_EDGES_CONTAINING = """\
+local smallest, size
+for i = 1, #ARGV do
+    local n = redis.call('SCARD', ARGV[i] .. ':ie') + redis.call('SCARD', ARGV[i] .. ':oe')
+    if not size or n < size then
+        smallest, size = i, n
+    end
+end
+local res = {}
+if size == 0 then
+    return res
+end
+for _, member in ipairs(redis.call('SUNION', ARGV[smallest] .. ':ie', ARGV[smallest] .. ':oe')) do
+    local edge, found = 'e:' .. member, true
+    for i = 1, #ARGV do
+        if i ~= smallest and not redis.call('ZSCORE', edge, ARGV[i]) then
+            found = false
+            break
+        end
+    end
+    if found then
+        res[#res + 1] = member
+    end
+end
+return res
+"""
+
+# Removes the values of literals which are not referenced by any graph.
+# KEYS contains pairs of value keys and reference keys. Returns the number
+# of removed values and the number of reclaimed bytes.
+_LUA_SWEEP_LITERALS = """\
+local count, size = 0, 0
+for i = 1, #KEYS, 2 do
+    if redis.call('EXISTS', KEYS[i + 1]) == 0 then
+        local usage = redis.pcall('MEMORY', 'USAGE', KEYS[i])
+        -- Servers before Redis 4.0 don't know MEMORY
+        if type(usage) ~= 'number' then
+            usage = redis.call('STRLEN', KEYS[i]) + #KEYS[i]
+        end
+        if redis.call('DEL', KEYS[i]) == 1 then
+            count = count + 1
+            size = size + usage
+        end
+    end
+end
+return {count, size}
+"""
+
+
+def _unlink_edges(conn, edges_key, cards_key, index_keys, edges):
+    """\
+    Plain command variant of the ``unlink_edge`` Lua function which
+    removes all provided `edges` and the edges which contain them in
+    their tails.
+
+    `index_keys`
+        The keys of the degree index and the key of the signature index.
+    """
+    edges = list(edges)
+    seen, pending = set(edges), edges
+    while pending:
+        pipe = conn.pipeline()
+        for edge in pending:
+            pipe.smembers('%s:ie' % edge)
+        pending = [e for e in _edge_ids(set().union(*pipe.execute())) if e not in seen]
+        seen.update(pending)
+        edges.extend(pending)
+    _index_signatures(conn, index_keys[3], edges, False)
+    pipe = conn.pipeline()
+    for edge in edges:
+        pipe.zrange(edge, 0, -1, withscores=True)
+    members = pipe.execute()
+    heads = _edge_heads(conn, edges, members)
+    pipe = conn.pipeline()
+    for edge, head, incidents in zip(edges, heads, members):
+        if not incidents:
+            continue
+        member = _edge_member(edge)
+        if head is not None:
+            pipe.srem('%s:oe' % head, member)
+        for ident, score in incidents:
+            if score == 1:
+                pipe.srem('%s:ie' % ident, member)
+        _queue_move_card(pipe, cards_key, member, len(incidents), 0)
+        pipe.srem(edges_key, member)
+        pipe.delete(edge, '%s:ie' % edge)
+    pipe.execute()
+    _sync_degrees(conn, index_keys[:3],
+                  chain.from_iterable((i for i, score in incidents) for incidents in members))
+
+
+def _queue_move_card(pipe, cards_key, member, old, new):
+    """\
+    Plain command variant of the ``move_card`` Lua function.
+    """
+    if old == new:
+        return
+    if old > 0:
+        pipe.hincrby(cards_key, old, -1)
+        pipe.srem('%s:%d' % (cards_key, old), member)
+    if new > 0:
+        pipe.hincrby(cards_key, new, 1)
+        pipe.sadd('%s:%d' % (cards_key, new), member)
+
+
+def _sync_degrees(conn, degree_keys, idents):
+    """\
+    Plain command variant of the degree index maintenance of the ``link``
+    Lua function. Sets the degrees of the `idents` to the sizes of their
+    adjacency sets.
+
+    The updates are not atomic, concurrent modifications of the same
+    vertices may leave the histograms inaccurate.
+    """
+    idents = [i for i in set(idents) if _kind(i) != consts.KIND_EDGE]
+    if not idents:
+        return
+    in_key, out_key, key = degree_keys
+    pipe = conn.pipeline()
+    for ident in idents:
+        pipe.scard('%s:ie' % ident) \
+            .scard('%s:oe' % ident) \
+            .zscore(in_key, ident) \
+            .zscore(out_key, ident) \
+            .zscore(key, ident)
+    res = pipe.execute()
+    pipe = conn.pipeline()
+    for i, ident in enumerate(idents):
+        indegree, outdegree, old_in, old_out, old = res[i * 5:i * 5 + 5]
+        _queue_move_degree(pipe, in_key, ident, int(old_in or 0), indegree)
+        _queue_move_degree(pipe, out_key, ident, int(old_out or 0), outdegree)
+        _queue_move_degree(pipe, key, ident, int(old or 0), indegree + outdegree)
+    pipe.execute()
+
+
+def _queue_move_degree(pipe, key, ident, old, new):
+    """\
+    Plain command variant of the ``change_degree`` Lua function.
+    """
+    if old == new:
+        return
+    if old > 0:
+        pipe.hincrby('%s:hist' % key, old, -1)
+    if new > 0:
+        pipe.hincrby('%s:hist' % key, new, 1)
+        pipe.zadd(key, ident, new)
+    else:
+        pipe.zrem(key, ident)
+
+
+def _index_signatures(conn, sig_key, edges, add):
+    """\
+    Plain command variant of the ``index_signature`` Lua function which
+    adds all provided `edges` to the signature index or removes them.
+    """
+    if not edges or not conn.exists(u'%s:on' % sig_key):
+        return
+    entries = [(digest, _edge_member(edge))
+               for edge, digest in zip(edges, _edge_signatures(conn, edges)) if digest]
+    if not entries:
+        return
+    digests = list(set(digest for digest, member in entries))
+    pipe = conn.pipeline()
+    for digest, member in entries:
+        entry = u'%s:%s' % (digest, member)
+        if add:
+            pipe.zadd(sig_key, entry, 0)
+        else:
+            pipe.zrem(sig_key, entry)
+    for digest in digests:
+        pipe.zlexcount(sig_key, u'[%s:' % digest, u'(%s;' % digest)
+    counts = pipe.execute()[len(entries):]
+    pipe = conn.pipeline()
+    for digest, count in zip(digests, counts):
+        if count > 1:
+            pipe.sadd(u'%s:dups' % sig_key, digest)
+        else:
+            pipe.srem(u'%s:dups' % sig_key, digest)
+    pipe.execute()
+
+
+def _edge_signatures(conn, edges):
+    """\
+    Plain command variant of the ``signature`` Lua function. Returns the
+    signature digests of the `edges`, the digest of a non-existing edge
+    is ``None``.
+    """
+    pipe = conn.pipeline()
+    for edge in edges:
+        pipe.zrange(edge, 0, -1, withscores=True)
+    res = pipe.execute()
+    return [_signature(head or u'', [i for i, score in incidents if score == 1]) if incidents else None
+            for head, incidents in zip(_edge_heads(conn, edges, res), res)]
+
+
+def _edge_heads(conn, edges, members):
+    """\
+    Plain command variant of the ``edge_head`` Lua function. Returns the
+    heads of the `edges`, `members` contains the ``ZRANGE ... WITHSCORES``
+    result of each edge. The head of a non-existing edge is ``None``.
+    """
+    heads, loops = [], []
+    for edge, incidents in zip(edges, members):
+        head = incidents[0][0] if incidents and incidents[0][1] == 0 else None
+        heads.append(head)
+        if incidents and head is None:
+            loops.extend((len(heads) - 1, ident, _edge_member(edge)) for ident, score in incidents)
+    if loops:
+        # The head of a loop is part of the tail
+        pipe = conn.pipeline()
+        for i, ident, member in loops:
+            pipe.sismember(u'%s:oe' % ident, member)
+        for (i, ident, member), is_head in zip(loops, pipe.execute()):
+            if is_head and heads[i] is None:
+                heads[i] = ident
+    return heads
+
+
+def _find_edge(conn, sig_key, head, tail):
+    """\
+    Returns an edge with the `head` and `tail` or ``None``. Uses the
+    signature index if it exists, otherwise the intersection of the
+    adjacency sets.
+    """
+    digest = _signature(head, tail)
+    enabled, found = conn.pipeline() \
+                        .exists(u'%s:on' % sig_key) \
+                        .zrangebylex(sig_key, u'[%s:' % digest, u'(%s;' % digest, 0, 1) \
+                        .execute()
+    if enabled:
+        return _edge_id(found[0][len(digest) + 1:]) if found else None
+    tail = set(tail)
+    candidates = tuple(conn.sinter([u'%s:oe' % head] + [u'%s:ie' % i for i in tail]))
+    if not candidates:
+        return None
+    pipe = conn.pipeline()
+    for edge in imap(_edge_id, candidates):
+        pipe.zcard(edge) \
+            .zscore(edge, head)
+    res = pipe.execute()
+    card, score = len(tail | set([head])), 1 if head in tail else 0
+    for member, c, s in zip(candidates, res[::2], res[1::2]):
+        if c == card and s == score:
+            return _edge_id(member)
+    return None
+
+
+def _create_edge(conn, keys, args):
+    pipe = conn.pipeline()
+    _queue_create_edge(pipe, keys, args)
+    pipe.execute()
+    _sync_degrees(conn, keys[3:6], args[1:])
+    _index_signatures(conn, keys[6], args[:1], True)
+    _union_components(conn, keys[7], args[1:])
+    return args[0]
+
+
+def _create_unique_edge(conn, keys, args):
+    edge = _find_edge(conn, keys[6], args[2], args[3:])
+    return edge or _create_edge(conn, keys, args[1:])
+
+
+def _queue_create_edge(pipe, keys, args):
+    """\
+    Queues the commands to create an edge into `pipe`. The degree index
+    has to be updated with `_sync_degrees`, the signature index with
+    `_index_signatures` and the component index with `_union_components`
+    after the pipeline was executed.
+    """
+    edges_key, epoch_key, cards_key = keys[:3]
+    edge, head, tail = args[0], args[1], args[2:]
+    member = _edge_member(edge)
+    d = {head: 0}
+    for i in tail:
+        d[i] = 1
+    pipe.zadd(edge, **d)
+    pipe.sadd('%s:oe' % head, member)
+    for i in tail:
+        pipe.sadd('%s:ie' % i, member)
+    _queue_move_card(pipe, cards_key, member, 0, len(d))
+    pipe.sadd(edges_key, member)
+    pipe.incr(epoch_key)
+
+
+def _change_tail(conn, keys, args):
+    epoch_key, cards_key = keys[:2]
+    edge, add, tail = args[0], args[1], args[2:]
+    member = _edge_member(edge)
+    card = conn.zcard(edge)
+    if not card:
+        return _CHANGE_TAIL_UNKNOWN_EDGE
+    if not add and not set(conn.zrangebyscore(edge, 1, 1)) - set(tail):
+        return _CHANGE_TAIL_EMPTY
+    _index_signatures(conn, keys[5], (edge,), False)
+    pipe = conn.pipeline()
+    if add:
+        pipe.zadd(edge, *chain.from_iterable((i, 1) for i in tail))
+        for i in tail:
+            pipe.sadd('%s:ie' % i, member)
+    else:
+        pipe.zrem(edge, *tail)
+        for i in tail:
+            pipe.srem('%s:ie' % i, member)
+    pipe.zcard(edge)
+    new_card = pipe.execute()[-1]
+    pipe = conn.pipeline()
+    _queue_move_card(pipe, cards_key, member, card, new_card)
+    pipe.incr(epoch_key) \
+        .execute()
+    _sync_degrees(conn, keys[2:5], tail)
+    _index_signatures(conn, keys[5], (edge,), True)
+    return 1
+
+
+def _delete_edge(conn, keys, args):
+    edges_key, epoch_key, cards_key = keys[:3]
+    _unlink_edges(conn, edges_key, cards_key, keys[3:7], args)
+    conn.incr(epoch_key)
+
+
+def _delete_vertex(conn, keys, args):
+    vertices_key, edges_key, epoch_key, cards_key = keys[:4]
+    vertex, graph = args
+    ingoing, outgoing = '%s:ie' % vertex, '%s:oe' % vertex
+    edges = tuple(_edge_ids(conn.sunion(ingoing, outgoing)))
+    if edges:
+        _unlink_edges(conn, edges_key, cards_key, keys[4:8], edges)
+    pipe = conn.pipeline()
+    pipe.delete(ingoing, outgoing) \
+        .srem(vertices_key, vertex)
+    if len(keys) > 8:
+        pipe.srem(keys[8], graph)
+    pipe.incr(epoch_key) \
+        .execute()
+    return len(edges)
+
+
+def _merge_vertices(conn, keys, args):
+    vertices_key, edges_key, epoch_key, cards_key = keys[:4]
+    index_keys = keys[4:8]
+    a, b = args
+    _union_components(conn, keys[8], args)
+    _forget_component(conn, keys[8], b)
+    k_ie_a, k_oe_a, k_ie_b, k_oe_b = '%s:ie' % a, '%s:oe' % a, '%s:ie' % b, '%s:oe' % b
+    pipe = conn.pipeline()
+    pipe.sinter(k_oe_a, k_ie_b) \
+        .sinter(k_oe_b, k_ie_a)
+    common = set.union(*pipe.execute())
+    if common:
+        _unlink_edges(conn, edges_key, cards_key, index_keys, tuple(_edge_ids(common)))
+    pipe = conn.pipeline()
+    pipe.smembers(k_ie_b) \
+        .smembers(k_oe_b) \
+        .sinter(k_ie_a, k_ie_b)
+    ingoing, outgoing, shrinking = [members - common for members in pipe.execute()]
+    changed = tuple(_edge_ids(ingoing | outgoing))
+    _index_signatures(conn, index_keys[3], changed, False)
+    # The edges which contain a and b in their tails lose a member
+    shrinking = tuple(shrinking)
+    pipe = conn.pipeline()
+    for member in shrinking:
+        pipe.zcard(_edge_id(member))
+    cards = pipe.execute() if shrinking else ()
+    pipe = conn.pipeline()
+    if ingoing:
+        pipe.sadd(k_ie_a, *ingoing)
+        for e in imap(_edge_id, ingoing):
+            pipe.zrem(e, b).zadd(e, a, 1)
+    if outgoing:
+        pipe.sadd(k_oe_a, *outgoing)
+        for member in outgoing:
+            e = _edge_id(member)
+            pipe.zrem(e, b)
+            # Keep the score of a loop
+            if member not in ingoing:
+                pipe.zadd(e, a, 0)
+    for member, card in zip(shrinking, cards):
+        _queue_move_card(pipe, cards_key, member, card, card - 1)
+    pipe.srem(vertices_key, b) \
+        .delete(k_ie_b, k_oe_b) \
+        .incr(epoch_key) \
+        .execute()
+    _sync_degrees(conn, index_keys[:3], (a, b))
+    _index_signatures(conn, index_keys[3], changed, True)
+    return a
+
+
+def _component_vertex(conn, ident):
+    """\
+    Returns a vertex of the component of the vertex or edge `ident` or
+    ``None`` if the edge does not exist. An edge belongs to the component
+    of its incidents.
+    """
+    while _kind(ident) == consts.KIND_EDGE:
+        incidents = conn.zrange(ident, 0, 0)
+        if not incidents:
+            return None
+        ident = incidents[0]
+    return ident
+
+
+def _union_components(conn, comp_key, idents):
+    """\
+    Plain command variant of the ``union_components`` Lua function which
+    merges the components of the `idents`.
+
+    The updates are not atomic, concurrent modifications may leave the
+    component index inaccurate.
+    """
+    if not conn.exists(u'%s:on' % comp_key):
+        return
+    vertices = set(_component_vertex(conn, ident) for ident in idents)
+    vertices.discard(None)
+    vertices = list(vertices)
+    pipe = conn.pipeline()
+    for v in vertices:
+        pipe.hget(comp_key, v)
+    cids = list(set(cid or v for v, cid in zip(vertices, pipe.execute())))
+    if len(cids) < 2:
+        return
+    pipe = conn.pipeline()
+    for cid in cids:
+        pipe.smembers(u'%s:%s' % (comp_key, cid))
+    members = [m or set([cid]) for cid, m in zip(cids, pipe.execute())]
+    target = max(range(len(cids)), key=lambda i: len(members[i]))
+    key = u'%s:%s' % (comp_key, cids[target])
+    pipe = conn.pipeline()
+    for i, cid in enumerate(cids):
+        if i == target and len(members[i]) > 1:
+            continue
+        for ident in members[i]:
+            pipe.hset(comp_key, ident, cids[target])
+        pipe.sadd(key, *members[i])
+        if i != target:
+            pipe.delete(u'%s:%s' % (comp_key, cid))
+    pipe.execute()
+
+
+def _forget_component(conn, comp_key, ident):
+    """\
+    Plain command variant of the ``forget_component`` Lua function.
+    """
+    if not conn.exists(u'%s:on' % comp_key):
+        return
+    cid = conn.hget(comp_key, ident)
+    if cid is not None:
+        conn.pipeline() \
+            .hdel(comp_key, ident) \
+            .srem(u'%s:%s' % (comp_key, cid), ident) \
+            .execute()
+
+
+def _edges_containing(conn, keys, args):
+    pipe = conn.pipeline()
+    for ident in args:
+        pipe.scard('%s:ie' % ident) \
+            .scard('%s:oe' % ident)
+    res = pipe.execute()
+    sizes = [i + o for i, o in zip(res[::2], res[1::2])]
+    smallest = args[sizes.index(min(sizes))]
+    candidates = tuple(conn.sunion('%s:ie' % smallest, '%s:oe' % smallest))
+    others = [ident for ident in args if ident != smallest]
+    if not candidates or not others:
+        return candidates
+    pipe = conn.pipeline()
+    for edge in imap(_edge_id, candidates):
+        for ident in others:
+            pipe.zscore(edge, ident)
+    scores = pipe.execute()
+    n = len(others)
+    return [member for i, member in enumerate(candidates)
+            if all(score is not None for score in scores[i * n:i * n + n])]
+
+
+def _sweep_literals(conn, keys, args):
+    pairs = zip(keys[::2], keys[1::2])
+    with conn.pipeline() as pipe:
+        try:
+            pipe.watch(*[refs for key, refs in pairs])
+            unreferenced = [key for key, refs in pairs if not pipe.exists(refs)]
+            sizes = [_memory_usage(pipe, key) for key in unreferenced]
+            pipe.multi()
+            for key in unreferenced:
+                pipe.delete(key)
+            deleted = pipe.execute()
+        except redis.WatchError:
+            # A literal was referenced meanwhile, the next sweep checks it again
+            return [0, 0]
+    return [sum(deleted), sum(size for size, d in zip(sizes, deleted) if d)]
+
+
+def _memory_usage(conn, key):
+    """\
+    Returns the number of bytes the string `key` occupies.
+    """
+    try:
+        return conn.execute_command('MEMORY', 'USAGE', key) or 0
+    except redis.exceptions.ResponseError:
+        # Servers before Redis 4.0 don't know MEMORY
+        return conn.strlen(key) + len(key)
+
+
+_CREATE_EDGE = _Script(_LUA_CREATE_EDGE, _create_edge, _queue_create_edge)
+_CREATE_UNIQUE_EDGE = _Script(_LUA_CREATE_UNIQUE_EDGE, _create_unique_edge)
+_CHANGE_TAIL = _Script(_LUA_CHANGE_TAIL, _change_tail)
+_DELETE_EDGE = _Script(_LUA_DELETE_EDGE, _delete_edge)
+_DELETE_VERTEX = _Script(_LUA_DELETE_VERTEX, _delete_vertex)
+_MERGE_VERTICES = _Script(_LUA_MERGE_VERTICES, _merge_vertices)
+_EDGES_CONTAINING = _Script(_LUA_EDGES_CONTAINING, _edges_containing)
+_SWEEP_LITERALS = _Script(_LUA_SWEEP_LITERALS, _sweep_literals)
+
+
+def _check_schema(conn):
+    """\
+    Raises a ValueError if the database does not use the current key
+    schema. An empty database is marked with the current schema version.
+    """
+    version, has_graphs = conn.pipeline() \
+                            .get(_KEY_SCHEMA) \
+                            .exists(_KEY_GRAPHS) \
+                            .execute()
+    if version is None and not has_graphs:
+        conn.setnx(_KEY_SCHEMA, _SCHEMA_VERSION)
+        return
+    version = int(version or 1)
+    if version < _SCHEMA_VERSION:
+        raise ValueError('The database uses the key schema version %d. '
+                         'Migrate it with "python -m nodo.store.redismigrate"' % version)
+    elif version > _SCHEMA_VERSION:
+        raise ValueError('Unsupported key schema version %d' % version)
+
+
+def _queue_delete(pipe, keys, unlink):
+    """\
+    Queues the removal of the `keys` into the pipeline `pipe`.
+    """
+    if unlink:
+        pipe.execute_command('UNLINK', *keys)
+    else:
+        pipe.delete(*keys)
+
+
+def _server_version(conn):
+    """\
+    Returns the version of the Redis server as tuple of integers.
+    """
+    version = str(conn.info().get('redis_version', '0'))
+    return tuple(int(i) for i in version.split('.') if i.isdigit())
+
+
+def _refs_key(glid):
+    """\
+    Returns the key of the set of graph identifiers which reference the
+    literal with the global literal identifier `glid`.
+    """
+    return _PREFIX_LITERAL_REFS + glid[2:]
+
+
+def _edge_member(edge):
+    """\
+    Returns the member which represents the `edge` in sets which contain
+    only edges.
+
+    The member is the number of the edge identifier, so small sets are
+    stored as compact intsets by the server.
+    """
+    return edge[2:]
+
+
+def _edge_id(member):
+    """\
+    Returns the edge identifier of a member of a set of edges.
+    """
+    return _PREFIX_EDGE + member
+
+
+def _edge_ids(members):
+    """\
+    Returns a set of edge identifiers from a set of edge members.
+    """
+    return set(_PREFIX_EDGE + member for member in members)
+
+
+def _in_lex_range(member, min, max):
+    """\
+    Returns if the `member` is within the ``ZRANGEBYLEX`` interval `min`
+    and `max`.
+    """
+    if min != u'-' and not (member >= min[1:] if min[0] == u'[' else member > min[1:]):
+        return False
+    return max == u'+' or (member <= max[1:] if max[0] == u'[' else member < max[1:])
+
+
+def _signature(head, tail):
+    """\
+    Returns the SHA-1 hex digest of the head and the sorted tail of an
+    edge.
+    """
+    sig = head + u'\n' + u'\n'.join(sorted(set(tail)))
+    return hashlib.sha1(sig.encode('utf-8')).hexdigest()
+
+
+def _tail(incidents):
+    """\
+    Returns the tail of an edge from the result of
+    ``ZRANGE edge 0 -1 WITHSCORES``.
+    """
+    return [ident for ident, score in incidents if score == 1]
 
 
 def _assert_edge(identifier):
@@ -333,10 +2697,6 @@ def _kind(identifier):
     return _PREFIX2KIND.get(identifier[:2], consts.KIND_UNKNOWN)
 
 
-def _create_id(redis_conn):
-    return str(redis_conn.incr(_KEY_CONSTRUCT_COUNTER))
-
-
 def _literalid(value, datatype):
     did = _datatype2id(datatype)
     vh = _valuehash(value)
@@ -352,4 +2712,8 @@ def _datatype2id(iri):
 
 
 def _valuehash(s):
-    return hashlib.sha1(str(s)).hexdigest()
+    """\
+    Returns the SHA-1 digest of `s` in URL-safe base64 encoding without
+    padding (27 characters).
+    """
+    return base64.urlsafe_b64encode(hashlib.sha1(str(s)).digest()).rstrip('=')
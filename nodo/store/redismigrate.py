@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+Migrates a Redis database from an older key schema version to the current
+version 5.
+
+Version 2 stores the numbers of edge identifiers in the sets which contain
+only edges (``<id>:ie``, ``<id>:oe``, ``g:<id>:edges``) and encodes the
+SHA-1 digest of literal identifiers in URL-safe base64 instead of hex.
+
+Version 3 keeps the identifiers of the graphs which reference a literal
+in the set ``r:<datatype>:<digest>``.
+
+Version 4 maintains the number of edges per cardinality in the hash
+``g:<id>:cards`` and the edges of a cardinality ``k`` in the set
+``g:<id>:cards:<k>``.
+
+Version 5 maintains the in-, out- and total degree of the vertices in the
+sorted sets ``g:<id>:indegree``, ``g:<id>:outdegree``, ``g:<id>:degree``
+and the number of vertices per degree in the hashes ``<sorted set>:hist``.
+
+The migration processes one graph after another in chunks, so the server
+stays responsive. Clients must not modify the graphs while the migration
+runs. Clients refuse to connect until the migration is finished. The migration can be restarted if it was interrupted.
+
+Usage::
+
+    python -m nodo.store.redismigrate [options]
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from __future__ import absolute_import
+import base64
+import binascii
+import sys
+from itertools import chain
+from optparse import OptionParser
+import redis
+from .redis import _KEY_GRAPHS, _KEY_SCHEMA, _SCHEMA_VERSION, _BATCH_SIZE, \
+        _PREFIX_EDGE, _PREFIX_LITERAL, _chunks, _refs_key
+
+
+def migrate(conn, batch_size=_BATCH_SIZE, progress=None):
+    """\
+    Migrates all graphs and literal values and marks the database with the
+    current schema version.
+
+    `conn`
+        A Redis connection.
+    `batch_size`
+        The number of elements which are migrated at once.
+    `progress`
+        An optional callable which is called after each chunk with the
+        graph identifier, the number of migrated elements, and the number
+        of elements of the graph.
+    """
+    for identifier in conn.smembers(_KEY_GRAPHS):
+        migrate_graph(conn, identifier, batch_size, progress)
+    migrate_literal_values(conn, batch_size)
+    conn.set(_KEY_SCHEMA, _SCHEMA_VERSION)
+
+
+def migrate_graph(conn, identifier, batch_size=_BATCH_SIZE, progress=None):
+    """\
+    Migrates the vertices and edges of the graph with the provided
+    `identifier`.
+
+    The values of the literals are migrated by `migrate_literal_values()`.
+    """
+    v_key, e_key = u'g:%s:vertices' % identifier, u'g:%s:edges' % identifier
+    cards_key = u'g:%s:cards' % identifier
+    cards = set()
+    pipe = conn.pipeline(transaction=False)
+    pipe.scard(v_key) \
+        .scard(e_key)
+    total = sum(pipe.execute())
+    done = 0
+    for key in (v_key, e_key):
+        # Migrated members may be returned by SSCAN as well, migrating
+        # them again does no harm
+        for chunk in _chunks(conn.sscan_iter(key, count=batch_size), batch_size):
+            cards.update(_migrate_elements(conn, key, chunk,
+                                           cards_key if key == e_key else None))
+            done = min(done + len(chunk), total)
+            if progress:
+                progress(identifier, done, total)
+    # The sets of the cardinality index are complete, SSCAN may have
+    # returned an edge more than once, so the counts are taken from them
+    cards = sorted(cards)
+    pipe = conn.pipeline(transaction=False)
+    for card in cards:
+        pipe.scard(u'%s:%d' % (cards_key, card))
+    counts = pipe.execute()
+    pipe = conn.pipeline()
+    pipe.delete(cards_key)
+    for card, count in zip(cards, counts):
+        pipe.hset(cards_key, card, count)
+    pipe.incr(u'g:%s:epoch' % identifier) \
+        .execute()
+    _migrate_degrees(conn, identifier, batch_size)
+
+
+def migrate_literal_values(conn, batch_size=_BATCH_SIZE):
+    """\
+    Renames the keys which hold the values of literals.
+    """
+    for chunk in _chunks(conn.scan_iter(_PREFIX_LITERAL + u'*', count=batch_size), batch_size):
+        keys = [key for key in chunk if key.count(':') == 2 and _is_hex_digest(key.rsplit(':', 1)[1])]
+        if not keys:
+            continue
+        values = conn.mget(keys)
+        pipe = conn.pipeline()
+        for key, value in zip(keys, values):
+            if value is not None:
+                pipe.setnx(_literal_id(key), value)
+            pipe.delete(key)
+        pipe.execute()
+
+
+def _migrate_elements(conn, key, elements, cards_key=None):
+    """\
+    Migrates the `elements` of the set `key` and returns the cardinalities
+    of the edges.
+
+    `cards_key`
+        The key of the cardinality index if the `elements` are edges,
+        otherwise ``None``.
+    """
+    edges = cards_key is not None
+    cards = set()
+    if edges:
+        elements = [_edge_id(e) for e in elements]
+    pipe = conn.pipeline(transaction=False)
+    for e in elements:
+        pipe.smembers(u'%s:ie' % e) \
+            .smembers(u'%s:oe' % e)
+        if edges:
+            pipe.zrange(e, 0, -1, withscores=True)
+    res = iter(pipe.execute())
+    pipe = conn.pipeline()
+    for e in elements:
+        ident = _literal_id(e) if e.startswith(_PREFIX_LITERAL) else e
+        for suffix, members in ((u':ie', next(res)), (u':oe', next(res))):
+            # Skip sets of version 2 and later
+            if not members or ident == e and not any(m.startswith(_PREFIX_EDGE) for m in members):
+                continue
+            pipe.delete(e + suffix) \
+                .sadd(ident + suffix, *[_edge_member(m) for m in members])
+        if edges:
+            incidents = next(res)
+            migrated = [(_literal_id(i) if i.startswith(_PREFIX_LITERAL) else i, score)
+                        for i, score in incidents]
+            if migrated != incidents:
+                pipe.delete(e) \
+                    .zadd(e, *chain.from_iterable(migrated))
+            member = _edge_member(e)
+            pipe.srem(key, e) \
+                .sadd(key, member)
+            if migrated:
+                pipe.sadd(u'%s:%d' % (cards_key, len(migrated)), member)
+                cards.add(len(migrated))
+        else:
+            if ident != e:
+                pipe.srem(key, e) \
+                    .sadd(key, ident)
+            if ident.startswith(_PREFIX_LITERAL):
+                glid, graph = ident.rsplit(u':', 1)
+                pipe.sadd(_refs_key(glid), graph)
+    pipe.execute()
+    return cards
+
+
+def _migrate_degrees(conn, identifier, batch_size):
+    """\
+    Builds the degree index of the graph with the provided `identifier`
+    from the adjacency sets of its vertices.
+    """
+    keys = [u'g:%s:%s' % (identifier, name) for name in (u'indegree', u'outdegree', u'degree')]
+    pipe = conn.pipeline(transaction=False)
+    for key in keys:
+        pipe.delete(key, u'%s:hist' % key)
+    pipe.execute()
+    for chunk in _chunks(conn.sscan_iter(u'g:%s:vertices' % identifier, count=batch_size), batch_size):
+        pipe = conn.pipeline(transaction=False)
+        for v in chunk:
+            pipe.scard(u'%s:ie' % v) \
+                .scard(u'%s:oe' % v)
+        res = pipe.execute()
+        pipe = conn.pipeline(transaction=False)
+        for v, indegree, outdegree in zip(chunk, res[::2], res[1::2]):
+            # ZADD is idempotent, SSCAN may return a vertex more than once
+            for key, degree in zip(keys, (indegree, outdegree, indegree + outdegree)):
+                if degree:
+                    pipe.zadd(key, v, degree)
+        pipe.execute()
+    for key in keys:
+        histogram = {}
+        for v, degree in conn.zscan_iter(key, count=batch_size):
+            histogram[int(degree)] = histogram.get(int(degree), 0) + 1
+        if histogram:
+            conn.hmset(u'%s:hist' % key, histogram)
+
+
+def _literal_id(ident):
+    """\
+    Returns the version 2 identifier of the literal (value) identifier
+    `ident`.
+    """
+    parts = ident.split(u':')
+    if _is_hex_digest(parts[2]):
+        parts[2] = base64.urlsafe_b64encode(binascii.unhexlify(parts[2])).rstrip('=')
+    return u':'.join(parts)
+
+
+def _is_hex_digest(digest):
+    return len(digest) == 40 and all(c in '0123456789abcdef' for c in digest)
+
+
+def _edge_member(member):
+    return member[2:] if member.startswith(_PREFIX_EDGE) else member
+
+
+def _edge_id(member):
+    return member if member.startswith(_PREFIX_EDGE) else _PREFIX_EDGE + member
+
+
+def main(args=None):
+    parser = OptionParser(usage='%prog [options]',
+                          description='Migrates a Nodo Redis database to the current key schema version.')
+    parser.add_option('--host', default='localhost', help='Redis host (default: %default)')
+    parser.add_option('--port', type='int', default=6379, help='Redis port (default: %default)')
+    parser.add_option('--db', type='int', default=0, help='Redis database (default: %default)')
+    parser.add_option('--batch-size', type='int', default=_BATCH_SIZE,
+                      help='Number of elements which are migrated at once (default: %default)')
+    options, args = parser.parse_args(args)
+    conn = redis.Redis(options.host, options.port, options.db)
+    version = conn.get(_KEY_SCHEMA)
+    if version is not None and int(version) >= _SCHEMA_VERSION:
+        print 'The database uses the key schema version %s already' % version
+        return 0
+    def progress(identifier, done, total):
+        sys.stdout.write('\rGraph %s: %d/%d' % (identifier, done, total))
+        if done == total:
+            sys.stdout.write('\n')
+        sys.stdout.flush()
+    migrate(conn, options.batch_size, progress)
+    print 'Done'
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+Abstract centrality tests.
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+import networkx as nx
+from nose.tools import ok_, eq_, assert_almost_equal
+from nodo import constants as consts, matrix, nxutils
+from nodo.algorithms import centrality
+from abstract_test import AbstractTest
+
+
+class AbstractCentralityTest(AbstractTest):
+
+    def setUp(self):
+        super(AbstractCentralityTest, self).setUp()
+        g = self.graph
+        self.v = v1, v2, v3, v4, v5 = [g.create_vertex() for i in range(5)]
+        for head, tail in ((v1, v2), (v2, v3), (v3, v1), (v3, v4), (v4, v1), (v1, v4), (v2, v5)):
+            g.create_edge(head, tail)
+
+    def _eq_scores(self, expected, res):
+        eq_(set(expected), set(res))
+        for v, score in expected.iteritems():
+            assert_almost_equal(score, res[v], places=4)
+
+    def test_pagerank(self):
+        g = self.graph
+        self._eq_scores(nx.pagerank(nxutils.to_nx(g)), centrality.pagerank(g))
+        self._eq_scores(nx.pagerank(nxutils.to_nx(g), alpha=0.5),
+                        centrality.pagerank(g, alpha=0.5))
+
+    def test_pagerank_personalization(self):
+        g = self.graph
+        v1, v2, v3, v4, v5 = self.v
+        personalization = {v1: 1, v2: 3}
+        # NetworkX expects a probability for each vertex
+        expected = nx.pagerank(nxutils.to_nx(g),
+                               personalization={v1: 1, v2: 3, v3: 0, v4: 0, v5: 0})
+        self._eq_scores(expected, centrality.pagerank(g, personalization=personalization))
+        try:
+            centrality.pagerank(g, personalization={'unknown': 1})
+            self.fail('Expected a ValueError')
+        except ValueError:
+            pass
+
+    def test_pagerank_hyperedges(self):
+        g = self.graph
+        v1, v2, v3, v4, v5 = self.v
+        v6, v7 = g.create_vertex(), g.create_vertex()
+        g.create_edge(v5, v6, v7)
+        e = g.create_edge(v6, v6)
+        g.create_edge(v7, e)
+        res = centrality.pagerank(g)
+        assert_almost_equal(1.0, sum(res.values()))
+        ok_(res[v6] > res[v7])
+
+    def test_pagerank_convergence(self):
+        try:
+            centrality.pagerank(self.graph, max_iter=1)
+            self.fail('Expected a ValueError')
+        except ValueError:
+            pass
+
+    def test_degree_centrality(self):
+        g = self.graph
+        v1, v2, v3, v4, v5 = self.v
+        self._eq_scores(nx.degree_centrality(nxutils.to_nx(g)), centrality.degree_centrality(g))
+        self._eq_scores(nx.in_degree_centrality(nxutils.to_nx(g)),
+                        centrality.degree_centrality(g, consts.DIRECTION_IN))
+        res = centrality.degree_centrality(g, consts.DIRECTION_OUT)
+        eq_(0.5, res[v1])
+        eq_(0, res[v5])
+
+    def test_eigenvector_centrality(self):
+        g = self.graph
+        v1, v2, v3, v4, v5 = self.v
+        self._eq_scores(nx.eigenvector_centrality(nxutils.to_nx(g), tol=1.0e-8),
+                        centrality.eigenvector_centrality(g, max_iter=500, tol=1.0e-8))
+
+    def test_incidence(self):
+        inc = matrix.incidence(self.graph, head=1, tail=2)
+        eq_(centrality.pagerank(self.graph), centrality.pagerank(inc))
+        eq_(centrality.degree_centrality(self.graph), centrality.degree_centrality(inc))
+
+    def test_incidence_invalid(self):
+        g = self.graph
+        v1, v2, v3, v4, v5 = self.v
+        g.create_edge(v5, v1, v2)
+        for inc in (matrix.incidence(g), matrix.incidence(g, head=1, tail=4),
+                    matrix.incidence(g, head=1.5, tail=2),
+                    matrix.incidence(g, head=2, tail=1)):
+            for func in (centrality.pagerank, centrality.degree_centrality,
+                         centrality.eigenvector_centrality):
+                try:
+                    func(inc)
+                    self.fail('Expected a ValueError')
+                except ValueError:
+                    pass
+
+    def test_empty(self):
+        g = self.create_empty_graph()
+        try:
+            eq_({}, centrality.pagerank(g))
+            eq_({}, centrality.degree_centrality(g))
+            eq_({}, centrality.eigenvector_centrality(g))
+        finally:
+            self.delete_graph(g)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+Abstract connected components tests.
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from nose.tools import ok_, eq_
+from nodo.algorithms.components import connected_components, UnionFind
+from abstract_test import AbstractTest
+
+
+class AbstractComponentsTest(AbstractTest):
+
+    def setUp(self):
+        super(AbstractComponentsTest, self).setUp()
+        g = self.graph
+        self.v = v1, v2, v3, v4, v5, v6, v7 = [g.create_vertex() for i in range(7)]
+        self.e1 = g.create_edge(v1, v2)
+        self.e2 = g.create_edge(v3, v4, v5)
+        self.e3 = g.create_edge(v7, self.e1)
+        self.e4 = g.create_edge(v5, v5)
+
+    def test_components(self):
+        v1, v2, v3, v4, v5, v6, v7 = self.v
+        comps = connected_components(self.graph, batch_size=2)
+        eq_(3, len(comps))
+        res = comps.components()
+        eq_(set([v6]), res[-1])
+        eq_(sorted([sorted([v1, v2, v7]), sorted([v3, v4, v5])]), sorted(map(sorted, res[:2])))
+
+    def test_component(self):
+        v1, v2, v3, v4, v5, v6, v7 = self.v
+        comps = connected_components(self.graph)
+        eq_(comps.component(v1), comps.component(v7))
+        eq_(comps.component(v1), comps.component(self.e3))
+        eq_(comps.component(v3), comps.component(self.e4))
+        ok_(comps.component(v1) != comps.component(v3))
+        ok_(comps.component(v6) is not None)
+        eq_(None, comps.component('unknown'))
+        ok_(comps.same_component(v2, v7))
+        ok_(not comps.same_component(v2, v6))
+        ok_(not comps.same_component('unknown', 'unknown'))
+
+    def test_empty(self):
+        g = self.create_empty_graph()
+        try:
+            comps = connected_components(g)
+            eq_(0, len(comps))
+            eq_([], comps.components())
+        finally:
+            self.delete_graph(g)
+
+
+def test_union_find():
+    uf = UnionFind(4)
+    eq_(4, len(uf))
+    eq_(4, uf.add())
+    eq_(5, len(uf))
+    ok_(uf.find(1) != uf.find(2))
+    uf.union(1, 2)
+    uf.union(3, 4)
+    eq_(uf.find(1), uf.find(2))
+    ok_(uf.find(1) != uf.find(3))
+    root = uf.union(2, 4)
+    eq_(root, uf.find(3))
+    eq_([0, root, root, root, root], list(uf.labels()))
+    eq_(root, uf.union(1, 3))
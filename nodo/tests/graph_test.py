@@ -130,6 +130,227 @@ class AbstractGraphTest(AbstractTest):
         ok_(e in g)
         ok_(e in g.edges())
 
+    def test_create_vertices(self):
+        g = self.graph
+        vertices = tuple(g.create_vertices([(None, None), (u'Pumuckl', None), (u'1', XSD.integer)]))
+        eq_(3, len(vertices))
+        eq_(3, len(g))
+        ok_(not g.is_literal(vertices[0]))
+        eq_((u'Pumuckl', XSD.string), g.literal(vertices[1]))
+        eq_(vertices[2], g.find_integer_vertex(1))
+
+    def test_create_edges(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e1, e2 = g.create_edges([(v1, v2), (v2, v1, v3)])
+        eq_(v1, g.head(e1))
+        eq_((v2,), tuple(g.tail(e1)))
+        eq_(v2, g.head(e2))
+        eq_(sorted([v1, v3]), sorted(g.tail(e2)))
+        ok_(e2 in g.outgoing_edges(v2))
+        ok_(e2 in g.ingoing_edges(v3))
+
+    def test_create_edges_unique_positional(self):
+        g = self.graph
+        v1, v2 = g.create_vertex(), g.create_vertex()
+        e1, e2 = g.create_edges([(v1, v2), (v1, v2)], True)
+        eq_(e1, e2)
+        eq_(1, g.edge_count())
+
+    def test_create_edges_illegal(self):
+        g = self.graph
+        v = g.create_vertex()
+        try:
+            tuple(g.create_edges([(v, None)]))
+            self.fail('None is not allowed as tail')
+        except TypeError:
+            pass
+
+    def test_iter_vertices_edges(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e1, e2 = g.create_edge(v1, v2), g.create_edge(v3, v1, v2)
+        eq_(sorted([v1, v2, v3]), sorted(g.iter_vertices()))
+        eq_(sorted([e1, e2]), sorted(g.iter_edges()))
+        eq_(sorted([v1, v2, v3]), sorted(g))
+
+    def test_card_histogram(self):
+        g = self.graph
+        eq_({}, g.card_histogram())
+        ok_(g.is_uniform())
+        ok_(g.is_uniform(2))
+        v1, v2, v3, v4 = g.create_vertex(), g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e1, e2, e3 = g.create_edge(v1, v2), g.create_edge(v1, v2, v3), g.create_edge(v4, v4)
+        eq_({1: 1, 2: 1, 3: 1}, g.card_histogram())
+        eq_(set([e1]), set(g.edges_with_card(2)))
+        eq_(set([e3]), set(g.edges_with_card(1)))
+        eq_(set(), set(g.edges_with_card(4)))
+        eq_(3, g.rank())
+        eq_(1, g.corank())
+        ok_(not g.is_uniform())
+        g.add_tail(e1, v3, v4)
+        eq_({1: 1, 3: 1, 4: 1}, g.card_histogram())
+        eq_(set([e1]), set(g.edges_with_card(4)))
+        g.remove_tail(e2, v3)
+        eq_({1: 1, 2: 1, 4: 1}, g.card_histogram())
+        g.delete_edge(e3)
+        eq_({2: 1, 4: 1}, g.card_histogram())
+        # e1 contains v3 and v4 in its tail
+        g.merge_vertices(v3, v4)
+        eq_({2: 1, 3: 1}, g.card_histogram())
+        eq_(set([e1]), set(g.edges_with_card(3)))
+        g.delete_vertex(v2)
+        eq_({}, g.card_histogram())
+        eq_(0, g.rank())
+        g.create_edge(v1, v3)
+        ok_(g.is_uniform(2))
+        ok_(not g.is_uniform(3))
+
+    def _check_degrees(self):
+        g = self.graph
+        for direction, degree in ((constants.DIRECTION_IN, g.indegree),
+                                  (constants.DIRECTION_OUT, g.outdegree),
+                                  (constants.DIRECTION_BOTH, g.degree)):
+            degrees = dict((v, degree(v)) for v in g.vertices())
+            histogram = {}
+            for d in degrees.itervalues():
+                histogram[d] = histogram.get(d, 0) + 1
+            eq_(histogram, g.degree_histogram(direction))
+            top = g.top_degree(len(degrees) + 1, direction)
+            eq_(sorted((v, d) for v, d in degrees.iteritems() if d > 0), sorted(top))
+            eq_([d for v, d in top], sorted((d for v, d in top), reverse=True))
+            for d in histogram:
+                eq_(set(v for v in degrees if degrees[v] == d),
+                    set(g.vertices_with_degree(d, d, direction)))
+
+    def test_degree_index(self):
+        g = self.graph
+        eq_({}, g.degree_histogram())
+        eq_([], g.top_degree(3))
+        v1, v2, v3, v4 = g.create_vertex(), g.create_vertex(u'Pumuckl'), g.create_vertex(), g.create_vertex()
+        eq_({0: 4}, g.degree_histogram())
+        e1, e2 = g.create_edge(v1, v2), g.create_edge(v1, v2, v3)
+        eq_([(v1, 2)], g.top_degree(1))
+        eq_([(v1, 2)], g.top_degree(1, constants.DIRECTION_OUT))
+        eq_([(v2, 2)], g.top_degree(1, constants.DIRECTION_IN))
+        eq_(set([v1, v2]), set(g.vertices_with_degree(2)))
+        eq_(set([v3, v4]), set(g.vertices_with_degree(0, 1)))
+        eq_(set([v1, v4]), set(g.vertices_with_degree(0, 0, constants.DIRECTION_IN)))
+        eq_({0: 1, 1: 1, 2: 2}, g.degree_histogram())
+        self._check_degrees()
+        e3 = g.create_edge(v4, e1)
+        g.add_tail(e1, v3, v4)
+        self._check_degrees()
+        g.remove_tail(e2, v3)
+        self._check_degrees()
+        g.delete_edge(e3)
+        self._check_degrees()
+        g.create_edge(v3, v4)
+        g.merge_vertices(v3, v4)
+        self._check_degrees()
+        g.delete_vertex(v2)
+        self._check_degrees()
+        list(g.create_edges([(v1, v3), (v3, v1, v1)]))
+        self._check_degrees()
+
+    def test_edges_containing(self):
+        g = self.graph
+        v1, v2, v3, v4 = g.create_vertex(), g.create_vertex(u'Pumuckl'), g.create_vertex(), g.create_vertex()
+        e1, e2, e3 = g.create_edge(v1, v2, v3), g.create_edge(v2, v1, v3), g.create_edge(v3, v3)
+        e4 = g.create_edge(v4, e1)
+        eq_(set([e1, e2]), set(g.edges_containing(v1, v2)))
+        eq_(set([e1, e2, e3]), set(g.edges_containing(v3)))
+        eq_(set([e1, e2]), set(g.edges_containing(v1, v2, v3, v1)))
+        eq_(set(), set(g.edges_containing(v1, v4)))
+        eq_(set([e4]), set(g.edges_containing(v4, e1)))
+        eq_(set([e1, e2, e3, e4]), set(g.edges_containing()))
+        eq_(set([e1]), set(g.edges_containing(v2, v3, role=constants.ROLE_TAIL)))
+        eq_(set([e1, e2, e3]), set(g.edges_containing(v3, role=constants.ROLE_TAIL)))
+        eq_(set([e2]), set(g.edges_containing(v2, role=constants.ROLE_HEAD)))
+        eq_(set([e3]), set(g.edges_containing(v3, role=constants.ROLE_HEAD)))
+        eq_(set(), set(g.edges_containing(v1, v2, role=constants.ROLE_HEAD)))
+        g.delete_edge(e2)
+        eq_(set([e1]), set(g.edges_containing(v1, v2)))
+
+    def test_find_edge(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(u'Pumuckl'), g.create_vertex()
+        e1, e2, e3 = g.create_edge(v1, v2, v3), g.create_edge(v1, v2), g.create_edge(v1, v1)
+        eq_(e1, g.find_edge(v1, v3, v2))
+        eq_(e1, g.find_edge(v1, v2, v3, v2))
+        eq_(e2, g.find_edge(v1, v2))
+        eq_(e3, g.find_edge(v1, v1))
+        eq_(None, g.find_edge(v2, v1))
+        eq_(None, g.find_edge(v1, v3))
+        eq_(None, g.find_edge(v1, v1, v2))
+        g.add_tail(e2, v1)
+        eq_(e2, g.find_edge(v1, v1, v2))
+        g.delete_edge(e1)
+        eq_(None, g.find_edge(v1, v2, v3))
+
+    def test_create_edge_unique(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e1 = g.create_edge(v1, v2, v3)
+        eq_(e1, g.create_edge(v1, v3, v2, unique=True))
+        e2 = g.create_edge(v1, v2, unique=True)
+        ok_(e2 != e1)
+        eq_(e2, g.create_edge(v1, v2, unique=True))
+        eq_([e1, e2, e1], list(g.create_edges([(v1, v2, v3), (v1, v2), (v1, v3, v2)], unique=True)))
+        e3, e4 = g.create_edges([(v2, v3), (v2, v3)], unique=True)
+        eq_(e3, e4)
+        eq_(3, g.edge_count())
+
+    def test_duplicate_edges(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
+        eq_([], g.duplicate_edges())
+        e1, e2, e3 = g.create_edge(v1, v2, v3), g.create_edge(v1, v3, v2), g.create_edge(v1, v2)
+        eq_([set([e1, e2])], g.duplicate_edges())
+        g.remove_tail(e1, v3)
+        eq_([set([e1, e3])], g.duplicate_edges())
+        e4 = g.create_edge(v3, v3)
+        g.merge_vertices(v1, v3)
+        eq_([set([e1, e3])], g.duplicate_edges())
+        g.delete_edge(e3)
+        eq_([], g.duplicate_edges())
+        # The head is part of the tail
+        v4, v5 = g.create_vertex(), g.create_vertex()
+        e5, e6 = g.create_edge(v4, v5), g.create_edge(v4, v4, v5)
+        eq_([], g.duplicate_edges())
+        e7 = g.create_edge(v4, v5, v4)
+        eq_([set([e6, e7])], g.duplicate_edges())
+
+    def test_counts_membership(self):
+        g = self.graph
+        eq_(0, g.vertex_count())
+        eq_(0, g.edge_count())
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(u'Pumuckl'), g.create_vertex()
+        e1, e2 = g.create_edge(v1, v2), g.create_edge(v3, v1, v2)
+        eq_(3, len(g))
+        eq_(3, g.vertex_count())
+        eq_(2, g.edge_count())
+        g.delete_vertex(v3)
+        eq_(2, g.vertex_count())
+        eq_(1, g.edge_count())
+        ok_(v1 in g)
+        ok_(v2 in g)
+        ok_(e1 in g)
+        ok_(v3 not in g)
+        ok_(e2 not in g)
+        eq_([True, False, True, False, True], g.contains_many([v1, v3, e1, e2, v2]))
+        eq_([], g.contains_many([]))
+
+    def test_iter_adjacency(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e1, e2 = g.create_edge(v1, v2), g.create_edge(v3, v1, v2)
+        eq_([e1], list(g.iter_outgoing_edges(v1)))
+        eq_(sorted([e1, e2]), sorted(g.iter_ingoing_edges(v2)))
+        eq_(sorted([e1, e2]), sorted(g.iter_ingoing_edges(v1, v2)))
+        eq_(sorted([e1, e2]), sorted(g.iter_outgoing_edges(v1, v3)))
+        eq_([], list(g.iter_outgoing_edges(v2)))
+
     def test_rank_card(self):
         g = self.graph
         v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
@@ -229,6 +450,28 @@ class AbstractGraphTest(AbstractTest):
         e = g.create_edge(v1, v2, v3, v4)
         ok_(tuple(sorted([v2, v3, v4])) == tuple(sorted(g.tail(e))))
 
+    def test_heads_tails(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e1, e2, e3 = g.create_edge(v1, v2), g.create_edge(v2, v1, v3), g.create_edge(v3, v3)
+        eq_([v1, v2, v3], g.heads([e1, e2, e3]))
+        tails = g.tails([e1, e2, e3])
+        eq_((v2,), tuple(tails[0]))
+        eq_(sorted([v1, v3]), sorted(tails[1]))
+        eq_((v3,), tuple(tails[2]))
+        incidents = g.incidents_many([e1, e2])
+        eq_(sorted([v1, v2]), sorted(incidents[0]))
+        eq_(sorted([v1, v2, v3]), sorted(incidents[1]))
+        eq_([], g.heads([]))
+        # The head is part of the tail
+        for head, tail in ((v2, (v1, v2)), (v1, (v1, v2))):
+            e4 = g.create_edge(head, *tail)
+            eq_([head], g.heads([e4]))
+            eq_(head, g.head(e4))
+            eq_(sorted(tail), sorted(g.tails([e4])[0]))
+            eq_(sorted(tail), sorted(g.tail(e4)))
+            eq_(sorted([v1, v2]), sorted(g.incidents_many([e4])[0]))
+
     def test_neighbour(self):
         g = self.graph
         v1, v2 = g.create_vertex(), g.create_vertex()
@@ -403,6 +646,15 @@ class AbstractGraphTest(AbstractTest):
         v = g.create_vertex()
         ok_(None is g.literal(v))
 
+    def test_literals(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(u'Pumuckl'), g.create_vertex(), g.create_integer_vertex(1)
+        e = g.create_edge(v1, v2)
+        eq_([(u'Pumuckl', XSD.string), None, (u'1', XSD.integer), None], g.literals(v1, v2, v3, e))
+        eq_([u'Pumuckl', None, u'1'], g.values(v1, v2, v3))
+        eq_([XSD.string, None, XSD.integer], g.datatypes(v1, v2, v3))
+        eq_([], g.literals())
+
     def test_value(self):
         g = self.graph
         value = u'Pumuckl'
@@ -483,6 +735,26 @@ class AbstractGraphTest(AbstractTest):
         ok_(v not in g.vertices())
         ok_(tuple() == tuple(g.vertices()))
 
+    def test_delete_edge_cascade(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e1 = g.create_edge(v1, v2)
+        e2 = g.create_edge(v3, e1)
+        e3 = g.create_edge(v1, v3, e2)
+        e4 = g.create_edge(v2, v3)
+        g.delete_edge(e1)
+        # The edges which contain a deleted edge are deleted as well
+        for e in (e1, e2, e3):
+            ok_(e not in g)
+        eq_(set([e4]), set(g.edges()))
+        eq_(1, g.edge_count())
+        eq_({2: 1}, g.card_histogram())
+        eq_(set([e4]), set(g.outgoing_edges(v2)))
+        eq_(set(), set(g.outgoing_edges(v1, v3)))
+        eq_(set([e4]), set(g.ingoing_edges(v3)))
+        eq_(0, g.degree(v1))
+        eq_(1, g.degree(v3))
+
     def test_add_tail(self):
         g = self.graph
         v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
@@ -553,6 +825,35 @@ class AbstractGraphTest(AbstractTest):
         except ValueError:
             pass
 
+    def test_remove_tail_empty(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e = g.create_edge(v1, v2, v3)
+        try:
+            g.remove_tail(e, v2, v3)
+            self.fail('Expected a ValueError for an empty tail')
+        except ValueError:
+            pass
+        eq_(sorted([v2, v3]), sorted(g.tail(e)))
+        eq_({3: 1}, g.card_histogram())
+        eq_(1, g.indegree(v2))
+
+    def test_change_tail_unknown_edge(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e = g.create_edge(v1, v2)
+        g.create_edge(v1, v3)
+        g.delete_edge(e)
+        for change in (g.add_tail, g.remove_tail):
+            try:
+                change(e, v3)
+                self.fail('Expected a TypeError for an unknown edge')
+            except TypeError:
+                pass
+        eq_({2: 1}, g.card_histogram())
+        eq_(1, g.indegree(v3))
+        eq_(0, g.indegree(v2))
+
     def test_replace_tail(self):
         g = self.graph
         v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
@@ -580,6 +881,24 @@ class AbstractGraphTest(AbstractTest):
         ok_(v in g.neighbours(v))
         ok_(g.is_neighbour(v, v))
 
+    def test_delete_loop(self):
+        g = self.graph
+        v = g.create_vertex()
+        e = g.create_edge(v, v)
+        g.delete_edge(e)
+        ok_(e not in g)
+        eq_(0, g.indegree(v))
+        eq_(0, g.outdegree(v))
+
+    def test_delete_vertex_hyperedge(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e = g.create_edge(v1, v2, v3)
+        g.delete_vertex(v1)
+        ok_(e not in g)
+        eq_(0, g.indegree(v2))
+        eq_(0, g.indegree(v3))
+
     def test_clear(self):
         g = self.graph
         v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
@@ -679,3 +998,38 @@ class AbstractGraphTest(AbstractTest):
         except TypeError:
             pass
         ok_(2 == len(g))
+
+    def test_merge_vertices_loop(self):
+        g = self.graph
+        v1, v2 = g.create_vertex(), g.create_vertex()
+        e = g.create_edge(v2, v2)
+        vm = g.merge_vertices(v1, v2)
+        eq_(1, len(g))
+        eq_(vm, g.head(e))
+        eq_((vm,), tuple(g.tail(e)))
+        eq_(1, g.indegree(vm))
+        eq_(1, g.outdegree(vm))
+
+    def test_merge_vertices_head_in_tail(self):
+        g = self.graph
+        v1, v2 = g.create_vertex(), g.create_vertex()
+        e = g.create_edge(v2, v1, v2)
+        vm = g.merge_vertices(v1, v2)
+        ok_(e not in g)
+        eq_(0, len(g.edges()))
+        eq_(0, len(g.outgoing_edges(vm)))
+        eq_(0, len(g.ingoing_edges(vm)))
+        eq_(0, g.degree(vm))
+        eq_({}, g.card_histogram())
+        eq_(None, g.edge_between(vm, vm))
+
+    def test_merge_vertices_hyperedge(self):
+        g = self.graph
+        v1, v2, v3, v4 = g.create_vertex(), g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e1 = g.create_edge(v1, v2, v3)
+        e2 = g.create_edge(v4, v2)
+        vm = g.merge_vertices(v1, v2)
+        ok_(e1 not in g)
+        eq_(0, g.indegree(v3))
+        eq_(vm, tuple(g.tail(e2))[0])
+        eq_(1, g.indegree(vm))
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+Abstract incidence matrix tests.
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from nose.tools import ok_, eq_
+from nodo import matrix
+from abstract_test import AbstractTest
+
+
+class AbstractMatrixTest(AbstractTest):
+
+    def setUp(self):
+        super(AbstractMatrixTest, self).setUp()
+        g = self.graph
+        self.v = v1, v2, v3, v4 = [g.create_vertex() for i in range(4)]
+        self.e1 = g.create_edge(v1, v2)
+        self.e2 = g.create_edge(v1, v2, v3)
+        self.e3 = g.create_edge(v4, self.e1)
+        self.e4 = g.create_edge(v3, v3)
+
+    def _entries(self, inc):
+        m = inc.matrix.tocoo()
+        return dict(((inc.vertices[r].item(), inc.edges[c].item()), w)
+                    for r, c, w in zip(m.row, m.col, m.data))
+
+    def test_incidence(self):
+        v1, v2, v3, v4 = self.v
+        inc = matrix.incidence(self.graph, batch_size=3)
+        eq_((4, 4), inc.shape)
+        eq_('csr', inc.matrix.format)
+        eq_({(v1, self.e1): -1, (v2, self.e1): 1,
+             (v1, self.e2): -1, (v2, self.e2): 1, (v3, self.e2): 1,
+             (v4, self.e3): -1}, self._entries(inc))
+
+    def test_weights(self):
+        v1, v2, v3, v4 = self.v
+        inc = matrix.incidence(self.graph, head=1, tail=2, format='csc', dtype=int)
+        eq_('csc', inc.matrix.format)
+        entries = self._entries(inc)
+        eq_(3, entries[v3, self.e4])
+        eq_(2, entries[v3, self.e2])
+        eq_(1, entries[v4, self.e3])
+        nnz = inc.matrix.getnnz(axis=0)
+        eq_([3, 2, 1, 1], nnz[inc.edge_indexes([self.e2, self.e1, self.e3, self.e4])].tolist())
+
+    def test_mappings(self):
+        v1, v2, v3, v4 = self.v
+        inc = matrix.incidence(self.graph)
+        rows = inc.vertex_indexes([v3, self.e1, v1])
+        eq_(-1, rows[1])
+        eq_([v3, v1], inc.vertices[rows[[0, 2]]].tolist())
+        cols = inc.edge_indexes([self.e2, v1])
+        eq_(-1, cols[1])
+        eq_(self.e2, inc.edges[cols[0]].item())
+        eq_([-1], inc.edge_indexes(['unknown']).tolist())
+        eq_([], inc.vertex_indexes([]).tolist())
+
+    def test_empty(self):
+        g = self.create_empty_graph()
+        try:
+            inc = matrix.incidence(g)
+            eq_((0, 0), inc.shape)
+            v = g.create_vertex()
+            inc = matrix.incidence(g, format='csc')
+            eq_((1, 0), inc.shape)
+            eq_('csc', inc.matrix.format)
+            eq_(0, inc.matrix.nnz)
+        finally:
+            self.delete_graph(g)
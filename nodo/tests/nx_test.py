@@ -94,3 +94,113 @@ class AbstractNXTest(AbstractTest):
         ok_(nx.has_edge(lit2, v4))
         ok_(nx.has_edge(lit1, v4))
         ok_(g.degree(v1) == nx.degree(lit1))
+
+    def test_convert_batch_size(self):
+        g = self.graph
+        vertices = [g.create_vertex() for i in range(10)]
+        for v1, v2 in zip(vertices, vertices[1:]):
+            g.create_edge(v1, v2)
+        nx = nxutils.to_nx(g, batch_size=3)
+        ok_(10 == nx.number_of_nodes())
+        ok_(9 == nx.number_of_edges())
+        for v1, v2 in zip(vertices, vertices[1:]):
+            ok_(nx.has_edge(v1, v2))
+            ok_(not nx.has_edge(v2, v1))
+
+    def test_unknown_mode(self):
+        try:
+            nxutils.to_nx(self.graph, mode='star')
+            self.fail('Expected a ValueError for an unknown mode')
+        except ValueError:
+            pass
+
+    def test_bipartite(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(u'Pitje Puck'), g.create_vertex(), g.create_vertex()
+        lit1 = u'Pitje Puck', XSD.string
+        e1 = g.create_edge(v1, v2, v3)
+        e2 = g.create_edge(v2, v3)
+        e3 = g.create_edge(v3, e2)
+        for batch_size in (1, 2, 1000):
+            nx = nxutils.to_nx(g, mode=nxutils.MODE_BIPARTITE, batch_size=batch_size)
+            ok_(6 == nx.number_of_nodes())
+            ok_(7 == nx.number_of_edges())
+            for node in (lit1, v2, v3):
+                ok_(0 == nx.node[node]['bipartite'])
+            for node in (e1, e2, e3):
+                ok_(1 == nx.node[node]['bipartite'])
+            ok_(nx.has_edge(lit1, e1))
+            ok_(nx.has_edge(e1, v2))
+            ok_(nx.has_edge(e1, v3))
+            ok_(nx.has_edge(v2, e2))
+            ok_(nx.has_edge(e2, v3))
+            ok_(nx.has_edge(v3, e3))
+            ok_(nx.has_edge(e3, e2))
+
+    def test_clique(self):
+        g = self.graph
+        v1, v2, v3, v4, v5 = [g.create_vertex() for i in range(5)]
+        e1 = g.create_edge(v1, v2, v3, v4)
+        e2 = g.create_edge(v4, v5, e1)
+        g.create_edge(v5, v5)
+        for batch_size in (1, 1000):
+            nx = nxutils.to_nx(g, mode=nxutils.MODE_CLIQUE, batch_size=batch_size)
+            ok_(not nx.is_directed())
+            ok_(5 == nx.number_of_nodes())
+            ok_(7 == nx.number_of_edges())
+            ok_(not nx.has_node(e1))
+            for a, b in ((v1, v2), (v1, v3), (v1, v4), (v2, v3), (v2, v4), (v3, v4), (v4, v5)):
+                ok_(nx.has_edge(a, b))
+                ok_(nx.has_edge(b, a))
+
+    def test_from_nx(self):
+        import networkx
+        nxg = networkx.DiGraph()
+        nxg.add_edges_from([(1, 2), (2, u'three'), (u'three', 1), (1, 1)])
+        nxg.add_node(object())
+        g = self.graph
+        mapping = nxutils.from_nx(nxg, g, batch_size=2)
+        ok_(4 == len(mapping))
+        ok_(4 == len(g.vertices()))
+        ok_(4 == len(g.edges()))
+        ok_((u'1', XSD.integer) == g.literal(mapping[1]))
+        ok_((u'three', XSD.string) == g.literal(mapping[u'three']))
+        ok_(g.edge_between(mapping[1], mapping[2]))
+        ok_(g.edge_between(mapping[2], mapping[u'three']))
+        ok_(g.edge_between(mapping[u'three'], mapping[1]))
+        ok_(g.edge_between(mapping[2], mapping[1]) is None)
+
+    def test_from_nx_literal_attr(self):
+        import networkx
+        nxg = networkx.Graph()
+        nxg.add_node(0, name=u'Pitje Puck')
+        nxg.add_node(1, name=(u'0042', XSD.integer))
+        nxg.add_node(2)
+        nxg.add_node(3, name=u'Pitje Puck')
+        nxg.add_edges_from([(0, 1), (1, 2)])
+        g = self.graph
+        mapping = nxutils.from_nx(nxg, g, literal_attr='name')
+        ok_(mapping[0] == mapping[3])
+        ok_((u'Pitje Puck', XSD.string) == g.literal(mapping[0]))
+        ok_(42 == int(g.value(mapping[1])))
+        ok_(XSD.integer == g.datatype(mapping[1]))
+        ok_(g.literal(mapping[2]) is None)
+        ok_(3 == len(g.vertices()))
+        ok_(2 == len(g.edges()))
+
+    def test_roundtrip(self):
+        g = self.graph
+        v1, v2, v3 = g.create_vertex(u'Pitje Puck'), g.create_integer_vertex(1), g.create_vertex()
+        g.create_edge(v1, v2)
+        g.create_edge(v2, v3)
+        nxg = nxutils.to_nx(g)
+        g2 = self.create_empty_graph()
+        try:
+            mapping = nxutils.from_nx(nxg, g2)
+            nxg2 = nxutils.to_nx(g2)
+            ok_(set(g.literals(v1, v2)) <= set(g2.literals(*mapping.values())))
+            ok_(nxg2.number_of_nodes() == nxg.number_of_nodes())
+            ok_(nxg2.number_of_edges() == nxg.number_of_edges())
+            ok_(nxg2.has_edge((u'Pitje Puck', XSD.string), g2.literal(mapping[g.literal(v2)])))
+        finally:
+            self.delete_graph(g2)
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+Abstract snapshot tests.
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from nose.tools import ok_, eq_
+from nodo import XSD, constants as consts, snapshot
+from abstract_test import AbstractTest
+
+
+class AbstractSnapshotTest(AbstractTest):
+
+    def setUp(self):
+        super(AbstractSnapshotTest, self).setUp()
+        g = self.graph
+        self.v = v1, v2, v3, v4 = [g.create_vertex() for i in range(4)]
+        self.lit = g.create_vertex(u'Sm\xf8rrebr\xf8d')
+        self.num = g.create_integer_vertex('0042')
+        self.e1 = g.create_edge(v1, v2)
+        self.e2 = g.create_edge(v1, v2, v3, self.lit)
+        self.e3 = g.create_edge(v2, self.e1)
+        self.e4 = g.create_edge(v3, v3)
+        self.e5 = g.create_edge(self.num, v1)
+        self.snapshot = snapshot.snapshot(self.graph, batch_size=2)
+
+    def test_elements(self):
+        g, s = self.graph, self.snapshot
+        eq_(g.identifier, s.identifier)
+        eq_(set(g.vertices()), set(s.vertices()))
+        eq_(set(g.edges()), set(s.edges()))
+        eq_(g.vertex_count(), s.vertex_count())
+        eq_(g.edge_count(), s.edge_count())
+        eq_(len(g), len(s))
+        for ident in list(g.vertices()) + list(g.edges()):
+            ok_(ident in s)
+            eq_(g.kind(ident), s.kind(ident))
+        eq_(consts.KIND_UNKNOWN, s.kind('unknown'))
+        ok_('unknown' not in s)
+        ok_(None not in s)
+        eq_([True, False, True], s.contains_many([self.e1, 'unknown', self.lit]))
+
+    def test_incidents(self):
+        g, s = self.graph, self.snapshot
+        edges = list(g.edges())
+        for e in edges:
+            eq_(g.head(e), s.head(e))
+            eq_(set(g.tail(e)), set(s.tail(e)))
+            eq_(set(g.edge_incidents(e)), set(s.edge_incidents(e)))
+            eq_(g.card(e), s.card(e))
+        eq_(g.heads(edges), s.heads(edges))
+        eq_([set(t) for t in g.tails(edges)], [set(t) for t in s.tails(edges)])
+        eq_([None, g.head(self.e1)], s.heads(['unknown', self.e1]))
+        eq_([(), tuple(g.tail(self.e1))], s.tails([self.v[0], self.e1]))
+        eq_(0, s.card(self.v[0]))
+
+    def test_cards(self):
+        g, s = self.graph, self.snapshot
+        eq_(g.card_histogram(), s.card_histogram())
+        eq_(g.rank(), s.rank())
+        eq_(g.corank(), s.corank())
+        eq_(set(g.edges_with_card(2)), s.edges_with_card(2))
+        eq_(set(), s.edges_with_card(7))
+        ok_(not s.is_uniform())
+
+    def test_degrees(self):
+        g, s = self.graph, self.snapshot
+        for ident in list(g.vertices()) + list(g.edges()):
+            eq_(g.indegree(ident), s.indegree(ident))
+            eq_(g.outdegree(ident), s.outdegree(ident))
+            eq_(g.degree(ident), s.degree(ident))
+        eq_(0, s.degree('unknown'))
+        for direction in (consts.DIRECTION_IN, consts.DIRECTION_OUT, consts.DIRECTION_BOTH):
+            eq_(g.degree_histogram(direction), s.degree_histogram(direction))
+            eq_(set(g.vertices_with_degree(1, 2, direction)),
+                s.vertices_with_degree(1, 2, direction))
+            eq_([d for v, d in g.top_degree(3, direction)],
+                [d for v, d in s.top_degree(3, direction)])
+        eq_([(self.v[0], 2)], s.top_degree(1, consts.DIRECTION_OUT))
+
+    def test_neighbourhood(self):
+        g, s = self.graph, self.snapshot
+        v1, v2, v3, v4 = self.v
+        for ident in list(g.vertices()) + list(g.edges()):
+            eq_(set(g.ingoing_edges(ident)), s.ingoing_edges(ident))
+            eq_(set(g.outgoing_edges(ident)), s.outgoing_edges(ident))
+            eq_(sorted(g.predecessors(ident)), sorted(s.predecessors(ident)))
+            eq_(sorted(g.successors(ident)), sorted(s.successors(ident)))
+        eq_(set(g.ingoing_edges(v2, v3)), s.ingoing_edges(v2, v3, 'unknown'))
+        eq_(set([self.e1, self.e2]), s.edges_between(v1, v2))
+        eq_(set(), s.edges_between(v2, v1))
+        ok_(s.is_neighbour(v1, v2))
+        ok_(not s.is_neighbour(v1, v4))
+
+    def test_edges_containing(self):
+        g, s = self.graph, self.snapshot
+        v1, v2, v3, v4 = self.v
+        eq_(set(g.edges()), s.edges_containing())
+        eq_(set([self.e1, self.e2, self.e3]), s.edges_containing(v2))
+        eq_(set([self.e1, self.e2]), s.edges_containing(v1, v2))
+        eq_(set([self.e3]), s.edges_containing(v2, role=consts.ROLE_HEAD))
+        eq_(set([self.e2]), s.edges_containing(v2, v3, role=consts.ROLE_TAIL))
+        eq_(set(), s.edges_containing(v1, 'unknown'))
+        eq_(set(), s.edges_containing(v4))
+
+    def test_find_edge(self):
+        s = self.snapshot
+        v1, v2, v3, v4 = self.v
+        eq_(self.e1, s.find_edge(v1, v2))
+        eq_(self.e2, s.find_edge(v1, self.lit, v3, v2, v3))
+        eq_(self.e3, s.find_edge(v2, self.e1))
+        eq_(None, s.find_edge(v1, v2, v3))
+        eq_(None, s.find_edge(v2, v1))
+        eq_(None, s.find_edge(v1, 'unknown'))
+        eq_([], s.duplicate_edges())
+
+    def test_literals(self):
+        g, s = self.graph, self.snapshot
+        eq_(g.literal(self.num), s.literal(self.num))
+        eq_((u'Sm\xf8rrebr\xf8d', XSD.string), s.literal(self.lit))
+        eq_(None, s.literal(self.v[0]))
+        eq_(None, s.literal(self.e1))
+        eq_(None, s.literal('unknown'))
+        eq_([g.literal(self.num), None], s.literals(self.num, self.v[0]))
+        eq_(self.lit, s.find_vertex(u'Sm\xf8rrebr\xf8d'))
+        eq_(self.num, s.find_integer_vertex('42'))
+        eq_(self.num, s.find_integer_vertex(42))
+        eq_(None, s.find_vertex('42'))
+        eq_(None, s.find_vertex(u'Sm\xf8rrebr\xf8d', XSD.anyURI))
+
+    def test_immutable(self):
+        g = self.graph
+        v = g.create_vertex()
+        ok_(v not in self.snapshot)
+        ok_(snapshot.snapshot(g).vertex_count() == g.vertex_count())
+        try:
+            self.snapshot.clear()
+            self.fail('Expected a TypeError')
+        except TypeError:
+            pass
+
+    def test_empty(self):
+        g = self.create_empty_graph()
+        try:
+            s = snapshot.snapshot(g)
+            eq_([], s.vertices())
+            eq_([], s.edges())
+            eq_(0, s.rank())
+            eq_({}, s.card_histogram())
+            eq_([], s.top_degree(3))
+            ok_('unknown' not in s)
+            eq_(None, s.find_vertex('x'))
+        finally:
+            self.delete_graph(g)
@@ -38,9 +38,19 @@ Tests against the Redis store.
 :organization: Semagia - http://www.semagia.com/
 :license:      BSD License
 """
+import os
+import time
+import hashlib
+from itertools import chain
 from unittest import TestCase
+import redis
+from nose.tools import ok_, eq_
 from graph_test import AbstractGraphTest
+from nodo import XSD, constants as consts
+from nodo.base import BaseImmutableGraph
+from nodo.c14n import canonicalize
 from nodo.store.redis import RedisConnection as Connection
+from nodo.store.redismigrate import migrate_graph, migrate_literal_values
 
 
 class TestRedisGraph(AbstractGraphTest, TestCase):
@@ -53,6 +63,418 @@ class TestRedisGraph(AbstractGraphTest, TestCase):
     def delete_graph(self, graph):
         self.conn.delete_graph(graph.identifier)
 
+    def test_create_edges_chunks(self):
+        g = self.graph
+        vertices = tuple(g.create_vertices(((None, None) for i in range(5)), batch_size=2))
+        eq_(5, len(g))
+        edges = g.create_edges(((v, vertices[0]) for v in vertices[1:]), batch_size=3)
+        eq_(0, g.indegree(vertices[0]))
+        edges = tuple(edges)
+        eq_(4, len(edges))
+        eq_(4, g.indegree(vertices[0]))
+
+    def test_clear_chunks(self):
+        g = self.graph
+        vertices = tuple(g.create_vertices((None, None) for i in range(5)))
+        edges = tuple(g.create_edges((v, vertices[0]) for v in vertices[1:]))
+        steps = []
+        g.clear(batch_size=4, progress=lambda done, total: steps.append((done, total)))
+        eq_(0, len(g))
+        eq_(0, len(g.edges()))
+        eq_(0, g.indegree(vertices[0]))
+        eq_((9, 9), steps[-1])
+        ok_(len(steps) >= 3)
+
+
+class TestRedisGraphWithoutScripting(TestRedisGraph):
+
+    conn = Connection(scripting=False)
+
+
+class TestRedisGraphCached(TestRedisGraph):
+
+    conn = Connection(cache_size=100, cache_ttl=60)
+
+
+class TestRedisGraphTransactional(TestRedisGraph):
+
+    conn = Connection(transactional=True)
+
+    def delete_graph(self, graph):
+        self.conn.delete_graph(graph.identifier)
+        self.conn.commit()
+
+
+class TestRedisGraphSignatureIndex(TestRedisGraph):
+
+    def create_empty_graph(self):
+        g = self.conn.create_graph()
+        g.create_signature_index()
+        return g
+
+
+class TestRedisGraphSignatureIndexWithoutScripting(TestRedisGraphSignatureIndex):
+
+    conn = Connection(scripting=False)
+
+
+class TestRedisGraphComponentIndex(TestRedisGraph):
+
+    def create_empty_graph(self):
+        g = self.conn.create_graph()
+        g.create_component_index()
+        return g
+
+
+class TestRedisGraphComponentIndexWithoutScripting(TestRedisGraphComponentIndex):
+
+    conn = Connection(scripting=False)
+
+
+def test_commit():
+    conn1, conn2 = Connection(transactional=True), Connection()
+    g1 = conn1.create_graph()
+    eq_(None, conn2.get(g1.identifier))
+    v1, v2 = g1.create_vertex(), g1.create_vertex(u'Pumuckl')
+    e = g1.create_edge(v1, v2)
+    eq_(set([v1, v2]), g1.vertices())
+    eq_(set([e]), g1.outgoing_edges(v1))
+    eq_(u'Pumuckl', g1.value(v2))
+    conn1.commit()
+    g2 = conn2.get(g1.identifier)
+    eq_(set([v1, v2]), g2.vertices())
+    eq_(set([e]), g2.ingoing_edges(v2))
+    eq_(v1, g2.head(e))
+    eq_(u'Pumuckl', g2.value(v2))
+    conn1.delete_graph(g1.identifier)
+    conn1.commit()
+    eq_(None, conn2.get(g1.identifier))
+
+
+def test_rollback():
+    conn1, conn2 = Connection(transactional=True), Connection()
+    g1 = conn1.create_graph()
+    v1, v2, v3 = g1.create_vertex(), g1.create_vertex(), g1.create_vertex()
+    e = g1.create_edge(v1, v2)
+    conn1.commit()
+    g1.merge_vertices(v3, v2)
+    g1.delete_vertex(v1)
+    eq_(set([v3]), g1.vertices())
+    conn1.rollback()
+    eq_(set([v1, v2, v3]), g1.vertices())
+    eq_((v2,), tuple(g1.tail(e)))
+    g2 = conn2.get(g1.identifier)
+    eq_((v2,), tuple(g2.tail(e)))
+    conn1.delete_graph(g1.identifier)
+    conn1.commit()
+
+
+def test_delete_graph_background():
+    conn = Connection()
+    g = conn.create_graph()
+    v1, v2 = g.create_vertex(), g.create_vertex()
+    e = g.create_edge(v1, v2)
+    steps = []
+    thread = conn.delete_graph(g.identifier, background=True,
+                               progress=lambda done, total: steps.append(done))
+    ok_(g.identifier not in conn)
+    thread.join()
+    eq_(3, steps[-1])
+    client = redis.Redis()
+    for key in (g._v_key, g._e_key, g._epoch_key, e, '%s:oe' % v1, '%s:ie' % v2):
+        ok_(not client.exists(key))
+
+
+def test_create_signature_index():
+    conn = Connection()
+    g = conn.create_graph()
+    v1, v2, v3 = g.create_vertex(), g.create_vertex(), g.create_vertex()
+    e1, e2, e3 = g.create_edge(v1, v2, v3), g.create_edge(v1, v3, v2), g.create_edge(v3, v3)
+    ok_(not g.has_signature_index)
+    g.create_signature_index(batch_size=2)
+    ok_(g.has_signature_index)
+    eq_([set([e1, e2])], g.duplicate_edges())
+    eq_(e3, g.find_edge(v3, v3))
+    ok_(g.find_edge(v1, v2, v3) in (e1, e2))
+    g.drop_signature_index()
+    ok_(not g.has_signature_index)
+    eq_([set([e1, e2])], g.duplicate_edges())
+    conn.delete_graph(g.identifier)
+    client = redis.Redis()
+    ok_(not client.exists(g._sig_key))
+    ok_(not client.exists('%s:on' % g._sig_key))
+
+
+def test_component_index():
+    for conn in (Connection(), Connection(scripting=False), Connection(transactional=True)):
+        yield _check_component_index, conn
+
+
+def _check_component_index(conn):
+    g = conn.create_graph()
+    v1, v2, v3, v4, v5, v6, v7, v8 = [g.create_vertex() for i in range(8)]
+    e1 = g.create_edge(v1, v2)
+    g.create_edge(v3, v4, v5)
+    ok_(not g.has_component_index)
+    try:
+        g.component(v1)
+        raise AssertionError('Expected a ValueError')
+    except ValueError:
+        pass
+    g.create_component_index(batch_size=1)
+    ok_(g.has_component_index)
+    eq_(g.component(v1), g.component(v2))
+    eq_(g.component(v1), g.component(e1))
+    eq_(g.component(v3), g.component(v5))
+    ok_(g.component(v1) != g.component(v3))
+    eq_(v6, g.component(v6))
+    eq_(None, g.component('v:unknown'))
+    eq_(None, g.component('e:unknown'))
+    g.create_edge(v6, e1)
+    eq_(g.component(v1), g.component(v6))
+    list(g.create_edges([(v4, v1)]))
+    eq_(g.component(v3), g.component(v6))
+    g.create_edge(v8, v8)
+    eq_(v8, g.component(v8))
+    g.create_edge(v8, v2)
+    eq_(g.component(v1), g.component(v8))
+    g.merge_vertices(v7, v8)
+    eq_(g.component(v1), g.component(v7))
+    eq_(None, g.component(v8))
+    g.drop_component_index()
+    ok_(not g.has_component_index)
+    g.create_component_index()
+    eq_(g.component(v5), g.component(v7))
+    g.clear(batch_size=1)
+    conn.commit()
+    eq_(['%s:on' % g._comp_key], redis.Redis().keys('%s*' % g._comp_key))
+    ok_(g.has_component_index)
+    conn.delete_graph(g.identifier)
+    conn.commit()
+    client = redis.Redis()
+    ok_(not client.exists(g._comp_key))
+    ok_(not client.exists('%s:on' % g._comp_key))
+
+
+def test_migrate():
+    client = redis.Redis()
+    ident = 'migrate'
+    digest = hashlib.sha1(str(canonicalize(u'Pumuckl', XSD.string))).hexdigest()
+    glid = 'l:%d:%s' % (consts.XSDURI2ID[XSD.string], digest)
+    old_lid = '%s:%s' % (glid, ident)
+    v, e1, e2 = 'v:m1', 'e:m2', 'e:m3'
+    # Key schema version 1
+    client.sadd('__graphs__', ident)
+    client.sadd('g:%s:vertices' % ident, v, old_lid)
+    client.sadd('g:%s:edges' % ident, e1, e2)
+    client.set(glid, 'Pumuckl')
+    client.zadd(e1, v, 0, old_lid, 1)
+    client.sadd('%s:oe' % v, e1)
+    client.sadd('%s:ie' % old_lid, e1)
+    client.zadd(e2, old_lid, 0, e1, 1)
+    client.sadd('%s:oe' % old_lid, e2)
+    client.sadd('%s:ie' % e1, e2)
+    migrate_graph(client, ident)
+    migrate_literal_values(client)
+    conn = Connection()
+    g = conn.get(ident)
+    lid = g.find_vertex(u'Pumuckl')
+    ok_(lid)
+    ok_(lid != old_lid)
+    eq_(set([v, lid]), g.vertices())
+    eq_(set([e1, e2]), g.edges())
+    eq_(v, g.head(e1))
+    eq_((lid,), tuple(g.tail(e1)))
+    eq_(lid, g.head(e2))
+    eq_(set([e2]), g.ingoing_edges(e1))
+    eq_(set([e1]), g.outgoing_edges(v))
+    eq_(set([e2]), g.outgoing_edges(lid))
+    eq_(u'Pumuckl', g.value(lid))
+    eq_({2: 2}, g.card_histogram())
+    eq_(set([e1, e2]), g.edges_with_card(2))
+    eq_([(lid, 2)], g.top_degree(1))
+    eq_({1: 1, 2: 1}, g.degree_histogram())
+    eq_(set([v]), g.vertices_with_degree(0, 0, consts.DIRECTION_IN))
+    ok_(not client.exists(glid))
+    ok_(not client.exists('%s:ie' % old_lid))
+    ok_(client.sismember('r:' + lid[2:lid.rfind(':')], ident))
+    conn.delete_graph(ident)
+
+
+def test_sweep_literals():
+    conn = Connection()
+    g1, g2 = conn.create_graph(), conn.create_graph()
+    # Literals which are not referenced by other graphs
+    val = u'Pumuckl %s' % g1.identifier
+    lit1, lit2 = g1.create_vertex(val), g2.create_vertex(val)
+    g2.create_vertex(u'Meister Eder %s' % g1.identifier)
+    first_count, first_size = conn.sweep_literals()
+    eq_(val, g1.value(lit1))
+    g1.delete_vertex(lit1)
+    eq_((0, 0), conn.sweep_literals())
+    eq_(val, g2.value(lit2))
+    conn.delete_graph(g2.identifier)
+    count, size = conn.sweep_literals()
+    eq_(2, count)
+    ok_(size > 0)
+    eq_({'literals': first_count + 2, 'bytes': first_size + size}, conn.literal_stats)
+    eq_(None, g2.value(lit2))
+    conn.delete_graph(g1.identifier)
+
+
+def test_id_lease():
+    conn1, conn2 = Connection(id_block_size=3), Connection(id_block_size=3)
+    g1 = conn1.create_graph()
+    g2 = conn2.get(g1.identifier)
+    idents = set()
+    for i in range(10):
+        idents.add(g1.create_vertex())
+        idents.add(g2.create_vertex())
+    eq_(20, len(idents))
+    conn1.delete_graph(g1.identifier)
+
+
+def test_id_lease_fork():
+    conn = Connection(id_block_size=100)
+    g = conn.create_graph()
+    parent = [g.create_vertex()]
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # The child reports its identifiers and exits without running
+        # any cleanup of the test runner
+        try:
+            os.close(read_fd)
+            os.write(write_fd, ' '.join(g.create_vertex() for i in range(3)))
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    child = os.read(read_fd, 4096).split()
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    parent.extend(g.create_vertex() for i in range(3))
+    eq_(3, len(child))
+    eq_(set(), set(parent) & set(child))
+    eq_(7, len(g.vertices()))
+    conn.delete_graph(g.identifier)
+
+
+def test_scan_duplicates():
+    conn = Connection()
+    g = conn.create_graph()
+    v1, v2 = g.create_vertex(), g.create_vertex()
+    e1, e2 = g.create_edge(v1, v2), g.create_edge(v1, v1)
+    scan = g._scan
+    # SSCAN may return a member twice if the set is resized
+    g._scan = lambda key: chain(scan(key), scan(key))
+    eq_(sorted([v1, v2]), sorted(g.iter_vertices()))
+    eq_(sorted([e1, e2]), sorted(g.iter_edges()))
+    eq_(sorted([e1, e2]), sorted(g.iter_outgoing_edges(v1)))
+    eq_(2, BaseImmutableGraph.vertex_count(g))
+    eq_(2, BaseImmutableGraph.edge_count(g))
+    eq_({2: 1, 1: 1}, BaseImmutableGraph.card_histogram(g))
+    conn.delete_graph(g.identifier)
+
+
+def test_cache_invalidation():
+    conn1, conn2 = Connection(cache_size=100, cache_ttl=0), Connection()
+    g1 = conn1.create_graph()
+    g2 = conn2.get(g1.identifier)
+    v1, v2, v3 = g1.create_vertex(), g1.create_vertex(), g1.create_vertex()
+    e = g1.create_edge(v1, v2)
+    eq_((v2,), tuple(g1.tail(e)))
+    eq_(1, g1.indegree(v2))
+    g2.merge_vertices(v3, v2)
+    eq_((v3,), tuple(g1.tail(e)))
+    eq_(0, g1.indegree(v2))
+    conn1.delete_graph(g1.identifier)
+
+
+def test_cache_ttl():
+    conn1, conn2 = Connection(cache_size=100, cache_ttl=60), Connection()
+    g1 = conn1.create_graph()
+    g2 = conn2.get(g1.identifier)
+    v1, v2 = g1.create_vertex(), g1.create_vertex()
+    eq_(0, g1.outdegree(v1))
+    g2.create_edge(v1, v2)
+    # Modifications of other clients are not seen before the ttl expires
+    eq_(0, g1.outdegree(v1))
+    g1.create_vertex()
+    eq_(0, g1.outdegree(v1))
+    g1.create_edge(v2, v1)
+    eq_(1, g1.outdegree(v1))
+    conn1.delete_graph(g1.identifier)
+
+
+def test_cache_notifications():
+    client = redis.Redis()
+    flags = client.config_get('notify-keyspace-events')['notify-keyspace-events']
+    client.config_set('notify-keyspace-events', 'K$')
+    conn1, conn2 = Connection(cache_size=100, cache_ttl=60), Connection()
+    try:
+        g1 = conn1.create_graph()
+        g2 = conn2.get(g1.identifier)
+        v1, v2 = g1.create_vertex(), g1.create_vertex()
+        eq_(0, g1.outdegree(v1))
+        g2.create_edge(v1, v2)
+        for i in range(50):
+            if g1.outdegree(v1):
+                break
+            time.sleep(.1)
+        eq_(1, g1.outdegree(v1))
+        conn1.delete_graph(g1.identifier)
+    finally:
+        conn1.close()
+        client.config_set('notify-keyspace-events', flags)
+
+
+
+def test_cache_notifications_reconnect():
+    client = redis.Redis()
+    flags = client.config_get('notify-keyspace-events')['notify-keyspace-events']
+    client.config_set('notify-keyspace-events', 'K$')
+    conn1, conn2 = Connection(cache_size=100, cache_ttl=60), Connection()
+    try:
+        g1 = conn1.create_graph()
+        g2 = conn2.get(g1.identifier)
+        v1, v2, v3 = g1.create_vertex(), g1.create_vertex(), g1.create_vertex()
+        eq_(0, g1.outdegree(v1))
+        ok_(g1._cache.notified)
+        # The server closes the connection, the listener reconnects
+        client.execute_command('CLIENT', 'KILL', 'TYPE', 'pubsub')
+        g2.create_edge(v1, v2)
+        ok_(_wait(lambda: g1.outdegree(v1) == 1))
+        # The server is unreachable, the caches poll the epochs
+        pubsub = conn1._listener._pubsub
+        unreachable = [True]
+        get_message = pubsub.get_message
+        def failing_get_message(*args, **kw):
+            if unreachable[0]:
+                raise redis.exceptions.ConnectionError('Unreachable')
+            return get_message(*args, **kw)
+        pubsub.get_message = failing_get_message
+        ok_(_wait(lambda: not g1._cache.notified))
+        unreachable[0] = False
+        ok_(_wait(lambda: g1._cache.notified))
+        g2.create_edge(v1, v3)
+        ok_(_wait(lambda: g1.outdegree(v1) == 2))
+        conn1.delete_graph(g1.identifier)
+    finally:
+        conn1.close()
+        client.config_set('notify-keyspace-events', flags)
+
+
+def _wait(predicate, timeout=5.0):
+    """\
+    Returns if `predicate` becomes true within `timeout` seconds.
+    """
+    end = time.time() + timeout
+    while time.time() < end:
+        if predicate():
+            return True
+        time.sleep(.1)
+    return False
+
 
 if __name__ == '__main__':
     import nose
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+Abstract traversal tests.
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from nose.tools import ok_, eq_
+from nodo import constants as consts, traversal
+from abstract_test import AbstractTest
+
+
+class AbstractTraversalTest(AbstractTest):
+
+    def setUp(self):
+        super(AbstractTraversalTest, self).setUp()
+        g = self.graph
+        self.v = v1, v2, v3, v4, v5, v6 = [g.create_vertex() for i in range(6)]
+        g.create_edge(v1, v2)
+        g.create_edge(v2, v3)
+        g.create_edge(v3, v4)
+        g.create_edge(v1, v5, v6)
+        g.create_edge(v6, v1)
+
+    def test_bfs_layers(self):
+        v1, v2, v3, v4, v5, v6 = self.v
+        eq_([set([v1]), set([v2, v5, v6]), set([v3]), set([v4])],
+            list(traversal.bfs_layers(self.graph, [v1])))
+        eq_([set([v4]), set([v3]), set([v2]), set([v1]), set([v6])],
+            list(traversal.bfs_layers(self.graph, [v4], consts.DIRECTION_IN)))
+        eq_([set([v3]), set([v2, v4]), set([v1])],
+            list(traversal.bfs_layers(self.graph, [v3], consts.DIRECTION_BOTH, depth=2)))
+
+    def test_bfs(self):
+        v1, v2, v3, v4, v5, v6 = self.v
+        res = list(traversal.bfs(self.graph, [v2, v5]))
+        eq_(set([(v2, 0), (v5, 0), (v3, 1), (v4, 2)]), set(res))
+        eq_([0, 0, 1, 2], [d for v, d in res])
+
+    def test_limit(self):
+        v1, v2, v3, v4, v5, v6 = self.v
+        res = list(traversal.bfs(self.graph, [v1], limit=3))
+        eq_(3, len(res))
+        eq_((v1, 0), res[0])
+        eq_(2, len(traversal.k_hop(self.graph, [v1], 3, limit=2)))
+        eq_(2, len(list(traversal.dfs(self.graph, [v1], limit=2))))
+
+    def test_k_hop(self):
+        v1, v2, v3, v4, v5, v6 = self.v
+        g = self.graph
+        eq_(set(), traversal.k_hop(g, [v1], 0))
+        eq_(set([v2, v5, v6]), traversal.k_hop(g, [v1], 1))
+        eq_(set([v2, v3, v5, v6]), traversal.k_hop(g, [v1], 2))
+        eq_(set([v1, v2, v3]), traversal.k_hop(g, [v4], 3, consts.DIRECTION_IN))
+        eq_(set([v2, v5, v6, v3]), traversal.k_hop(g, [v1, v4], 1, consts.DIRECTION_BOTH))
+
+    def test_head_in_tail(self):
+        g = self.graph
+        a, b, t = g.create_vertex(), g.create_vertex(), g.create_vertex()
+        e1, e2 = g.create_edge(b, a, b), g.create_edge(a, t)
+        eq_([e1, e2], traversal.shortest_path(g, b, t))
+        eq_(None, traversal.shortest_path(g, t, b))
+        eq_(set([a, t]), traversal.k_hop(g, [b], 2))
+        eq_(set([a, b]), traversal.k_hop(g, [t], 2, consts.DIRECTION_IN))
+        eq_(set([a, b]), traversal.expand(g, [b]))
+
+    def test_dfs(self):
+        v1, v2, v3, v4, v5, v6 = self.v
+        res = list(traversal.dfs(self.graph, [v1]))
+        eq_((v1, 0), res[0])
+        eq_(6, len(res))
+        eq_(set(self.v), set(v for v, d in res))
+        depths = dict(res)
+        eq_(3, depths[v4])
+        # Depth-first: v3 and v4 directly follow v2
+        i = res.index((v2, 1))
+        eq_([(v3, 2), (v4, 3)], res[i + 1:i + 3])
+        eq_(set([v1, v2, v5, v6]), set(v for v, d in traversal.dfs(self.graph, [v1], depth=1)))
+
+    def test_expand(self):
+        v1, v2, v3, v4, v5, v6 = self.v
+        g = self.graph
+        eq_(set([v2, v5, v6, v3]), traversal.expand(g, [v1, v2]))
+        eq_(set([v6, v1]), traversal.expand(g, [v1, v2], consts.DIRECTION_IN))
+        eq_(set(), traversal.expand(g, []))
+
+    def test_shortest_path(self):
+        v1, v2, v3, v4, v5, v6 = self.v
+        g = self.graph
+        path = traversal.shortest_path(g, v1, v4)
+        eq_(3, len(path))
+        eq_(v1, g.head(path[0]))
+        ok_(v4 in g.tail(path[-1]))
+        for e1, e2 in zip(path, path[1:]):
+            ok_(g.head(e2) in g.tail(e1))
+        eq_([], traversal.shortest_path(g, v1, v1))
+        eq_(None, traversal.shortest_path(g, v4, v1))
+        eq_(None, traversal.shortest_path(g, v1, v4, depth=2))
+        eq_(3, len(traversal.shortest_path(g, v1, v4, depth=3)))
+        eq_(None, traversal.shortest_path(g, v1, v4, limit=2))
+        path = traversal.shortest_path(g, v6, v5)
+        eq_([v6, v1], g.heads(path))
+        # A shortcut
+        e = g.create_edge(v1, v3, v4)
+        eq_([e], traversal.shortest_path(g, v1, v4))
+        eq_(2, len(traversal.shortest_path(g, v6, v3)))
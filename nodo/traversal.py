@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2010 - 2011 -- Lars Heuer - Semagia <http://www.semagia.com/>.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the project name nor the names of the contributors may be 
+#       used to endorse or promote products derived from this software 
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+"""\
+This module provides traversals of Nodo graphs.
+
+The traversals expand a whole frontier per step: The edges of all
+identifiers of the frontier are fetched with one ``outgoing_edges`` /
+``ingoing_edges`` call and the tails / heads of these edges with one
+``tails`` / ``heads`` call. The number of requests depends on the depth of
+the traversal and not on the number of visited identifiers.
+
+The traversals follow the edges from their head to their tail
+(`constants.DIRECTION_OUT`), from the tail to the head
+(`constants.DIRECTION_IN`) or in both directions
+(`constants.DIRECTION_BOTH`).
+
+:author:       Lars Heuer (heuer[at]semagia.com)
+:organization: Semagia - http://www.semagia.com/
+:license:      BSD License
+"""
+from __future__ import absolute_import
+from itertools import islice
+from . import constants as consts
+from ._utils import BATCH_SIZE as _BATCH_SIZE, chunks as _chunks, unique as _unique
+
+
+def bfs_layers(g, sources, direction=consts.DIRECTION_OUT, depth=None, limit=None):
+    """\
+    Returns an iterator over the layers of a breadth-first search. A layer
+    is a set of identifiers with the same distance to the `sources`, the
+    first layer contains the `sources`.
+
+    `g`
+        The graph.
+    `sources`
+        An iterable of vertex and/or edge identifiers.
+    `direction`
+        The direction of the traversal (default: `constants.DIRECTION_OUT`).
+    `depth`
+        The maximum distance to the `sources` or ``None`` (unlimited).
+    `limit`
+        The maximum number of identifiers (including the `sources`) or
+        ``None`` (unlimited). The last layer may be truncated.
+    """
+    frontier = set(sources)
+    visited = set()
+    distance = 0
+    while frontier:
+        if limit is not None:
+            if len(visited) + len(frontier) > limit:
+                frontier = set(islice(frontier, limit - len(visited)))
+            if not frontier:
+                return
+        yield frontier
+        visited.update(frontier)
+        if depth is not None and distance >= depth:
+            return
+        distance += 1
+        frontier = expand(g, frontier, direction) - visited
+
+
+def bfs(g, sources, direction=consts.DIRECTION_OUT, depth=None, limit=None):
+    """\
+    Returns an iterator over ``(identifier, distance)`` tuples in
+    breadth-first order. The `sources` have the distance ``0``.
+
+    See `bfs_layers` for a description of the parameters.
+    """
+    for distance, layer in enumerate(bfs_layers(g, sources, direction, depth, limit)):
+        for ident in layer:
+            yield ident, distance
+
+
+def k_hop(g, sources, k, direction=consts.DIRECTION_OUT, limit=None):
+    """\
+    Returns the set of identifiers which are reachable from the `sources`
+    with at least one and at most `k` hops. The `sources` are not part of
+    the result.
+
+    `k`
+        The maximum number of hops.
+    `limit`
+        The maximum number of returned identifiers or ``None`` (unlimited).
+
+    See `bfs_layers` for a description of the other parameters.
+    """
+    sources = set(sources)
+    if limit is not None:
+        limit += len(sources)
+    layers = bfs_layers(g, sources, direction, k, limit)
+    next(layers, None)
+    res = set()
+    for layer in layers:
+        res.update(layer)
+    return res
+
+
+def dfs(g, sources, direction=consts.DIRECTION_OUT, depth=None, limit=None):
+    """\
+    Returns an iterator over ``(identifier, depth)`` tuples in depth-first
+    preorder. The `sources` have the depth ``0``.
+
+    Each visited identifier is expanded on its own, but the identifiers
+    are yielded while the graph is traversed.
+
+    See `bfs_layers` for a description of the parameters.
+    """
+    stack = [(ident, 0) for ident in reversed(list(_unique(sources)))]
+    visited = set()
+    while stack:
+        if limit is not None and len(visited) >= limit:
+            return
+        ident, d = stack.pop()
+        if ident in visited:
+            continue
+        visited.add(ident)
+        yield ident, d
+        if depth is None or d < depth:
+            stack.extend((n, d + 1) for n in sorted(expand(g, (ident,), direction) - visited,
+                                                    reverse=True))
+
+
+def shortest_path(g, source, target, depth=None, limit=None):
+    """\
+    Returns a list of edges which forms a shortest path from the `source`
+    to the `target` or ``None`` if no such path exists.
+
+    The head of the first edge is the `source`, the tail of each edge
+    contains the head of the next edge and the tail of the last edge
+    contains the `target`. If `source` and `target` are equal, an empty
+    list is returned.
+
+    The search is bidirectional: The smaller of the two frontiers is
+    expanded per step, forwards along outgoing edges from the `source` and
+    backwards along ingoing edges from the `target`.
+
+    `g`
+        The graph.
+    `source`
+        The vertex identifier where the path starts.
+    `target`
+        The vertex or edge identifier where the path ends.
+    `depth`
+        The maximum number of edges of the path or ``None`` (unlimited).
+    `limit`
+        The maximum number of visited identifiers or ``None``
+        (unlimited). If the limit is exceeded, ``None`` is returned.
+    """
+    if source == target:
+        return []
+    # identifier -> (adjacent identifier towards the source / target, edge, distance)
+    forward, backward = {source: (None, None, 0)}, {target: (None, None, 0)}
+    forward_frontier, backward_frontier = set([source]), set([target])
+    length = 0
+    while forward_frontier and backward_frontier:
+        if depth is not None and length >= depth:
+            return None
+        if limit is not None and len(forward) + len(backward) > limit:
+            return None
+        length += 1
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier = _step(g, forward_frontier, forward, consts.DIRECTION_OUT)
+            meets = [ident for ident in forward_frontier if ident in backward]
+        else:
+            backward_frontier = _step(g, backward_frontier, backward, consts.DIRECTION_IN)
+            meets = [ident for ident in backward_frontier if ident in forward]
+        if meets:
+            meet = min(meets, key=lambda ident: forward[ident][2] + backward[ident][2])
+            return _path(forward, meet)[::-1] + _path(backward, meet)
+    return None
+
+
+def _step(g, frontier, parents, direction):
+    """\
+    Expands the `frontier` in the provided `direction` and returns the
+    new frontier. The `parents` are updated with the newly reached
+    identifiers.
+    """
+    res = set()
+    for chunk in _chunks(frontier, _BATCH_SIZE):
+        if direction == consts.DIRECTION_OUT:
+            edges = list(g.outgoing_edges(*chunk))
+        else:
+            edges = list(g.ingoing_edges(*chunk))
+        if not edges:
+            continue
+        members = set(chunk)
+        for edge, head, tail in zip(edges, g.heads(edges), g.tails(edges)):
+            if direction == consts.DIRECTION_OUT:
+                parent, reached = head, tail
+            else:
+                parent = next((ident for ident in tail if ident in members), None)
+                reached = (head,)
+            if parent not in parents:
+                # The edge was modified concurrently
+                continue
+            distance = parents[parent][2] + 1
+            for ident in reached:
+                if ident not in parents:
+                    parents[ident] = parent, edge, distance
+                    res.add(ident)
+    return res
+
+
+def _path(parents, ident):
+    """\
+    Returns the edges from `ident` to the start of the search.
+    """
+    res = []
+    while parents[ident][1] is not None:
+        ident, edge, distance = parents[ident]
+        res.append(edge)
+    return res
+
+
+def expand(g, identifiers, direction=consts.DIRECTION_OUT):
+    """\
+    Returns the set of identifiers which are adjacent to the `identifiers`.
+
+    The edges of the `identifiers` are fetched in chunks of ``_BATCH_SIZE``
+    identifiers.
+
+    `g`
+        The graph.
+    `identifiers`
+        An iterable of vertex and/or edge identifiers.
+    `direction`
+        `constants.DIRECTION_OUT` (the tails of the outgoing edges),
+        `constants.DIRECTION_IN` (the heads of the ingoing edges) or
+        `constants.DIRECTION_BOTH`.
+    """
+    res = set()
+    for chunk in _chunks(identifiers, _BATCH_SIZE):
+        if direction in (consts.DIRECTION_OUT, consts.DIRECTION_BOTH):
+            for tail in g.tails(list(g.outgoing_edges(*chunk))):
+                res.update(tail)
+        if direction in (consts.DIRECTION_IN, consts.DIRECTION_BOTH):
+            res.update(g.heads(list(g.ingoing_edges(*chunk))))
+    res.discard(None)
+    return res
+